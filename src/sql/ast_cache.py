@@ -0,0 +1,60 @@
+"""
+A bounded LRU cache of sqlglot parse and transpile results, keyed by (query,
+dialect). Internal queries (plots, profiles, the table explorer) are generated from
+a few templates and users often re-run the same cells, so most of them skip
+parsing
+"""
+
+from functools import lru_cache
+
+import sqlglot
+
+# maximum number of (query, dialect) pairs to keep for each function
+MAX_SIZE = 512
+
+
+# errors aren't cached (lru_cache doesn't store exceptions): re-raising a cached
+# exception would keep growing its traceback and keep the frames alive
+@lru_cache(maxsize=MAX_SIZE)
+def _parse(sql, read):
+    return tuple(sqlglot.parse(sql, read=read))
+
+
+def parse(sql, read=None, copy=True):
+    """
+    Same as sqlglot.parse, but cached. Pass copy=False if the caller doesn't
+    modify the expressions in place (methods such as .limit() or .where() return a
+    copy by default), to skip copying them
+    """
+    expressions = _parse(sql, read)
+
+    if copy:
+        return [None if e is None else e.copy() for e in expressions]
+
+    return list(expressions)
+
+
+def parse_one(sql, read=None, copy=True):
+    """Same as sqlglot.parse_one, but cached (see parse)"""
+    expressions = parse(sql, read=read, copy=copy)
+
+    if not expressions or expressions[0] is None:
+        raise sqlglot.errors.ParseError(f"No expression was parsed from '{sql}'")
+
+    return expressions[0]
+
+
+@lru_cache(maxsize=MAX_SIZE)
+def _transpile(sql, read, write):
+    return tuple(sqlglot.transpile(sql, read=read, write=write))
+
+
+def transpile(sql, read=None, write=None):
+    """Same as sqlglot.transpile, but cached"""
+    return list(_transpile(sql, read, write))
+
+
+def clear():
+    """Remove all the cached results"""
+    _parse.cache_clear()
+    _transpile.cache_clear()
@@ -0,0 +1,186 @@
+"""
+Per-connection cache of the database metadata (tables, columns, schemas) used by
+%sqlcmd, %sqlplot, the table widget, and the error suggestions. Entries expire
+after SqlMagic.catalog_cache_ttl seconds and are invalidated when a statement
+that might change the catalog (e.g., CREATE, DROP, ALTER) runs
+"""
+
+import time
+
+from sqlalchemy import inspect
+
+from sql import _current
+from sql.parse import writes_data
+
+# seconds to keep the metadata if %sql hasn't been loaded (e.g., when using the
+# Python API)
+DEFAULT_TTL = 300
+
+# statements (first keyword) that might add, remove, or modify tables
+_CATALOG_STATEMENTS = {"create", "drop", "alter", "rename", "attach", "detach", "use"}
+
+_MISSING = object()
+
+
+def statement_changes_catalog(statement):
+    """Check if a statement might change the tables or columns in the database"""
+    words = statement.lower().split(maxsplit=1)
+
+    if not words:
+        return False
+
+    # SELECT ... INTO creates a table
+    if words[0] in {"select", "with"}:
+        return writes_data(statement)
+
+    return words[0] in _CATALOG_STATEMENTS
+
+
+def _get_ttl():
+    try:
+        return _current._get_sql_magic().catalog_cache_ttl
+    except RuntimeError:
+        return DEFAULT_TTL
+
+
+class CatalogCache:
+    """
+    Stores metadata per connection alias. A value is computed the first time it's
+    requested and reused until it's older than the time-to-live or the
+    connection's entries are invalidated
+    """
+
+    def __init__(self):
+        self._entries = dict()
+        self._listeners = []
+
+    def get(self, alias, key, ttl=0):
+        """
+        Return the value for the given key (or a sentinel if missing or older
+        than ttl seconds, 0 means entries never expire)
+        """
+        entry = self._entries.get((alias, key))
+
+        if entry is None:
+            return _MISSING
+
+        value, created_at = entry
+
+        if ttl and time.monotonic() - created_at > ttl:
+            del self._entries[(alias, key)]
+            return _MISSING
+
+        return value
+
+    def put(self, alias, key, value):
+        """Store the value for the given key"""
+        self._entries[(alias, key)] = (value, time.monotonic())
+
+    def get_or_compute(self, alias, key, compute):
+        """Return the cached value, calling compute() and storing it if missing"""
+        value = self.get(alias, key, ttl=_get_ttl())
+
+        if value is _MISSING:
+            value = compute()
+            self.put(alias, key, value)
+
+        return value
+
+    def invalidate(self, alias):
+        """Remove all entries for the given connection alias"""
+        for key in [key for key in self._entries if key[0] == alias]:
+            del self._entries[key]
+
+        self._notify(alias)
+
+    def clear(self):
+        """Remove all entries, returns the number of removed entries"""
+        n_entries = len(self._entries)
+        self._entries.clear()
+        self._notify(None)
+        return n_entries
+
+    def add_invalidation_listener(self, listener):
+        """
+        Call listener(alias) when a connection's entries are invalidated (alias
+        is None when all the entries are removed)
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, alias):
+        for listener in self._listeners:
+            listener(alias)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+catalog_cache = CatalogCache()
+
+
+def get_inspector(conn):
+    """
+    Return a SQLAlchemy inspector for the connection. The inspector caches the
+    reflected metadata, so we keep one per connection and drop it along with the
+    rest of the entries
+    """
+    return catalog_cache.get_or_compute(
+        conn.alias, ("inspector",), lambda: inspect(conn.connection_sqlalchemy)
+    )
+
+
+def get_table_names(conn, schema=None, inspector=None):
+    """
+    Return the names of the tables in the schema (default schema if None). If
+    missing, they're retrieved with the inspector (or the connection's inspector)
+    """
+    return catalog_cache.get_or_compute(
+        conn.alias,
+        ("tables", schema),
+        lambda: list((inspector or get_inspector(conn)).get_table_names(schema=schema)),
+    )
+
+
+def get_schema_names(conn, inspector=None):
+    """Return the names of the schemas in the database"""
+    return catalog_cache.get_or_compute(
+        conn.alias,
+        ("schemas",),
+        lambda: list((inspector or get_inspector(conn)).get_schema_names()),
+    )
+
+
+def get_columns(conn, table, schema=None, inspector=None):
+    """
+    Return the columns (a list of dictionaries with the name, type, and other
+    attributes of each column) in a table
+    """
+    return catalog_cache.get_or_compute(
+        conn.alias,
+        ("columns", table, schema),
+        lambda: (inspector or get_inspector(conn)).get_columns(table, schema) or [],
+    )
+
+
+def get_primary_key(conn, table, schema=None, inspector=None):
+    """Return the names of the primary key columns of a table"""
+    return catalog_cache.get_or_compute(
+        conn.alias,
+        ("primary_key", table, schema),
+        lambda: (inspector or get_inspector(conn)).get_pk_constraint(
+            table, schema=schema
+        )["constrained_columns"],
+    )
+
+
+def is_table_known(conn, table):
+    """Check if the table was found in a previous lookup"""
+    return catalog_cache.get(conn.alias, ("exists", table), ttl=_get_ttl()) is True
+
+
+def add_known_table(conn, table):
+    """
+    Record that a table exists. Only existing tables are stored so a table
+    created outside JupySQL is found on the next lookup
+    """
+    catalog_cache.put(conn.alias, ("exists", table), True)
@@ -0,0 +1,65 @@
+from sql import _current
+from sql.cmd.cmd_utils import CmdParser
+from sql.display import Table, Message
+from sql.run.cache import result_cache
+from sql.run.disk_cache import DiskCache
+
+# maximum number of characters of the query to show when listing cached results
+QUERY_PREVIEW_LENGTH = 50
+
+
+def _query_preview(sql):
+    if len(sql) <= QUERY_PREVIEW_LENGTH:
+        return sql
+
+    return sql[: QUERY_PREVIEW_LENGTH - 3] + "..."
+
+
+def cache(others):
+    """
+    Implementation of `%sqlcmd cache`
+    This function lists the results stored in the result cache
+    (SqlMagic.result_cache) or clears them. It can also delete the results
+    stored on disk by %%sql --cache.
+
+    Parameters
+    ----------
+    others : str,
+        A string containing the command line arguments.
+    """
+    parser = CmdParser()
+    parser.add_argument(
+        "-c", "--clear", action="store_true", help="Clear the result cache"
+    )
+    parser.add_argument(
+        "--clear-disk",
+        action="store_true",
+        help="Delete the results stored by %%sql --cache",
+    )
+    args = parser.parse_args(others)
+
+    if args.clear_disk:
+        cache_dir = _current._get_sql_magic().cache_dir
+        n_files = DiskCache(cache_dir).clear()
+        return Message(f"Removed {n_files} result(s) from {cache_dir}")
+
+    if args.clear:
+        n_entries = result_cache.clear()
+        return Message(f"Removed {n_entries} result(s) from the cache")
+
+    if not len(result_cache):
+        return Message("The result cache is empty")
+
+    rows = [
+        [
+            key.alias,
+            _query_preview(key.sql),
+            len(entry.rows),
+            round(entry.size / 1024, 1),
+            round(entry.age),
+            entry.hits,
+        ]
+        for key, entry in result_cache.items()
+    ]
+
+    return Table(["Connection", "Query", "Rows", "Size (KB)", "Age (s)", "Hits"], rows)
@@ -113,7 +113,7 @@ def snippets(others, user_ns):
         deps = store.get_key_dependents(key)
         remaining_keys = store.del_saved_key(key)
         for dep in deps:
-            store.store[dep].remove_snippet_dependency(key)
+            store.store.remove_dependency(dep, key)
         return _modify_display_msg(key, remaining_keys, deps)
 
     elif args.delete_force_all:
@@ -1,12 +1,11 @@
 from pathlib import Path
-from jinja2 import Template
 
 from sqlalchemy.engine import Engine
 
 from sql import parse, exceptions
 from sql.store import store
 from sql.connection import ConnectionManager, is_pep249_compliant, is_spark
-from sql.util import validate_nonidentifier_connection
+from sql.util import render_template, validate_nonidentifier_connection
 
 
 class SQLPlotCommand:
@@ -91,7 +90,7 @@ class SQLCommand:
 
         if self.args.with_:
             self.args.with_ = [
-                Template(item).render(user_ns) for item in self.args.with_
+                render_template(item, user_ns) for item in self.args.with_
             ]
             final = store.render(self.parsed["sql"], with_=self.args.with_)
             self.parsed["sql"] = str(final)
@@ -135,7 +134,7 @@ class SQLCommand:
         return self.parsed["return_result_var"]
 
     def _var_expand(self, sql, user_ns):
-        return Template(sql).render(user_ns)
+        return render_template(sql, user_ns)
 
     def __repr__(self) -> str:
         return (
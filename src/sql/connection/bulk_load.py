@@ -0,0 +1,216 @@
+"""
+Fast paths to load a pandas data frame into a table (%sql --persist/--append).
+pandas.DataFrame.to_sql inserts the rows with the driver's defaults, which is
+slow for large data frames; here we pick the fastest loader for each database:
+
+* DuckDB: register the data frame and run CREATE TABLE ... AS SELECT (the data
+  is read directly from the data frame, no rows are inserted one by one)
+* PostgreSQL (psycopg2 and psycopg): COPY ... FROM STDIN with a CSV buffer
+* SQLite: executemany in batches (it's an embedded database, so a prepared
+  statement is faster than large multi-row INSERTs)
+* Other databases: multi-row INSERT ... VALUES statements, to reduce the number
+  of round trips to the server (or executemany, if the SQLAlchemy dialect
+  doesn't support them, e.g., Oracle)
+"""
+
+import csv
+import io
+import uuid
+
+from sqlalchemy import inspect
+
+from sql import display
+
+# number of rows inserted at a time (the progress is reported after each chunk)
+DEFAULT_CHUNKSIZE = 10_000
+
+# maximum number of parameters in a single statement, used to limit the number of
+# rows in multi-row INSERTs
+_MAX_PARAMETERS = {
+    "mssql": 2_100,
+}
+_DEFAULT_MAX_PARAMETERS = 32_767
+
+# maximum number of rows in a single INSERT ... VALUES statement
+_MAX_ROWS = {
+    "mssql": 1_000,
+}
+
+# written for NULL values in COPY, so they're distinct from empty strings (in CSV
+# format, COPY loads unquoted empty values as NULL by default)
+_COPY_NULL = r"\N"
+
+_COPY_DRIVERS = {"psycopg2", "psycopg"}
+
+
+def _quote(dialect, name, schema=None):
+    preparer = dialect.identifier_preparer
+    quoted = preparer.quote(name)
+    return f"{preparer.quote_schema(schema)}.{quoted}" if schema else quoted
+
+
+class _ProgressReporter:
+    """
+    Wraps an insert method (see the method argument in pandas.DataFrame.to_sql)
+    to report the number of rows loaded after each chunk
+    """
+
+    def __init__(self, insert, table_name, n_rows):
+        self._insert = insert
+        self._table_name = table_name
+        self._n_rows = n_rows
+        self._n_loaded = 0
+        self._progress = display.ProgressMessage(self._message())
+
+    def _message(self):
+        return (
+            f"Persisting {self._table_name}: "
+            f"{self._n_loaded:,}/{self._n_rows:,} rows loaded"
+        )
+
+    def __call__(self, pd_table, conn, keys, data_iter):
+        rows = list(data_iter)
+        self._insert(pd_table, conn, keys, rows)
+        self._n_loaded += len(rows)
+        self._progress.update(self._message())
+        return len(rows)
+
+
+def insert_executemany(pd_table, conn, keys, data_iter):
+    """Insert the rows with a single executemany call"""
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    conn.execute(pd_table.table.insert(), rows)
+    return len(rows)
+
+
+def insert_multi_values(pd_table, conn, keys, data_iter):
+    """
+    Insert the rows with multi-row INSERT ... VALUES statements, each one with as
+    many rows as the database's parameter limit allows
+    """
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    max_parameters = _MAX_PARAMETERS.get(conn.dialect.name, _DEFAULT_MAX_PARAMETERS)
+    batch_size = max(1, max_parameters // max(1, len(keys)))
+    batch_size = min(batch_size, _MAX_ROWS.get(conn.dialect.name, batch_size))
+
+    for start in range(0, len(rows), batch_size):
+        conn.execute(pd_table.table.insert().values(rows[start : start + batch_size]))
+
+    return len(rows)
+
+
+def insert_copy(pd_table, conn, keys, data_iter):
+    """Insert the rows with PostgreSQL's COPY ... FROM STDIN (CSV format)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [_COPY_NULL if value is None else value for value in row] for row in data_iter
+    )
+
+    table = _quote(conn.dialect, pd_table.name, pd_table.schema)
+    columns = ", ".join(conn.dialect.identifier_preparer.quote(key) for key in keys)
+    statement = (
+        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT CSV, NULL '{_COPY_NULL}')"
+    )
+
+    dbapi_connection = conn.connection.dbapi_connection
+
+    with dbapi_connection.cursor() as cursor:
+        # psycopg2
+        if hasattr(cursor, "copy_expert"):
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+        # psycopg 3
+        else:
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+
+        return cursor.rowcount
+
+
+def select_insert_method(dialect, driver, supports_multivalues_insert=True):
+    """Return the insert method for pandas.DataFrame.to_sql"""
+    if dialect == "postgresql" and driver in _COPY_DRIVERS:
+        return insert_copy
+
+    if dialect == "sqlite" or not supports_multivalues_insert:
+        return insert_executemany
+
+    return insert_multi_values
+
+
+def to_sql(
+    data_frame, table_name, connection, if_exists, index, schema=None, chunksize=None
+):
+    """
+    Load the data frame with pandas.DataFrame.to_sql using the fastest insert
+    method for the database, reporting progress if it takes more than one chunk
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection to use
+
+    chunksize : int, default None
+        Number of rows to insert at a time, defaults to DEFAULT_CHUNKSIZE
+    """
+    chunksize = chunksize or DEFAULT_CHUNKSIZE
+    method = select_insert_method(
+        connection.dialect.name,
+        connection.dialect.driver,
+        connection.dialect.supports_multivalues_insert,
+    )
+
+    if len(data_frame) > chunksize:
+        method = _ProgressReporter(method, table_name, len(data_frame))
+
+    return data_frame.to_sql(
+        table_name,
+        connection,
+        if_exists=if_exists,
+        index=index,
+        schema=schema,
+        chunksize=chunksize,
+        method=method,
+    )
+
+
+def to_duckdb(conn, table_name, data_frame, if_exists, index, schema=None):
+    """
+    Load the data frame into DuckDB: the data frame is registered as a view and
+    the table is created (or appended to) with a single statement
+
+    Parameters
+    ----------
+    conn : sql.connection.SQLAlchemyConnection
+        A connection to a DuckDB database (via duckdb-engine)
+    """
+    # a pandas.Series
+    if data_frame.ndim == 1:
+        data_frame = data_frame.to_frame()
+
+    # match pandas.DataFrame.to_sql, which stores the index as column(s)
+    if index:
+        data_frame = data_frame.reset_index()
+
+    connection = conn.connection_sqlalchemy
+    exists = inspect(connection).has_table(table_name, schema=schema)
+
+    if exists and if_exists == "fail":
+        raise ValueError(f"Table '{table_name}' already exists.")
+
+    table = _quote(connection.dialect, table_name, schema)
+    view_name = f"jupysql_persist_{uuid.uuid4().hex}"
+    dbapi_connection = conn._get_dbapi_connection()
+    dbapi_connection.register(view_name, data_frame)
+
+    try:
+        if exists and if_exists == "append":
+            statement = f"INSERT INTO {table} BY NAME SELECT * FROM {view_name}"
+        elif exists:
+            statement = f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {view_name}"
+        else:
+            statement = f"CREATE TABLE {table} AS SELECT * FROM {view_name}"
+
+        conn.raw_execute(statement)
+    finally:
+        dbapi_connection.unregister(view_name)
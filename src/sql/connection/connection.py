@@ -1,13 +1,19 @@
+import re
 import warnings
 import difflib
 import abc
 import os
 from difflib import get_close_matches
 import atexit
-from functools import partial
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
 
 import sqlalchemy
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 from sqlalchemy.exc import (
     NoSuchModuleError,
     OperationalError,
@@ -18,25 +24,29 @@ from sqlalchemy.exc import (
 )
 
 from sql.run.sparkdataframe import handle_spark_dataframe
+from sql.catalog import catalog_cache
+from sql.run.cache import result_cache
 
 from IPython.core.error import UsageError
 import sqlglot
+from sqlglot.errors import ErrorLevel
 import sqlparse
 from ploomber_core.exceptions import modify_exceptions
 
 
 from sql.store import store
 from sql.telemetry import telemetry
-from sql import exceptions, display
-from sql.error_handler import handle_exception
+from sql import ast_cache, exceptions, display
+from sql.error_handler import handle_exception, is_table_not_found_error
 from sql.parse import (
     escape_string_literals_with_colon_prefix,
     find_named_parameters,
+    SQLStatement,
     ConnectionsFile,
 )
 from sql.warnings import JupySQLQuotedNamedParametersWarning, JupySQLRollbackPerformed
 from sql import _current
-from sql.connection import error_handling
+from sql.connection import bulk_load, error_handling
 
 BASE_DOC_URL = "https://jupysql.ploomber.io/en/latest"
 
@@ -486,7 +496,7 @@ class AbstractConnection(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def raw_execute(self, query, parameters=None):
+    def raw_execute(self, query, parameters=None, yield_per=None):
         """Run the query without any pre-processing"""
         pass
 
@@ -499,7 +509,9 @@ class AbstractConnection(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def to_table(self, table_name, data_frame, if_exists, index, schema=None):
+    def to_table(
+        self, table_name, data_frame, if_exists, index, schema=None, chunksize=None
+    ):
         """Create a table from a pandas DataFrame"""
         pass
 
@@ -510,6 +522,10 @@ class AbstractConnection(abc.ABC):
             if rs._sqlaproxy is not None:
                 rs._sqlaproxy.close()
 
+        # the alias might be re-used for a connection to another database
+        result_cache.invalidate(self.alias)
+        catalog_cache.invalidate(self.alias)
+
         self._connection.close()
 
     def _get_sqlglot_dialect(self):
@@ -553,12 +569,33 @@ class AbstractConnection(abc.ABC):
             return query
 
         try:
-            return ";\n".join(
-                [p.sql(dialect=write_dialect) for p in sqlglot.parse(query)]
-            )
+            return ";\n".join(ast_cache.transpile(query, write=write_dialect))
         except Exception:
             return query
 
+    def _add_limit(self, query, limit):
+        """Add a LIMIT clause (or tighten the existing one) to a SELECT query using
+        the current dialect's syntax (e.g., TOP in SQL Server), so the database
+        doesn't compute rows that we won't fetch
+
+        Parameters
+        ----------
+        query : str
+            Original SQL clause
+
+        limit : int
+            Maximum number of rows to return
+
+        Returns
+        -------
+        str
+            SQL clause with the limit, or the original one if it's not a SELECT
+            query, it already has a lower limit, or it can't be parsed (the rows
+            are truncated when fetching them instead)
+        """
+        limited = _add_limit(str(query), self._get_sqlglot_dialect(), limit)
+        return query if limited is None else limited
+
     def _prepare_query(self, query, with_=None) -> str:
         """
         Returns a textual representation of a query based
@@ -589,6 +626,110 @@ class AbstractConnection(abc.ABC):
         query_prepared = self._prepare_query(query, with_)
         return self.raw_execute(query_prepared)
 
+    def _map_concurrently(self, function, items):
+        """
+        Call function(conn, item) for each item and return the results (in the
+        same order). This is used to run the independent queries behind a feature
+        (e.g., a plot with many columns), connections that support it run them
+        concurrently, each one with its own database connection
+
+        Parameters
+        ----------
+        function : callable
+            A function that takes a connection and an item, it must only run
+            queries that read data
+
+        items : iterable
+            The items to pass to the function
+        """
+        return [function(self, item) for item in items]
+
+    def _cancel(self):
+        """
+        Cancel the query running in this connection (called from another thread)
+        using the driver's native mechanism. Returns False if it's not supported
+        """
+        return False
+
+    @contextmanager
+    def _cancel_on_timeout(self, timeout):
+        """
+        Cancel the query executed in the block if it takes longer than timeout
+        seconds (0 or None means no timeout) or if the user interrupts the kernel
+        """
+        lock = threading.Lock()
+        timed_out = threading.Event()
+        finished = False
+
+        def on_timeout():
+            with lock:
+                # the query might've finished while waiting for the lock, and
+                # some drivers would cancel the next one
+                if not finished:
+                    timed_out.set()
+                    self._cancel()
+
+        timer = None
+
+        if timeout:
+            timer = threading.Timer(timeout, on_timeout)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            yield
+        except KeyboardInterrupt:
+            self._cancel()
+            raise
+        except Exception as e:
+            if timed_out.is_set():
+                raise exceptions.RuntimeError(
+                    f"The query was cancelled after {timeout} seconds "
+                    "(SqlMagic.statement_timeout or --timeout)"
+                ) from e
+
+            raise
+        finally:
+            with lock:
+                finished = True
+
+            if timer is not None:
+                timer.cancel()
+
+    def _supports_concurrency(self):
+        """
+        Check if queries can run concurrently in other connections and see the same
+        data as this one (see _map_concurrently)
+        """
+        return False
+
+    def _supports_new_connections(self):
+        """
+        Check if the connection can open another connection to the same database
+        (see _copy_with_new_connection)
+        """
+        return False
+
+    def _copy_with_new_connection(self):
+        """
+        Returns a context manager that yields a copy of this connection that uses
+        a new connection to the same database, so it can run queries in another
+        thread. The new connection is closed (or returned to the pool) on exit
+        """
+        raise exceptions.UsageError(
+            f"{type(self).__name__} cannot open another connection to the database"
+        )
+
+    def _copy_with(self, **attributes):
+        """Return a copy of this connection with its own result sets"""
+        copied = copy.copy(self)
+        copied._result_sets = ResultSetCollection()
+
+        for name, value in attributes.items():
+            setattr(copied, name, value)
+
+        return copied
+
     def is_use_backtick_template(self):
         """Get if the dialect support backtick (`) syntax as identifier
 
@@ -644,6 +785,128 @@ _COMMIT_BLACKLIST_DIALECTS = (
 )
 
 
+# dialects that don't benefit from running queries in separate connections: each
+# connection to an in-memory database sees a different database, and they already
+# parallelize queries internally
+_NO_CONCURRENCY_DIALECTS = {"duckdb", "sqlite"}
+
+# a LIMIT clause (optionally followed by OFFSET) at the end of a query
+_TRAILING_LIMIT = re.compile(r"\b(limit\s+)\d+(\s+offset\s+\d+)?$", re.IGNORECASE)
+
+
+def _limit_clause(dialect, limit):
+    """
+    Return the clause that limits the rows in the dialect if it goes at the end
+    of the query (e.g., LIMIT 10, or FETCH FIRST 10 ROWS ONLY), None otherwise
+    (e.g., TOP 10 in SQL Server)
+    """
+    prefix = "SELECT * FROM t "
+    sql = sqlglot.exp.select("*").from_("t").limit(limit).sql(dialect=dialect)
+    return sql[len(prefix) :] if sql.startswith(prefix) else None
+
+
+@lru_cache(maxsize=ast_cache.MAX_SIZE)
+def _add_limit(query, dialect, limit):
+    """
+    Return the query with a LIMIT clause spliced in its text (see
+    AbstractConnection._add_limit), or None if the query is kept as is. The query
+    is only parsed to check where the LIMIT goes, the SQL generated by sqlglot is
+    never sent since it might not be equivalent (e.g., it drops unsupported
+    clauses or changes the bind parameters' style)
+    """
+    try:
+        # .limit() returns a copy, so we can use the cached expression
+        expressions = ast_cache.parse(query, read=dialect, copy=False)
+    except Exception:
+        return None
+
+    if len(expressions) != 1:
+        return None
+
+    expression = expressions[0]
+
+    # SELECT INTO creates a table, so limiting it would change the table
+    if not isinstance(expression, sqlglot.exp.Query) or expression.args.get("into"):
+        return None
+
+    # the parameters are bound by the driver (a LIMIT would be fine, but we don't
+    # risk changing how they're passed)
+    if expression.find(sqlglot.exp.Placeholder) is not None:
+        return None
+
+    # sqlglot doesn't understand the whole query (e.g., TABLESAMPLE in MySQL), so
+    # we can't tell where the LIMIT goes
+    try:
+        expression.sql(dialect=dialect, unsupported_level=ErrorLevel.RAISE)
+    except Exception:
+        return None
+
+    current = expression.args.get("limit")
+    text = query.rstrip().rstrip(";").rstrip()
+
+    if current is not None:
+        # keep FETCH FIRST clauses as they might have options like WITH TIES
+        if not isinstance(current, sqlglot.exp.Limit):
+            return None
+
+        value = current.expression
+
+        if not (isinstance(value, sqlglot.exp.Literal) and value.is_int):
+            return None
+
+        # the query is already limited, no need to re-write it
+        if int(value.this) <= limit:
+            return None
+
+        match = _TRAILING_LIMIT.search(text)
+
+        if match is None:
+            return None
+
+        clause = match.expand(rf"\g<1>{limit}\2")
+        text = text[: match.start()] + clause
+    else:
+        clause = _limit_clause(dialect, limit)
+
+        if clause is None:
+            return None
+
+        text = f"{text}\n{clause}"
+
+    # the LIMIT must apply to the whole query (e.g., after QUALIFY) and be the
+    # last clause (e.g., MySQL expects it before FOR UPDATE)
+    try:
+        spliced = ast_cache.parse(text, read=dialect, copy=False)
+        expected = expression.limit(limit).sql(dialect=dialect)
+        is_equivalent = len(spliced) == 1 and spliced[0].sql(dialect=dialect) == (
+            expected
+        )
+    except Exception:
+        return None
+
+    if not is_equivalent or not expected.upper().endswith(
+        " ".join(clause.split()).upper()
+    ):
+        return None
+
+    return text
+
+
+# pools that share a single connection (or one per thread, as in-memory SQLite)
+_NO_CONCURRENCY_POOLS = (SingletonThreadPool, StaticPool)
+
+# maximum number of concurrent queries if %sql hasn't been loaded (e.g., when using
+# the Python API)
+DEFAULT_CONCURRENT_QUERIES = 4
+
+
+def _get_concurrent_queries():
+    try:
+        return _current._get_sql_magic().concurrent_queries
+    except RuntimeError:
+        return DEFAULT_CONCURRENT_QUERIES
+
+
 # TODO: the autocommit is read only during initialization, if the user changes it
 # it won't have any effect
 class SQLAlchemyConnection(AbstractConnection):
@@ -679,6 +942,10 @@ class SQLAlchemyConnection(AbstractConnection):
         self._driver = db_info["driver"]
 
         autocommit = True if config is None else config.autocommit
+        self._autocommit = autocommit
+
+        # runs the queries in _map_concurrently (created on first use)
+        self._executor = None
 
         if autocommit:
             success = set_sqlalchemy_isolation_level(self._connection_sqlalchemy)
@@ -712,7 +979,7 @@ class SQLAlchemyConnection(AbstractConnection):
     def driver(self):
         return self._driver
 
-    def _connection_execute(self, query, parameters=None):
+    def _connection_execute(self, query, parameters=None, yield_per=None):
         """Call the connection execute method
 
         Parameters
@@ -722,15 +989,22 @@ class SQLAlchemyConnection(AbstractConnection):
 
         parameters : dict, default None
             Parameters to use in the query (:variable format)
+
+        yield_per : int, default None
+            If passed, use a server-side cursor that fetches this number of rows
+            at a time
         """
-        # we do not support multiple statements
-        if len(sqlparse.split(query)) > 1:
+        # we do not support multiple statements (statements from split_statements
+        # are already split)
+        if not isinstance(query, SQLStatement) and len(sqlparse.split(query)) > 1:
             raise NotImplementedError("Only one statement is supported.")
 
-        operation = partial(self._execute_with_parameters, query, parameters)
+        operation = partial(self._execute_with_parameters, query, parameters, yield_per)
         out = self._execute_with_error_handling(operation)
 
-        if self._requires_manual_commit:
+        # committing closes server-side cursors in some drivers (e.g., psycopg2),
+        # and we only use them for SELECT statements, so there's nothing to commit
+        if self._requires_manual_commit and not yield_per:
             # Calling connection.commit() when using duckdb-engine will yield
             # empty results if we commit after a SELECT or SUMMARIZE statement,
             # see: https://github.com/Mause/duckdb_engine/issues/734.
@@ -755,22 +1029,30 @@ class SQLAlchemyConnection(AbstractConnection):
 
         return out
 
-    def _execute_with_parameters(self, query, parameters):
+    def _execute_with_parameters(self, query, parameters, yield_per=None):
         """Execute the query with the given parameters"""
+        # with stream_results, drivers that support it (e.g., psycopg2, pymysql)
+        # use a server-side cursor instead of buffering the whole result
+        execution_options = (
+            {"stream_results": True, "yield_per": yield_per} if yield_per else {}
+        )
+
         if parameters == {}:
-            return self._connection.exec_driver_sql(query)
+            return self._connection.exec_driver_sql(
+                query, execution_options=execution_options
+            )
 
         parameters = parameters or {}
+        statement = sqlalchemy.text(query).execution_options(**execution_options)
+
         if IS_SQLALCHEMY_ONE:
-            out = self._connection.execute(sqlalchemy.text(query), **parameters)
+            out = self._connection.execute(statement, **parameters)
         else:
-            out = self._connection.execute(
-                sqlalchemy.text(query), parameters=parameters
-            )
+            out = self._connection.execute(statement, parameters=parameters)
 
         return out
 
-    def raw_execute(self, query, parameters=None, with_=None):
+    def raw_execute(self, query, parameters=None, with_=None, yield_per=None):
         """Run the query without any preprocessing
 
         Parameters
@@ -784,6 +1066,11 @@ class SQLAlchemyConnection(AbstractConnection):
 
         with_ : list, default None
             List of CTEs to use in the query
+
+        yield_per : int, default None
+            If passed, run the query with a server-side cursor (stream_results)
+            that fetches this number of rows at a time. Drivers without server-side
+            cursors ignore it
         """
         # mssql with pyodbc does not support multiple open result sets, so we need
         # to close them all before issuing a new query
@@ -793,10 +1080,18 @@ class SQLAlchemyConnection(AbstractConnection):
         if with_:
             query = self._resolve_cte(query, with_)
 
-        query, quoted_named_parameters = escape_string_literals_with_colon_prefix(query)
+        if isinstance(query, SQLStatement):
+            quoted_named_parameters = query.quoted_named_parameters
+            query = query.escaped
+        else:
+            query, quoted_named_parameters = escape_string_literals_with_colon_prefix(
+                query
+            )
 
         if quoted_named_parameters and parameters:
-            intersection = set(quoted_named_parameters) & set(parameters)
+            intersection = {
+                name for name in quoted_named_parameters if name in parameters
+            }
 
             if intersection:
                 intersection_ = ", ".join(sorted(intersection))
@@ -808,9 +1103,14 @@ class SQLAlchemyConnection(AbstractConnection):
                 )
 
         if parameters:
-            required_parameters = set(sqlalchemy.text(query).compile().params)
-            available_parameters = set(parameters)
-            missing_parameters = required_parameters - available_parameters
+            required_parameters = (
+                set(query.named_parameters)
+                if isinstance(query, SQLStatement)
+                else set(sqlalchemy.text(query).compile().params)
+            )
+            missing_parameters = [
+                name for name in required_parameters if name not in parameters
+            ]
 
             if missing_parameters:
                 raise exceptions.InvalidQueryParameters(
@@ -818,15 +1118,25 @@ class SQLAlchemyConnection(AbstractConnection):
                     "variables are undefined: {}".format(", ".join(missing_parameters))
                 )
 
-            return self._connection_execute(query, parameters)
+            # parameters may be the whole user namespace, only pass the ones in the
+            # query (None if there are none, since {} disables named parameters)
+            parameters = {
+                name: parameters[name] for name in required_parameters
+            } or None
+
+            return self._connection_execute(query, parameters, yield_per)
         else:
             try:
-                return self._connection_execute(query, parameters)
+                return self._connection_execute(query, parameters, yield_per)
             except StatementError as e:
                 # add a more helpful message if the users passes :variable but
                 # the feature isn't enabled
                 if parameters is None:
-                    named_params = find_named_parameters(query)
+                    named_params = (
+                        query.named_parameters
+                        if isinstance(query, SQLStatement)
+                        else find_named_parameters(query)
+                    )
 
                     if named_params:
                         named_params_ = ", ".join(named_params)
@@ -944,7 +1254,120 @@ class SQLAlchemyConnection(AbstractConnection):
         """Returns the SQLAlchemy connection object"""
         return self._connection_sqlalchemy
 
+    def _supports_concurrency(self):
+        """
+        Check if queries can run in other connections from the engine's pool and
+        see the same data as this one
+        """
+        # without autocommit, uncommitted changes are only visible in this
+        # connection
+        if not self._autocommit or self.dialect in _NO_CONCURRENCY_DIALECTS:
+            return False
+
+        return self._supports_new_connections()
+
+    def _supports_new_connections(self):
+        engine = self._connection.engine
+
+        if isinstance(engine.pool, _NO_CONCURRENCY_POOLS):
+            return False
+
+        # each connection to an in-memory database sees a different database
+        return not (
+            self.dialect in _NO_CONCURRENCY_DIALECTS
+            and engine.url.database in {None, "", ":memory:"}
+        )
+
+    def _get_dbapi_connection(self):
+        """Return the DBAPI connection wrapped by the SQLAlchemy connection"""
+        fairy = self._connection.connection
+        return getattr(fairy, "dbapi_connection", None) or fairy.connection
+
+    def _cancel(self):
+        dbapi_connection = self._get_dbapi_connection()
+
+        # MySQL drivers don't support cancelling, so we kill the query from
+        # another connection
+        if self.dialect in {"mysql", "mariadb"} and hasattr(
+            dbapi_connection, "thread_id"
+        ):
+            thread_id = int(dbapi_connection.thread_id())
+
+            with self._connection.engine.connect() as connection:
+                connection.exec_driver_sql(f"KILL QUERY {thread_id}")
+
+            return True
+
+        return _cancel_dbapi_connection(dbapi_connection)
+
+    @contextmanager
+    def _copy_with_new_connection(self):
+        if not self._supports_new_connections():
+            raise exceptions.UsageError(
+                "Cannot open another connection to this database: each connection "
+                "to an in-memory database sees a different database. Store the "
+                "database in a file (e.g., duckdb:///my.db) to use this feature"
+            )
+
+        with self._connection.engine.connect() as connection:
+            if self._autocommit:
+                set_sqlalchemy_isolation_level(connection)
+
+            yield self._copy_with(_connection_sqlalchemy=connection, _executor=None)
+
+    def _map_concurrently(self, function, items):
+        items = list(items)
+        max_workers = _get_concurrent_queries()
+
+        if max_workers <= 1 or len(items) <= 1 or not self._supports_concurrency():
+            return super()._map_concurrently(function, items)
+
+        if self._executor is None or self._executor._max_workers != max_workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="jupysql"
+            )
+
+        futures = [
+            self._executor.submit(self._call_with_new_connection, function, item)
+            for item in items
+        ]
+
+        results = []
+
+        for item, future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # some objects are only visible in this connection (e.g., temporary
+                # tables), so we run the item again here. Other errors would fail
+                # again, so we raise them
+                if not is_table_not_found_error(e):
+                    for pending in futures:
+                        pending.cancel()
+
+                    raise
+
+                results.append(function(self, item))
+
+        return results
+
+    def _call_with_new_connection(self, function, item):
+        """Call function(conn, item) using another connection from the pool"""
+        with self._copy_with_new_connection() as worker:
+            # nested calls run serially so they don't wait for this executor
+            worker._map_concurrently = partial(
+                AbstractConnection._map_concurrently, worker
+            )
+            return function(worker, item)
+
     def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
         super().close()
 
         # NOTE: in SQLAlchemy 2.x, we need to call engine.dispose() to completely
@@ -962,16 +1385,31 @@ class SQLAlchemyConnection(AbstractConnection):
         except Exception as e:
             raise _error_invalid_connection_info(e, connect_str) from e
 
-    def to_table(self, table_name, data_frame, if_exists, index, schema=None):
+    def to_table(
+        self, table_name, data_frame, if_exists, index, schema=None, chunksize=None
+    ):
         """Create a table from a pandas DataFrame"""
-        operation = partial(
-            data_frame.to_sql,
-            table_name,
-            self.connection_sqlalchemy,
-            if_exists=if_exists,
-            index=index,
-            schema=schema,
-        )
+        if self.dialect == "duckdb":
+            operation = partial(
+                bulk_load.to_duckdb,
+                self,
+                table_name,
+                data_frame,
+                if_exists=if_exists,
+                index=index,
+                schema=schema,
+            )
+        else:
+            operation = partial(
+                bulk_load.to_sql,
+                data_frame,
+                table_name,
+                self.connection_sqlalchemy,
+                if_exists=if_exists,
+                index=index,
+                schema=schema,
+                chunksize=chunksize,
+            )
 
         try:
             self._execute_with_error_handling(operation)
@@ -1009,6 +1447,9 @@ class DBAPIConnection(AbstractConnection):
         self._connection = connection
         self._connection_class_name = type(connection).__name__
 
+        # cursor running the last query, used to cancel it
+        self._cursor = None
+
         # calling init from AbstractConnection must be the last thing we do as it
         # register the connection
         super().__init__(alias=alias or self._connection_class_name)
@@ -1024,7 +1465,7 @@ class DBAPIConnection(AbstractConnection):
     def driver(self):
         return self._driver
 
-    def raw_execute(self, query, parameters=None, with_=None):
+    def raw_execute(self, query, parameters=None, with_=None, yield_per=None):
         """Run the query without any preprocessing
 
         Parameters
@@ -1035,16 +1476,21 @@ class DBAPIConnection(AbstractConnection):
         parameters : dict, default None
             This parameter is added for consistency with SQLAlchemy connections but
             it is not used
+
+        yield_per : int, default None
+            This parameter is added for consistency with SQLAlchemy connections but
+            it is not used
         """
         # we do not support multiple statements (this might actually work in some
         # drivers but we need to add this for consistency with SQLAlchemyConnection)
-        if len(sqlparse.split(query)) > 1:
+        if not isinstance(query, SQLStatement) and len(sqlparse.split(query)) > 1:
             raise NotImplementedError("Only one statement is supported.")
 
         if with_:
             query = self._resolve_cte(query, with_)
 
         cur = self._connection.cursor()
+        self._cursor = cur
         cur.execute(query)
 
         if self._requires_manual_commit:
@@ -1052,6 +1498,35 @@ class DBAPIConnection(AbstractConnection):
 
         return cur
 
+    def _cancel(self):
+        # cursors in native DuckDB connections are independent connections, so we
+        # must interrupt the cursor running the query
+        if self._cursor is not None and _cancel_dbapi_connection(self._cursor):
+            return True
+
+        return _cancel_dbapi_connection(self._connection)
+
+    def _supports_new_connections(self):
+        # .cursor() in native DuckDB connections returns a new connection to the
+        # same database
+        return self.dialect == "duckdb"
+
+    @contextmanager
+    def _copy_with_new_connection(self):
+        if not self._supports_new_connections():
+            raise exceptions.UsageError(
+                "Cannot open another connection to the database with a "
+                f"{self._connection_class_name} connection. Use a SQLAlchemy "
+                "connection (or a native DuckDB connection) to use this feature"
+            )
+
+        connection = self._connection.cursor()
+
+        try:
+            yield self._copy_with(_connection=connection, _cursor=None)
+        finally:
+            connection.close()
+
     def _get_database_information(self):
         return {
             "dialect": self.dialect,
@@ -1074,7 +1549,9 @@ class DBAPIConnection(AbstractConnection):
             "This feature is only available for SQLAlchemy connections"
         )
 
-    def to_table(self, table_name, data_frame, if_exists, index, schema=None):
+    def to_table(
+        self, table_name, data_frame, if_exists, index, schema=None, chunksize=None
+    ):
         raise exceptions.NotImplementedError(
             "--persist/--persist-replace is not available for DBAPI connections"
             " (only available for SQLAlchemy connections)"
@@ -1109,7 +1586,7 @@ class SparkConnectConnection(AbstractConnection):
         """Returns a string with the SQL dialect name"""
         return "spark2"
 
-    def raw_execute(self, query, parameters=None):
+    def raw_execute(self, query, parameters=None, yield_per=None):
         """Run the query without any pre-processing"""
         return handle_spark_dataframe(self._connection.sql(query))
 
@@ -1139,7 +1616,9 @@ class SparkConnectConnection(AbstractConnection):
             "This feature is only available for SQLAlchemy connections"
         )
 
-    def to_table(self, table_name, data_frame, if_exists, index, schema=None):
+    def to_table(
+        self, table_name, data_frame, if_exists, index, schema=None, chunksize=None
+    ):
         mode = (
             "overwrite"
             if if_exists == "replace"
@@ -1155,6 +1634,24 @@ class SparkConnectConnection(AbstractConnection):
         pass
 
 
+def _cancel_dbapi_connection(connection):
+    """
+    Cancel the query running in a DBAPI connection, returns False if the driver
+    doesn't support it
+    """
+    # sqlite3 and duckdb
+    if hasattr(connection, "interrupt"):
+        connection.interrupt()
+        return True
+
+    # psycopg 2 and 3
+    if hasattr(connection, "cancel"):
+        connection.cancel()
+        return True
+
+    return False
+
+
 def _check_if_duckdb_dbapi_connection(conn):
     """Check if the connection is a native duckdb connection"""
     # NOTE: duckdb defines df and pl to efficiently convert results to
@@ -1297,6 +1794,14 @@ def detect_duckdb_summarize_or_select(query):
     Note:
     Assumes there is only one SQL statement in the query.
     """
+    # statements from split_statements have no comments, so the first word tells
+    # us unless it's a CTE (WITH ... SELECT or WITH ... INSERT)
+    if isinstance(query, SQLStatement):
+        keyword = re.match(r"\w*", query.first_word).group()
+
+        if keyword and keyword != "with":
+            return keyword in {"select", "from", "summarize"}
+
     statements = sqlparse.parse(query)
     if statements:
         if len(statements) > 1:
@@ -102,6 +102,18 @@ class Link:
             return f"{self.text} ({self.url})"
 
 
+class ProgressMessage:
+    """A message that's updated in place (e.g., to report progress)"""
+
+    def __init__(self, message):
+        # display returns None when running outside IPython
+        self._handle = display(Message(message), display_id=True)
+
+    def update(self, message):
+        if self._handle is not None:
+            self._handle.update(Message(message))
+
+
 def message(message):
     """Display a generic message"""
     display(Message(message))
@@ -17,6 +17,25 @@ POSTGRES_MSG = """\nLooks like you have run into some issues.
                 https://help.ubuntu.com/community/PostgreSQL#fe_sendauth:_
                 no_password_supplied\n"""
 
+# substrings (or regular expressions) in the error messages raised by the drivers
+# when a table doesn't exist
+NOT_FOUND_SUBSTRINGS = [
+    r"(\btable with name\b).+(\bdoes not exist\b)",
+    r"(\btable\b).+(\bdoes not exist\b)",
+    r"(\bobject\b).+(\bdoes not exist\b)",
+    r"(\brelation\b).+(\bdoes not exist\b)",
+    r"(\btable\b).+(\bdoesn't exist\b)",
+    "not found",
+    "could not find",
+    "no such table",
+    "invalid object name",
+]
+
+
+def is_table_not_found_error(error):
+    """Check if the error was raised because a table doesn't exist"""
+    return util.if_substring_exists(str(error).lower(), NOT_FOUND_SUBSTRINGS)
+
 
 def _snippet_typo_error_message(query):
     """Function to generate message for possible
@@ -52,19 +71,9 @@ def _detailed_message_with_error_type(error, query):
         "invalid sql",
         "syntax_error",
     ]
-    not_found_substrings = [
-        r"(\btable with name\b).+(\bdoes not exist\b)",
-        r"(\btable\b).+(\bdoes not exist\b)",
-        r"(\bobject\b).+(\bdoes not exist\b)",
-        r"(\brelation\b).+(\bdoes not exist\b)",
-        r"(\btable\b).+(\bdoesn't exist\b)",
-        "not found",
-        "could not find",
-        "no such table",
-    ]
     if util.if_substring_exists(original_error.lower(), syntax_error_substrings):
         return f"{CTE_MSG}\n\n{ORIGINAL_ERROR}{original_error}\n", RuntimeError
-    elif util.if_substring_exists(original_error.lower(), not_found_substrings):
+    elif is_table_not_found_error(original_error):
         typo_err_msg = _snippet_typo_error_message(query)
         if typo_err_msg:
             return (
@@ -3,7 +3,7 @@ from prettytable import PrettyTable
 from ploomber_core.exceptions import modify_exceptions
 from sql.connection import ConnectionManager
 from sql.telemetry import telemetry
-from sql import exceptions
+from sql import exceptions, catalog
 import math
 from sql import util
 from sql.store import get_all_keys
@@ -11,14 +11,22 @@ from IPython.core.display import HTML
 import uuid
 
 
+# dialects that don't support stddev_pop and percentile_disc
+_DIALECTS_WITHOUT_NUMERIC_STATS = {"sqlite"}
+
+
+def _get_current_connection():
+    if not ConnectionManager.current:
+        raise exceptions.RuntimeError("No active connection")
+
+    return ConnectionManager.current
+
+
 def _get_inspector(conn):
     if conn:
         return inspect(conn)
 
-    if not ConnectionManager.current:
-        raise exceptions.RuntimeError("No active connection")
-    else:
-        return inspect(ConnectionManager.current.connection_sqlalchemy)
+    return catalog.get_inspector(_get_current_connection())
 
 
 class DatabaseInspection:
@@ -37,10 +45,18 @@ class Tables(DatabaseInspection):
     def __init__(self, schema=None, conn=None) -> None:
         inspector = _get_inspector(conn)
 
+        # the metadata is only cached for JupySQL connections
+        if conn:
+            table_names = inspector.get_table_names(schema=schema)
+        else:
+            table_names = catalog.get_table_names(
+                _get_current_connection(), schema=schema, inspector=inspector
+            )
+
         self._table = PrettyTable()
         self._table.field_names = ["Name"]
 
-        for row in inspector.get_table_names(schema=schema):
+        for row in table_names:
             self._table.add_row([row])
 
         self._table_html = self._table.get_html_string()
@@ -141,6 +157,73 @@ def _generate_message(column_indices, columns):
     return message
 
 
+def _fetch_first_row(conn, query):
+    """Run a query and return the first row, or None if the query fails"""
+    try:
+        return conn.raw_execute(query).fetchone()
+    except Exception:
+        return None
+
+
+def _compute_aggregates(conn, table_name, groups):
+    """
+    Compute the aggregates for many columns in a single query. If the query fails
+    (e.g., a function isn't supported for a column's data type), runs one query per
+    group, and skips the groups that fail.
+
+    Parameters
+    ----------
+        conn: The connection to use.
+        table_name (str): The table to profile.
+        groups (list): A list of (column, keys, expressions) tuples.
+
+    Returns:
+        list: (column, keys, values) tuples for the groups that were computed.
+    """
+    expressions = [expression for _, _, group in groups for expression in group]
+
+    if not expressions:
+        return []
+
+    row = _fetch_first_row(conn, f"SELECT {', '.join(expressions)} FROM {table_name}")
+
+    if row is not None:
+        results, position = [], 0
+
+        for column, keys, group in groups:
+            results.append((column, keys, row[position : position + len(group)]))
+            position += len(group)
+
+        return results
+
+    if len(groups) == 1:
+        return []
+
+    results = []
+
+    for column, keys, group in groups:
+        row = _fetch_first_row(conn, f"SELECT {', '.join(group)} FROM {table_name}")
+
+        if row is not None:
+            results.append((column, keys, row))
+
+    return results
+
+
+def _most_frequent_value(conn, table_name, column):
+    """
+    Return the most frequent value in a column and its frequency, or None if the
+    query fails
+    """
+    # Note: index is reserved word in sqlite
+    return _fetch_first_row(
+        conn,
+        f"""SELECT {column} as top,
+        COUNT({column}) as frequency FROM {table_name}
+        GROUP BY top ORDER BY frequency Desc LIMIT 1""",
+    )
+
+
 def _assign_column_specific_stats(col_stats, is_numeric):
     """
     Assign NaN values to categorical/numerical specific statistic.
@@ -175,14 +258,20 @@ class Columns(DatabaseInspection):
     def __init__(self, name, schema, conn=None) -> None:
         is_table_exists(name, schema)
 
-        inspector = _get_inspector(conn)
-
         # this returns a list of dictionaries. e.g.,
         # [{"name": "column_a", "type": "INT"}
         #  {"name": "column_b", "type": "FLOAT"}]
         if not schema and "." in name:
             schema, name = name.split(".")
-        columns = inspector.get_columns(name, schema) or []
+
+        inspector = _get_inspector(conn)
+
+        if conn:
+            columns = inspector.get_columns(name, schema) or []
+        else:
+            columns = catalog.get_columns(
+                _get_current_connection(), name, schema, inspector=inspector
+            )
 
         self._table = PrettyTable()
         self._table.field_names = _get_row_with_most_keys(columns)
@@ -240,147 +329,133 @@ class TableDescription(DatabaseInspection):
 
         conn = ConnectionManager.current
 
-        columns_query_result = conn.raw_execute(f"SELECT * FROM {table_name} WHERE 1=0")
+        # a single query to get the column names and a value to check their datatypes
+        first_row_result = conn.raw_execute(f"SELECT * FROM {table_name} LIMIT 1")
         if ConnectionManager.current.is_dbapi_connection:
-            columns = [i[0] for i in columns_query_result.description]
+            columns = [i[0] for i in first_row_result.description]
         else:
-            columns = columns_query_result.keys()
+            columns = list(first_row_result.keys())
 
-        table_stats = dict({})
+        first_row = first_row_result.fetchone() or [None] * len(columns)
+
+        table_stats = {column: dict() for column in columns}
         columns_to_include_in_report = set()
         columns_with_styles = []
         message_check = False
+        numeric_columns = []
 
-        for i, column in enumerate(columns):
-            table_stats[column] = dict()
-
+        for i, (column, value) in enumerate(zip(columns, first_row)):
             # check the datatype of a column
             try:
-                result = ConnectionManager.current.raw_execute(
-                    f"""SELECT {column} FROM {table_name} LIMIT 1"""
-                ).fetchone()
-
-                value = result[0]
                 is_numeric = isinstance(value, (int, float)) or (
                     isinstance(value, str) and _is_numeric(value)
                 )
             except ValueError:
                 is_numeric = True
 
+            if is_numeric:
+                numeric_columns.append(column)
+
             if _is_numeric_as_str(column, value):
                 columns_with_styles.append(i + 1)
                 message_check = True
-            # Note: index is reserved word in sqlite
-            try:
-                result_col_freq_values = ConnectionManager.current.raw_execute(
-                    f"""SELECT DISTINCT {column} as top,
-                    COUNT({column}) as frequency FROM {table_name}
-                    GROUP BY top ORDER BY frequency Desc""",
-                ).fetchall()
-
-                table_stats[column]["freq"] = result_col_freq_values[0][1]
-                table_stats[column]["top"] = result_col_freq_values[0][0]
-
-                columns_to_include_in_report.update(["freq", "top"])
-
-            except Exception:
-                pass
-
-            try:
-                # get all non None values, min, max and avg.
-                result_value_values = ConnectionManager.current.raw_execute(
-                    f"""
-                    SELECT MIN({column}) AS min,
-                    MAX({column}) AS max,
-                    COUNT({column}) AS count
-                    FROM {table_name}
-                    WHERE {column} IS NOT NULL
-                    """,
-                ).fetchall()
 
-                columns_to_include_in_report.update(["count", "min", "max"])
-                table_stats[column]["count"] = result_value_values[0][2]
-
-                table_stats[column]["min"] = round(result_value_values[0][0], 4)
-                table_stats[column]["max"] = round(result_value_values[0][1], 4)
-
-                columns_to_include_in_report.update(["count", "min", "max"])
+        # compute the statistics of all columns in a single query (only the
+        # ones that are shown for each column type)
+        groups = []
+
+        for column in columns:
+            if column in numeric_columns:
+                groups.append(
+                    (
+                        column,
+                        ["count", "min", "max"],
+                        [f"COUNT({column})", f"MIN({column})", f"MAX({column})"],
+                    )
+                )
+                groups.append((column, ["mean"], [f"AVG({column})"]))
+            else:
+                groups.append((column, ["count"], [f"COUNT({column})"]))
+
+            groups.append((column, ["unique"], [f"COUNT(DISTINCT {column})"]))
+
+        for column in columns:
+            table_stats[column]["mean"] = math.nan
+
+        for column, keys, values in _compute_aggregates(conn, table_name, groups):
+            columns_to_include_in_report.update(keys)
+
+            for key, value in zip(keys, values):
+                if key == "mean":
+                    try:
+                        value = format(float(value), ".4f")
+                    except (TypeError, ValueError):
+                        value = math.nan
+                elif key in {"min", "max"}:
+                    try:
+                        value = round(value, 4)
+                    except TypeError:
+                        continue
+
+                table_stats[column][key] = value
+
+        # These keys are numeric and don't work on every database
+        special_numeric_keys = ["std", "25%", "50%", "75%"]
+
+        for column in numeric_columns:
+            for key in special_numeric_keys:
+                table_stats[column][key] = math.nan
+
+        if conn.dialect not in _DIALECTS_WITHOUT_NUMERIC_STATS:
+            numeric_groups = [
+                (
+                    column,
+                    special_numeric_keys,
+                    [
+                        f"stddev_pop({column})",
+                        f"percentile_disc(0.25) WITHIN GROUP (ORDER BY {column})",
+                        f"percentile_disc(0.50) WITHIN GROUP (ORDER BY {column})",
+                        f"percentile_disc(0.75) WITHIN GROUP (ORDER BY {column})",
+                    ],
+                )
+                for column in numeric_columns
+            ]
 
-            except Exception:
-                pass
+            for column, keys, values in _compute_aggregates(
+                conn, table_name, numeric_groups
+            ):
+                columns_to_include_in_report.update(keys)
 
-            try:
-                # get unique values
-                result_value_values = ConnectionManager.current.raw_execute(
-                    f"""
-                    SELECT
-                    COUNT(DISTINCT {column}) AS unique_count
-                    FROM {table_name}
-                    WHERE {column} IS NOT NULL
-                    """,
-                ).fetchall()
-                table_stats[column]["unique"] = result_value_values[0][0]
-                columns_to_include_in_report.update(["unique"])
-            except Exception:
-                pass
+                try:
+                    formatted = [format(float(value), ".4f") for value in values]
+                except TypeError:
+                    # for non numeric values
+                    continue
 
-            try:
-                results_avg = ConnectionManager.current.raw_execute(
-                    f"""
-                                SELECT AVG({column}) AS avg
-                                FROM {table_name}
-                                WHERE {column} IS NOT NULL
-                                """,
-                ).fetchall()
+                table_stats[column].update(zip(keys, formatted))
 
-                columns_to_include_in_report.update(["mean"])
-                table_stats[column]["mean"] = format(float(results_avg[0][0]), ".4f")
+        if numeric_columns:
+            columns_to_include_in_report.update(["freq", "top"])
 
-            except Exception:
-                table_stats[column]["mean"] = math.nan
+        categorical_columns = [
+            column for column in columns if column not in numeric_columns
+        ]
+        top_values = conn._map_concurrently(
+            lambda conn_, column: _most_frequent_value(conn_, table_name, column),
+            categorical_columns,
+        )
+        top_values = dict(zip(categorical_columns, top_values))
 
-            # These keys are numeric and work only on duckdb
-            special_numeric_keys = ["std", "25%", "50%", "75%"]
+        for column in columns:
+            if column not in numeric_columns:
+                top = top_values[column]
 
-            try:
-                # Note: stddev_pop and PERCENTILE_DISC will work only on DuckDB
-                result = ConnectionManager.current.raw_execute(
-                    f"""
-                    SELECT
-                        stddev_pop({column}) as key_std,
-                        percentile_disc(0.25) WITHIN GROUP
-                        (ORDER BY {column}) as key_25,
-                        percentile_disc(0.50) WITHIN GROUP
-                        (ORDER BY {column}) as key_50,
-                        percentile_disc(0.75) WITHIN GROUP
-                        (ORDER BY {column}) as key_75
-                    FROM {table_name}
-                    """,
-                ).fetchall()
-
-                columns_to_include_in_report.update(special_numeric_keys)
-                for i, key in enumerate(special_numeric_keys):
-                    # r_key = f'key_{key.replace("%", "")}'
-                    table_stats[column][key] = format(float(result[0][i]), ".4f")
-
-            except TypeError:
-                # for non numeric values
-                for key in special_numeric_keys:
-                    table_stats[column][key] = math.nan
-
-            except Exception as e:
-                # We tried to apply numeric function on
-                # non numeric value, i.e: DateTime
-                if "duckdb.BinderException" or "add explicit type casts" in str(e):
-                    for key in special_numeric_keys:
-                        table_stats[column][key] = math.nan
-
-                # Failed to run sql command/func (e.g stddev_pop).
-                # We ignore the cell stats for such case.
-                pass
+                if top is not None:
+                    table_stats[column]["top"], table_stats[column]["freq"] = top
+                    columns_to_include_in_report.update(["freq", "top"])
 
             table_stats[column] = _assign_column_specific_stats(
-                table_stats[column], is_numeric
+                table_stats[column], column in numeric_columns
             )
 
         self._table = PrettyTable()
@@ -503,7 +578,11 @@ def get_table_statistics(name, schema=None):
 def get_schema_names(conn=None):
     """Get list of schema names for a given connection"""
     inspector = _get_inspector(conn)
-    return inspector.get_schema_names()
+
+    if conn:
+        return inspector.get_schema_names()
+
+    return catalog.get_schema_names(_get_current_connection(), inspector=inspector)
 
 
 def support_only_sql_alchemy_connection(command):
@@ -519,11 +598,14 @@ def support_only_sql_alchemy_connection(command):
 
 def _is_table_exists(table: str, conn) -> bool:
     """
-    Runs a SQL query to check if table exists
+    Runs a SQL query to check if table exists (unless a previous check found it)
     """
     if not conn:
         conn = ConnectionManager.current
 
+    if catalog.is_table_known(conn, table):
+        return True
+
     identifiers = conn.get_curr_identifiers()
 
     for iden in identifiers:
@@ -533,24 +615,20 @@ def _is_table_exists(table: str, conn) -> bool:
             query = "SELECT * FROM {0}{1}{0} WHERE 1=0".format(iden, table)
         try:
             conn.execute(query)
-            return True
         except Exception:
-            pass
+            continue
+
+        catalog.add_known_table(conn, table)
+        return True
 
     return False
 
 
-def _get_list_of_existing_tables() -> list:
+def _get_list_of_existing_tables(conn=None) -> list:
     """
     Returns a list of table names for a given connection
     """
-    tables = []
-    tables_rows = get_table_names()._table
-    for row in tables_rows:
-        table_name = row.get_string(fields=["Name"], border=False, header=False).strip()
-
-        tables.append(table_name)
-    return tables
+    return list(catalog.get_table_names(conn or _get_current_connection()))
 
 
 def is_table_exists(
@@ -600,14 +678,14 @@ def is_table_exists(
             existing_tables = []
 
             if try_find_suggestions:
-                existing_schemas = get_schema_names()
+                existing_schemas = catalog.get_schema_names(conn)
 
             if schema and schema not in existing_schemas:
                 expected = existing_schemas
                 invalid_input = schema
             else:
                 if try_find_suggestions:
-                    existing_tables = _get_list_of_existing_tables()
+                    existing_tables = _get_list_of_existing_tables(conn)
 
                 expected = existing_tables
                 invalid_input = table
@@ -633,6 +711,93 @@ def is_table_exists(
     return _is_exist
 
 
+def _quote_string(value):
+    """Return a SQL string literal"""
+    value = value.replace("'", "''")
+    return f"'{value}'"
+
+
+def _row_count_estimate_query(dialect, table, schema):
+    """
+    Return the query to get the estimated number of rows of a table from the
+    catalog statistics, None if the dialect isn't supported
+    """
+    if dialect == "postgresql":
+        name = f"{schema}.{table}" if schema else table
+        return (
+            "SELECT reltuples FROM pg_catalog.pg_class "
+            f"WHERE oid = to_regclass({_quote_string(name)})"
+        )
+
+    if dialect in {"mysql", "mariadb"}:
+        schema_ = _quote_string(schema) if schema else "DATABASE()"
+        return (
+            "SELECT table_rows FROM information_schema.tables "
+            f"WHERE table_name = {_quote_string(table)} AND table_schema = {schema_}"
+        )
+
+    if dialect == "duckdb":
+        schema_ = _quote_string(schema) if schema else "current_schema()"
+        return (
+            "SELECT estimated_size FROM duckdb_tables() "
+            f"WHERE table_name = {_quote_string(table)} AND schema_name = {schema_}"
+        )
+
+    if dialect == "sqlite":
+        # sqlite_stat1 only exists after running ANALYZE, the first number in the
+        # stat column is the number of rows
+        stat_table = f"{schema}.sqlite_stat1" if schema else "sqlite_stat1"
+        return (
+            f"SELECT CAST(stat AS INTEGER) FROM {stat_table} "
+            f"WHERE tbl = {_quote_string(table)} LIMIT 1"
+        )
+
+    return None
+
+
+def estimate_row_count(table, schema=None, conn=None):
+    """
+    Returns the number of rows in a table estimated from the database catalog
+    statistics (Postgres, MySQL, SQLite, and DuckDB), which doesn't require
+    scanning the table. Returns None if the estimate is not available (e.g., the
+    table hasn't been analyzed)
+
+    Parameters
+    ----------
+    table : str
+        Table name
+
+    schema : str, default None
+        Schema name
+
+    conn : connection, default None
+        Database connection. If None, it uses the current connection
+    """
+    if not conn:
+        conn = ConnectionManager.current
+
+    table = util.strip_multiple_chars(table, "\"'")
+
+    if schema is None and "." in table:
+        schema, table = table.rsplit(".", 1)
+
+    query = _row_count_estimate_query(conn.dialect, table, schema)
+
+    if query is None:
+        return None
+
+    try:
+        row = conn.raw_execute(query).fetchone()
+    except Exception:
+        return None
+
+    # tables that were never analyzed have no statistics (or -1 in Postgres)
+    if row is None or row[0] is None or row[0] <= 0:
+        return None
+
+    return int(row[0])
+
+
 def fetch_sql_with_pagination(
     table, offset, n_rows, sort_column=None, sort_order=None
 ) -> tuple:
@@ -1,5 +1,6 @@
 import json
 import re
+from collections import ChainMap
 from pathlib import Path
 
 import sqlparse
@@ -33,6 +34,11 @@ import shlex
 import sql.connection
 import sql.parse
 from sql.run.run import run_statements
+from sql.run.background import run_statements_async
+from sql.run import embedded, federate
+from sql.run.resultset import DEFAULT_BATCH_SIZE
+from sql.catalog import catalog_cache
+from sql.run.cache import result_cache
 from sql.parse import _option_strings_from_parser
 from sql import display, exceptions
 from sql.store import store
@@ -117,11 +123,33 @@ class SqlMagic(Magics, Configurable):
         config=True,
         help="Return Polars DataFrames instead of regular result sets",
     )
+    cache_dir = Unicode(
+        default_value=str(Path("~/.jupysql/cache").expanduser()),
+        config=True,
+        help="Directory to store the results of queries executed with %%sql --cache",
+    )
+    catalog_cache_ttl = Int(
+        default_value=300,
+        config=True,
+        help=(
+            "Seconds to keep the database metadata (tables, columns, and schemas) "
+            "in the cache. 0 means it never expires"
+        ),
+    )
     column_local_vars = Bool(
         default_value=False,
         config=True,
         help="Return data into local variables from column names",
     )
+    concurrent_queries = Int(
+        default_value=4,
+        config=True,
+        help=(
+            "Maximum number of queries that plots and other features run "
+            "concurrently (each in a separate connection from the pool). 1 runs them "
+            "one after another"
+        ),
+    )
     displaycon = Bool(
         default_value=True, config=True, help="Show connection string after execution"
     )
@@ -172,11 +200,57 @@ class SqlMagic(Magics, Configurable):
             "(e.g. infer_schema_length, nan_to_null, schema_overrides, etc)"
         ),
     )
+    query_dataframes = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Allow queries in SQLite, PostgreSQL, and MySQL connections to read "
+            "pandas, polars, and Arrow data frames by name, without --persist. "
+            "Such queries run in an embedded DuckDB that attaches the database"
+        ),
+    )
+    result_backend = Unicode(
+        default_value="list",
+        config=True,
+        help=(
+            "Storage for the fetched rows: 'list' (Python objects) or 'arrow' "
+            "(columnar, requires pyarrow)"
+        ),
+    )
+    result_cache = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Cache the results of SELECT statements in memory, so running the same "
+            "query again doesn't hit the database"
+        ),
+    )
+    result_cache_max_memory = Int(
+        default_value=256,
+        config=True,
+        help=(
+            "Memory budget (in MB) for the result cache, the least recently used "
+            "results are evicted when exceeded"
+        ),
+    )
+    result_cache_ttl = Int(
+        default_value=3600,
+        config=True,
+        help="Seconds to keep results in the cache. 0 means they never expire",
+    )
     short_errors = Bool(
         default_value=True,
         config=True,
         help="Don't display the full traceback on SQL Programming Error",
     )
+    statement_timeout = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "Cancel statements that run for longer than this number of seconds "
+            "(can be overridden with --timeout). 0 means no timeout"
+        ),
+    )
     style = Unicode(
         default_value="DEFAULT",
         config=True,
@@ -186,6 +260,15 @@ class SqlMagic(Magics, Configurable):
             "RANDOM, SINGLE_BORDER, DOUBLE_BORDER, MARKDOWN )"
         ),
     )
+    yield_per = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "If greater than 0, run SELECT statements with a server-side cursor "
+            "(SQLAlchemy's stream_results) that fetches this number of rows at a time. "
+            "0 disables it"
+        ),
+    )
 
     @telemetry.log_call("init")
     def __init__(self, shell):
@@ -202,6 +285,11 @@ class SqlMagic(Magics, Configurable):
         path = Path(proposal["value"]).expanduser()
         return str(path)
 
+    @validate("cache_dir")
+    def _valid_cache_dir(self, proposal):
+        path = Path(proposal["value"]).expanduser()
+        return str(path)
+
     # To verify displaylimit is valid positive integer
     # If:
     #   None -> We treat it as 0 (no limit)
@@ -222,6 +310,54 @@ class SqlMagic(Magics, Configurable):
         except ValueError:
             raise TraitError("{}: displaylimit is not an integer".format(value))
 
+    @validate("result_backend")
+    def _valid_result_backend(self, proposal):
+        value = proposal["value"].lower()
+
+        if value not in {"list", "arrow"}:
+            raise TraitError(
+                f"{proposal['value']!r} is not a valid result_backend. "
+                "Valid options are: 'list' and 'arrow'"
+            )
+
+        return value
+
+    @validate(
+        "catalog_cache_ttl",
+        "result_cache_max_memory",
+        "result_cache_ttl",
+        "statement_timeout",
+    )
+    def _valid_result_cache_options(self, proposal):
+        if proposal["value"] < 0:
+            raise TraitError(
+                "{}: {} cannot be a negative integer".format(
+                    proposal["value"], proposal["trait"].name
+                )
+            )
+
+        return proposal["value"]
+
+    @validate("concurrent_queries")
+    def _valid_concurrent_queries(self, proposal):
+        if proposal["value"] < 1:
+            raise TraitError(
+                "{}: concurrent_queries must be a positive integer".format(
+                    proposal["value"]
+                )
+            )
+
+        return proposal["value"]
+
+    @validate("yield_per")
+    def _valid_yield_per(self, proposal):
+        if proposal["value"] < 0:
+            raise TraitError(
+                "{}: yield_per cannot be a negative integer".format(proposal["value"])
+            )
+
+        return proposal["value"]
+
     @observe("autopandas", "autopolars")
     def _mutex_autopandas_autopolars(self, change):
         # When enabling autopandas or autopolars, automatically disable the
@@ -305,6 +441,15 @@ class SqlMagic(Magics, Configurable):
             "named DataFrame"
         ),
     )
+    @argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help=(
+            "Number of rows to insert at a time when using --persist, "
+            "--persist-replace, or --append"
+        ),
+    )
     @argument(
         "-a",
         "--connection_arguments",
@@ -339,6 +484,78 @@ class SqlMagic(Magics, Configurable):
         action="append",
         help="Interactive mode",
     )
+    @argument(
+        "--stream",
+        type=int,
+        nargs="?",
+        const=DEFAULT_BATCH_SIZE,
+        default=None,
+        help=(
+            "Return an iterator over batches of rows (optionally pass the batch "
+            "size) instead of storing the full result"
+        ),
+    )
+    @argument(
+        "--yield-per",
+        type=int,
+        default=None,
+        help=(
+            "Run the query with a server-side cursor that fetches this number of "
+            "rows at a time (overrides SqlMagic.yield_per)"
+        ),
+    )
+    @argument(
+        "--timeout",
+        type=int,
+        default=None,
+        help=(
+            "Cancel statements that run for longer than this number of seconds "
+            "(overrides SqlMagic.statement_timeout)"
+        ),
+    )
+    @argument(
+        "--partition-on",
+        type=str,
+        default=None,
+        help=(
+            "Read the results in ranges of this numeric or date column, "
+            "concurrently if the connection has a pool, and return a data frame"
+        ),
+    )
+    @argument(
+        "--partitions",
+        type=int,
+        default=None,
+        help=(
+            "Number of partitions when using --partition-on "
+            "(defaults to SqlMagic.concurrent_queries)"
+        ),
+    )
+    @argument(
+        "--async",
+        dest="async_",
+        action="store_true",
+        help=(
+            "Run the query in a background thread (with a new connection) and "
+            "return a handle to check its status"
+        ),
+    )
+    @argument(
+        "--federate",
+        action="store_true",
+        help=(
+            "Join tables from different connections (qualified with the "
+            "connection alias, e.g., alias.table) in an embedded DuckDB"
+        ),
+    )
+    @argument(
+        "--cache",
+        action="store_true",
+        help=(
+            "Store the results in SqlMagic.cache_dir and load them from there the "
+            "next time the same query runs"
+        ),
+    )
     def execute(self, line="", cell="", local_ns=None):
         """
         Runs SQL statement against a database, specified by
@@ -400,9 +617,10 @@ class SqlMagic(Magics, Configurable):
         if local_ns is None:
             local_ns = {}
 
-        # save globals and locals so they can be referenced in bind vars
-        user_ns = self.shell.user_ns.copy()
-        user_ns.update(local_ns)
+        # save globals and locals so they can be referenced in bind vars. This is a
+        # view (locals take precedence) instead of a copy, since the user namespace
+        # can be large
+        user_ns = ChainMap(local_ns, self.shell.user_ns)
 
         command = SQLCommand(self, user_ns, line, cell)
         # args.line: contains the line after the magic with all options removed
@@ -534,10 +752,16 @@ class SqlMagic(Magics, Configurable):
                 append=False,
                 index=not args.no_index,
                 replace=True,
+                chunksize=args.chunksize,
             )
         elif args.persist:
             return self._persist_dataframe(
-                command.sql, conn, user_ns, append=False, index=not args.no_index
+                command.sql,
+                conn,
+                user_ns,
+                append=False,
+                index=not args.no_index,
+                chunksize=args.chunksize,
             )
         elif args.persist_replace:
             return self._persist_dataframe(
@@ -547,10 +771,16 @@ class SqlMagic(Magics, Configurable):
                 append=False,
                 index=not args.no_index,
                 replace=True,
+                chunksize=args.chunksize,
             )
         if args.append:
             return self._persist_dataframe(
-                command.sql, conn, user_ns, append=True, index=not args.no_index
+                command.sql,
+                conn,
+                user_ns,
+                append=True,
+                index=not args.no_index,
+                chunksize=args.chunksize,
             )
 
         if not command.sql:
@@ -578,18 +808,80 @@ class SqlMagic(Magics, Configurable):
         elif self.named_parameters == "enabled":
             parameters = user_ns
 
+        if args.timeout is not None and args.timeout < 0:
+            raise exceptions.UsageError("--timeout cannot be a negative integer")
+
+        if args.partitions is not None:
+            if args.partition_on is None:
+                raise exceptions.UsageError("--partitions requires --partition-on")
+
+            if args.partitions < 1:
+                raise exceptions.UsageError("--partitions must be a positive integer")
+
+        if args.partition_on is not None and (args.stream or args.federate):
+            raise exceptions.UsageError(
+                "--partition-on cannot be used with --stream or --federate"
+            )
+
+        # the query runs in an embedded DuckDB, so these options don't apply
+        if args.federate and _execution_options(args):
+            raise exceptions.UsageError(
+                "--federate cannot be used with " + ", ".join(_execution_options(args))
+            )
+
+        if args.async_:
+            return self._execute_async(command, conn, args, parameters)
+
+        data_frames = (
+            embedded.find_data_frames(command.sql, user_ns, conn)
+            if self.query_dataframes
+            and not args.federate
+            and embedded.supports_data_frames(conn)
+            else None
+        )
+
+        # the query runs in an embedded DuckDB, so these options don't apply
+        if data_frames and _execution_options(args):
+            raise exceptions.UsageError(
+                f"Queries that use data frames ({', '.join(data_frames)}) cannot "
+                f"be used with {', '.join(_execution_options(args))}"
+            )
+
         try:
-            result = run_statements(conn, command.sql, self, parameters=parameters)
+            if args.federate:
+                result = federate.run_statements(
+                    conn,
+                    command.sql,
+                    self,
+                    sql.connection.ConnectionManager.connections,
+                )
+            elif data_frames:
+                result = embedded.run_statements(conn, command.sql, self, data_frames)
+            else:
+                result = run_statements(
+                    conn,
+                    command.sql,
+                    self,
+                    parameters=parameters,
+                    stream=args.stream,
+                    yield_per=args.yield_per,
+                    cache=args.cache,
+                    timeout=args.timeout,
+                    partition_on=args.partition_on,
+                    partitions=args.partitions,
+                )
 
             if (
                 result is not None
                 and not isinstance(result, str)
                 and self.column_local_vars
+                and not args.stream
             ):
                 # Instead of returning values, set variables directly in the
                 # users namespace. Variable names given by column names
 
-                if self.autopandas or self.autopolars:
+                # partitioned reads always return a data frame
+                if self.autopandas or self.autopolars or args.partition_on:
                     keys = result.keys()
                 else:
                     keys = result.keys
@@ -627,11 +919,56 @@ class SqlMagic(Magics, Configurable):
             # Handle non SQLAlchemy errors
             handle_exception(e, command.sql, self.short_errors)
 
+    def _execute_async(self, command, conn, args, parameters):
+        """Implements --async, returns a QueryFuture"""
+        if args.stream:
+            raise exceptions.UsageError("--async cannot be used with --stream")
+
+        def store_result(result):
+            if command.result_var:
+                self.shell.user_ns[command.result_var] = result
+
+        # the query runs later, in another thread, so bind the values that the
+        # variables have now
+        if parameters:
+            parameters = dict(parameters)
+
+        future = run_statements_async(
+            conn,
+            command.sql,
+            self,
+            parameters=parameters,
+            yield_per=args.yield_per,
+            cache=args.cache,
+            timeout=args.timeout,
+            partition_on=args.partition_on,
+            partitions=args.partitions,
+            on_done=store_result,
+        )
+
+        display.message(
+            "Running query in the background"
+            + (
+                f", the results will be stored in {command.result_var!r}"
+                if command.result_var
+                else ""
+            )
+        )
+
+        return future
+
     legal_sql_identifier = re.compile(r"^[A-Za-z0-9#_$]+")
 
     @modify_exceptions
     def _persist_dataframe(
-        self, raw, conn, user_ns, append=False, index=True, replace=False
+        self,
+        raw,
+        conn,
+        user_ns,
+        append=False,
+        index=True,
+        replace=False,
+        chunksize=None,
     ):
         """Implements PERSIST, which writes a DataFrame to the RDBMS"""
         if not DataFrame:
@@ -639,6 +976,9 @@ class SqlMagic(Magics, Configurable):
                 "You must install pandas to persist results: pip install pandas"
             )
 
+        if chunksize is not None and chunksize < 1:
+            raise exceptions.UsageError("--chunksize must be a positive integer")
+
         frame_name = raw.strip(";")
 
         # user may pass schema.dataframe (required for certain DBs
@@ -686,13 +1026,36 @@ class SqlMagic(Magics, Configurable):
         else:
             if_exists = "fail"
 
+        result_cache.invalidate(conn.alias)
+        catalog_cache.invalidate(conn.alias)
+
         conn.to_table(
             table_name=table_name,
             data_frame=frame,
             if_exists=if_exists,
             index=index,
             schema=schema_name,
+            chunksize=chunksize,
+        )
+
+
+def _execution_options(args):
+    """
+    Return the options passed to %sql that change how the query runs in the
+    database (e.g., --stream)
+    """
+    return [
+        option
+        for option, value in (
+            ("--async", args.async_),
+            ("--stream", args.stream),
+            ("--cache", args.cache),
+            ("--timeout", args.timeout is not None),
+            ("--yield-per", args.yield_per is not None),
+            ("--partition-on", args.partition_on is not None),
         )
+        if value
+    ]
 
 
 def get_query_type(command: str):
@@ -85,7 +85,7 @@ class SqlPlotMagic(Magics, Configurable):
         cmd = SQLPlotCommand(self, line)
 
         if util.is_rendering_required(line):
-            util.expand_args(cmd.args, self.shell.user_ns.copy())
+            util.expand_args(cmd.args, self.shell.user_ns)
 
         if len(cmd.args.column) == 1:
             column = cmd.args.column[0]
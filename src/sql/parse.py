@@ -7,6 +7,7 @@ import configparser
 import warnings
 import ast
 
+import sqlparse
 from sqlalchemy.engine.url import URL
 
 from sql import exceptions
@@ -399,3 +400,335 @@ def find_named_parameters(input_string):
     matches = re.findall(variable_pattern, input_string)
 
     return matches
+
+
+class SQLStatement(str):
+    """
+    A single SQL statement (with comments removed) returned by split_statements.
+    It's a str, so it can be used anywhere a query is expected, and it carries the
+    results of the lexer pass so the execution path doesn't scan the text again.
+    Any transformation (e.g., adding a LIMIT) returns a plain str
+
+    Attributes
+    ----------
+    escaped : SQLStatement
+        The statement with the colons in ':name' literals and string slicing
+        (x[1:2]) escaped, so it can be passed to sqlalchemy.text
+
+    quoted_named_parameters : list
+        Names in ':name' and ":name" literals (see
+        escape_string_literals_with_colon_prefix)
+
+    named_parameters : list
+        Names of the :name bind parameters, in order of appearance
+
+    first_word : str
+        The first word of the statement (lowercase)
+    """
+
+    escaped = None
+    quoted_named_parameters = ()
+    named_parameters = ()
+    first_word = ""
+
+    def __new__(cls, value, escaped=None, quoted_named_parameters=(), named=()):
+        statement = super().__new__(cls, value)
+        statement.escaped = statement if escaped is None else escaped
+        statement.quoted_named_parameters = list(quoted_named_parameters)
+        statement.named_parameters = list(named)
+        words = value.split(None, 1)
+        statement.first_word = words[0].lower() if words else ""
+        return statement
+
+
+# tokens recognized by the lexer in split_statements, everything else is copied
+# as is. Comments (including optimizer hints), strings, and quoted identifiers
+# follow sqlparse's rules so both split statements in the same places
+_SQL_TOKENS = re.compile(
+    "|".join(
+        [
+            r"(?P<comment>(?:--|(?<!#)# ).*?(?:\r\n|\r|\n|$)|/\*.*?\*/)",
+            r"(?P<string>'(?:''|\\'|[^'])*')",
+            r"(?P<identifier>\"(?:\"\"|\\\"|[^\"])*\"|`(?:``|[^`])*`)",
+            r"(?P<dollar>(?P<tag>(?<![\w\"$])\$(?:[_A-Za-z]\w*)?\$).*?(?P=tag))",
+            r"(?P<slice>(?<!\\):[0-9_]*\])",
+            # same as sqlalchemy.text's bind parameters
+            r"(?P<parameter>(?<![:\w\\]):(?P<name>\w+)(?!:))",
+            r"(?P<open>\()",
+            r"(?P<close>\))",
+            r"(?P<semicolon>;)",
+        ]
+    ),
+    re.DOTALL,
+)
+
+# ':name' and ":name" literals, their colon is escaped
+_QUOTED_NAMED_PARAMETER = re.compile(r"^([\"']):([a-zA-Z_][a-zA-Z0-9_]*)\1$")
+
+_BIND_PARAMETER = re.compile(r"(?<![:\w\\]):(\w+)(?!:)")
+
+_STRING_SLICE = re.compile(r"(?<!\\):([0-9_]*)(?<!\\)\]")
+
+_TRAILING_WHITESPACE = re.compile(r"[ \t\f\v]+(?=\n)")
+
+_LINE_BREAK = re.compile(r"\r\n|\r")
+
+_WHITESPACE = re.compile(r"\s+")
+
+_WORD = re.compile(r"\w+")
+
+# reserved words (they can't be unquoted identifiers), lowercased by
+# normalize_statement
+_RESERVED_WORDS = frozenset(
+    """
+    all and any as asc between by case cross delete desc distinct else end except
+    exists from full group having in inner insert intersect into is join left like
+    limit not null offset on or order outer right select set then union update
+    values when where with
+    """.split()
+)
+
+# keywords that make a statement write data even if it starts like a query (e.g.,
+# WITH ... INSERT, SELECT ... INTO, or a data-modifying CTE)
+_WRITE_KEYWORDS = re.compile(r"\b(?:insert|update|delete|merge|into)\b", re.IGNORECASE)
+
+# sqlparse doesn't split at semicolons inside BEGIN ... END blocks (e.g., CREATE
+# FUNCTION), the lexer doesn't track them so we use sqlparse for these
+_COMPOUND_STATEMENT = re.compile(r"\b(?:BEGIN|DECLARE)\b", re.IGNORECASE)
+
+
+class _StatementBuilder:
+    """Accumulates the pieces of a statement while lexing"""
+
+    def __init__(self):
+        self.pieces = []
+        self.escaped = []
+        self.quoted = []
+        self.named = []
+
+    def add(self, text, escaped=None, quoted=False):
+        self.pieces.append((text, quoted))
+        self.escaped.append((text if escaped is None else escaped, quoted))
+
+    def last_char(self):
+        for text, _ in reversed(self.pieces):
+            if text:
+                return text[-1]
+
+        return None
+
+    def add_comment(self, comment, next_char):
+        # same as sqlparse's StripCommentsFilter: replace the comment with its line
+        # breaks (or a space) so the tokens around it don't merge
+        prev_char = self.last_char()
+        match = re.search(r"([\r\n]+) *$", comment)
+        replacement = match.group(1) if match else " "
+
+        if (
+            prev_char is None
+            or next_char is None
+            or prev_char.isspace()
+            or prev_char == "("
+            or next_char.isspace()
+            or next_char == ")"
+        ):
+            if prev_char is not None and prev_char != "(":
+                self.add(replacement)
+        else:
+            self.add(replacement)
+
+    def build(self):
+        text = _join(self.pieces).strip()
+
+        if not text:
+            return None
+
+        escaped = _join(self.escaped).strip()
+        escaped = (
+            None
+            if escaped == text
+            else SQLStatement(escaped, None, self.quoted, self.named)
+        )
+        return SQLStatement(text, escaped, self.quoted, self.named)
+
+
+def _join(pieces):
+    """
+    Join the pieces, removing trailing whitespace in each line and normalizing line
+    breaks outside quoted strings (as sqlparse.format does)
+    """
+    out = []
+    unquoted = []
+
+    for text, quoted in pieces:
+        if quoted:
+            out.append(
+                _TRAILING_WHITESPACE.sub("", _LINE_BREAK.sub("\n", "".join(unquoted)))
+            )
+            unquoted = []
+            out.append(text)
+        else:
+            unquoted.append(text)
+
+    out.append(_TRAILING_WHITESPACE.sub("", _LINE_BREAK.sub("\n", "".join(unquoted))))
+    return "".join(out)
+
+
+def _split_with_sqlparse(sql):
+    statements = [
+        sqlparse.format(statement, strip_comments=True)
+        for statement in sqlparse.split(sql)
+    ]
+    out = []
+
+    for statement in statements:
+        if not statement:
+            continue
+
+        escaped, quoted = escape_string_literals_with_colon_prefix(statement)
+        named = _BIND_PARAMETER.findall(escaped)
+        out.append(
+            SQLStatement(
+                statement,
+                None if escaped == statement else SQLStatement(escaped),
+                quoted,
+                named,
+            )
+        )
+
+    return out
+
+
+def _unquoted_and_quoted(sql):
+    """
+    Yield (text, quoted) pieces of the SQL, quoted pieces are strings and quoted
+    identifiers (comments are replaced with a space)
+    """
+    unquoted = []
+    position = 0
+
+    for match in _SQL_TOKENS.finditer(sql):
+        start, end = match.span()
+        unquoted.append(sql[position:start])
+        position = end
+        kind = match.lastgroup
+
+        if kind in {"string", "identifier", "dollar"}:
+            yield "".join(unquoted), False
+            yield match.group(), True
+            unquoted = []
+        elif kind == "comment":
+            unquoted.append(" ")
+        else:
+            unquoted.append(match.group())
+
+    unquoted.append(sql[position:])
+    yield "".join(unquoted), False
+
+
+def _lower_reserved_word(match):
+    word = match.group().lower()
+    return word if word in _RESERVED_WORDS else match.group()
+
+
+def normalize_statement(statement):
+    """
+    Collapse the whitespace and lowercase the reserved words outside strings and
+    quoted identifiers, so equivalent statements can be compared (e.g., in cache
+    keys)
+
+    Examples
+    --------
+    >>> normalize_statement("SELECT  *\\nFROM Numbers WHERE x = 'A  B'")
+    "select * from Numbers where x = 'A  B'"
+    """
+    pieces = [
+        text if quoted else _WORD.sub(_lower_reserved_word, _WHITESPACE.sub(" ", text))
+        for text, quoted in _unquoted_and_quoted(statement)
+    ]
+    return "".join(pieces).strip()
+
+
+def writes_data(statement):
+    """
+    Check if the statement has keywords that write data outside strings and
+    quoted identifiers (e.g., WITH ... INSERT, or SELECT ... INTO)
+    """
+    return any(
+        not quoted and _WRITE_KEYWORDS.search(text)
+        for text, quoted in _unquoted_and_quoted(statement)
+    )
+
+
+def split_statements(sql):
+    """
+    Split the SQL into statements with a single pass over the text, removing
+    comments, and find the named parameters and the
+    colons that must be escaped. Returns a list of SQLStatement (empty statements
+    are skipped). This replaces sqlparse.split + sqlparse.format(strip_comments=True)
+    + escape_string_literals_with_colon_prefix + find_named_parameters
+
+    Examples
+    --------
+    >>> split_statements("SELECT :x; -- comment\\nSELECT ':y'")
+    ['SELECT :x;', "SELECT ':y'"]
+    """
+    if _COMPOUND_STATEMENT.search(sql):
+        return _split_with_sqlparse(sql)
+
+    statements = []
+    current = _StatementBuilder()
+    depth = 0
+    position = 0
+
+    for match in _SQL_TOKENS.finditer(sql):
+        start, end = match.span()
+
+        if start > position:
+            current.add(sql[position:start])
+
+        position = end
+        token = match.group()
+        kind = match.lastgroup
+
+        if kind == "comment":
+            current.add_comment(token, sql[end] if end < len(sql) else None)
+        elif kind in {"string", "identifier", "dollar"}:
+            quoted = _QUOTED_NAMED_PARAMETER.match(token)
+
+            if quoted:
+                current.quoted.append(quoted.group(2))
+                current.add(
+                    token,
+                    f"{quoted.group(1)}\\:{quoted.group(2)}{quoted.group(1)}",
+                    quoted=True,
+                )
+            elif ":" in token:
+                # sqlalchemy.text also finds bind parameters inside strings
+                current.named.extend(_BIND_PARAMETER.findall(token))
+                current.add(token, _STRING_SLICE.sub(r"\\:\1]", token), quoted=True)
+            else:
+                current.add(token, quoted=True)
+        elif kind == "slice":
+            current.add(token, "\\" + token)
+        elif kind == "parameter":
+            current.named.append(match.group("name"))
+            current.add(token)
+        elif kind == "open":
+            depth += 1
+            current.add(token)
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+            current.add(token)
+        else:
+            current.add(token)
+
+            if depth == 0:
+                statements.append(current)
+                current = _StatementBuilder()
+
+    if position < len(sql):
+        current.add(sql[position:])
+
+    statements.append(current)
+    return [s for s in (builder.build() for builder in statements) if s is not None]
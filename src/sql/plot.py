@@ -5,9 +5,9 @@ Plot using the SQL backend
 from ploomber_core.dependencies import requires
 from ploomber_core.exceptions import modify_exceptions
 from jinja2 import Template
+from sqlalchemy.exc import ProgrammingError
 
 from sql import exceptions, display
-from sql.stats import _summary_stats
 from sql.util import (
     _are_numeric_values,
     validate_mutually_exclusive_args,
@@ -33,140 +33,207 @@ from sql.telemetry import telemetry
 import warnings
 
 
-def _whishi(conn, table, column, hival, with_=None):
-    if not conn:
-        conn = sql.connection.ConnectionManager.current
-    template = Template(
-        """
-SELECT COUNT(*), MAX("{{column}}")
+# maximum number of outliers fetched to draw a boxplot
+BOXPLOT_MAX_FLIERS = 10_000
+
+# computes the quartiles, the mean, and the number of rows in a single scan;
+# dialects that don't support percentile_disc as an aggregate (e.g., SQL Server)
+# use its window function version
+_BOXPLOT_SUMMARY = """
+{%- macro percentile(pct) -%}
+{{ "approximate " if approximate }}percentile_disc({{pct}}) WITHIN GROUP \
+(ORDER BY "{{column}}"){{ " OVER ()" if window }}
+{%- endmacro -%}
+{%- if window %}
+SELECT
+    MAX(q1) AS q1,
+    MAX(med) AS med,
+    MAX(q3) AS q3,
+    AVG(val) AS mean,
+    COUNT(*) AS N,
+    MIN(val) AS min_val,
+    MAX(val) AS max_val{% if pct_lo is not none %},
+    MAX(pct_lo) AS pct_lo,
+    MAX(pct_hi) AS pct_hi{% endif %}
 FROM (
-    SELECT "{{column}}"
+    SELECT
+        "{{column}}" AS val,
+        {{ percentile(0.25) }} AS q1,
+        {{ percentile(0.5) }} AS med,
+        {{ percentile(0.75) }} AS q3{% if pct_lo is not none %},
+        {{ percentile(pct_lo) }} AS pct_lo,
+        {{ percentile(pct_hi) }} AS pct_hi{% endif %}
     FROM {{table}}
-    WHERE "{{column}}" <= {{hival}}
-) AS _whishi
+) AS boxplot_percentiles
+{%- else %}
+SELECT
+    {{ percentile(0.25) }} AS q1,
+    {{ percentile(0.5) }} AS med,
+    {{ percentile(0.75) }} AS q3,
+    AVG("{{column}}") AS mean,
+    COUNT(*) AS N,
+    MIN("{{column}}") AS min_val,
+    MAX("{{column}}") AS max_val{% if pct_lo is not none %},
+    {{ percentile(pct_lo) }} AS pct_lo,
+    {{ percentile(pct_hi) }} AS pct_hi{% endif %}
+FROM {{table}}
+{%- endif %}
 """
-    )
-
-    query = template.render(table=table, column=column, hival=hival)
-
-    values = conn.execute(query, with_).fetchone()
-    keys = ["N", "wiskhi_max"]
-    return {k: float(v) for k, v in zip(keys, values)}
 
-
-def _whislo(conn, table, column, loval, with_=None):
-    if not conn:
-        conn = sql.connection.ConnectionManager.current
-    template = Template(
-        """
-SELECT COUNT(*), MIN("{{column}}")
+# uses the summary to compute the whiskers (the lowest/highest values within the
+# bounds) with plain aggregates over a scan filtered by the bounds. Values below
+# min(loval, q1) or above max(hival, q3) are exactly the ones outside the whiskers,
+# so they're returned to fetch the outliers with _BOXPLOT_FLIERS
+_BOXPLOT_STATS = """
+SELECT
+    MAX(boxplot_bounds.q1) AS q1,
+    MAX(boxplot_bounds.med) AS med,
+    MAX(boxplot_bounds.q3) AS q3,
+    MAX(boxplot_bounds.mean) AS mean,
+    MAX(boxplot_bounds.N) AS N,
+    MIN(boxplot_data."{{column}}") AS whislo,
+    MAX(boxplot_data."{{column}}") AS whishi,
+    MAX(boxplot_bounds.flierlo) AS flierlo,
+    MAX(boxplot_bounds.flierhi) AS flierhi
 FROM (
-    SELECT "{{column}}"
-    FROM {{table}}
-    WHERE "{{column}}" >= {{loval}}
-) AS _whislo
+    SELECT
+        q1,
+        med,
+        q3,
+        mean,
+        N,
+        loval,
+        hival,
+        CASE WHEN loval < q1 THEN loval ELSE q1 END AS flierlo,
+        CASE WHEN hival > q3 THEN hival ELSE q3 END AS flierhi
+    FROM (
+        SELECT
+            q1,
+            med,
+            q3,
+            mean,
+            N,
+            {{loval}} AS loval,
+            {{hival}} AS hival
+        FROM ({{summary}}) AS boxplot_summary
+    ) AS boxplot_limits
+) AS boxplot_bounds
+LEFT JOIN {{table}} AS boxplot_data
+ON boxplot_data."{{column}}" >= boxplot_bounds.loval
+AND boxplot_data."{{column}}" <= boxplot_bounds.hival
 """
-    )
-
-    query = template.render(table=table, column=column, loval=loval)
-
-    values = conn.execute(query, with_).fetchone()
-    keys = ["N", "wisklo_min"]
-    return {k: float(v) for k, v in zip(keys, values)}
 
-
-def _percentile(conn, table, column, pct, with_=None):
-    if not conn:
-        conn = sql.connection.ConnectionManager.current.connection
-    template = Template(
-        """
-SELECT
-percentile_disc({{pct}}) WITHIN GROUP (ORDER BY "{{column}}") AS pct,
+_BOXPLOT_FLIERS = """
+SELECT "{{column}}"
 FROM {{table}}
+WHERE "{{column}}" < {{flierlo}} OR "{{column}}" > {{flierhi}}
 """
-    )
-    query = template.render(table=table, column=column, pct=pct)
 
-    values = conn.execute(query, with_).fetchone()[0]
-    return values
 
+def _boxplot_stats_query(conn, table, column, whis=1.5, autorange=False):
+    """
+    Build the query that computes the statistics required for a boxplot, except
+    for the outliers
+    """
+    if np.iterable(whis) and not isinstance(whis, str):
+        pct_lo, pct_hi = (pct / 100 for pct in whis)
+        loval, hival = "pct_lo", "pct_hi"
+    elif np.isreal(whis):
+        pct_lo = pct_hi = None
+        loval = f"q1 - {whis} * (q3 - q1)"
+        hival = f"q3 + {whis} * (q3 - q1)"
+    else:
+        raise ValueError("whis must be a float or list of percentiles")
 
-def _between(conn, table, column, whislo, whishi, with_=None):
-    template = Template(
-        """
-SELECT "{{column}}"
-FROM {{table}}
-WHERE "{{column}}" < {{whislo}}
-OR  "{{column}}" > {{whishi}}
-"""
+    # whiskers span the whole range of the data if the interquartile range is zero
+    if autorange:
+        loval = f"CASE WHEN q3 = q1 THEN min_val ELSE {loval} END"
+        hival = f"CASE WHEN q3 = q1 THEN max_val ELSE {hival} END"
+
+    summary = Template(_BOXPLOT_SUMMARY).render(
+        table=table,
+        column=column,
+        pct_lo=pct_lo,
+        pct_hi=pct_hi,
+        approximate=conn.dialect == "redshift",
+        window=conn.dialect not in {"duckdb", "postgresql", "redshift"},
     )
-    query = template.render(table=table, column=column, whislo=whislo, whishi=whishi)
 
-    results = [float(n[0]) for n in conn.execute(query, with_).fetchall()]
-    return results
+    return Template(_BOXPLOT_STATS).render(
+        table=table,
+        column=column,
+        summary=summary,
+        loval=loval,
+        hival=hival,
+    )
 
 
 # https://github.com/matplotlib/matplotlib/blob/b5ac96a8980fdb9e59c9fb649e0714d776e26701/lib/matplotlib/cbook/__init__.py
 @modify_exceptions
-def _boxplot_stats(conn, table, column, whis=1.5, autorange=False, with_=None):
-    """Compute statistics required to create a boxplot"""
+def _boxplot_stats(
+    conn,
+    table,
+    column,
+    whis=1.5,
+    autorange=False,
+    with_=None,
+    max_fliers=None,
+):
+    """
+    Compute statistics required to create a boxplot. Runs a query for the
+    statistics and another one for the outliers, fetching at most max_fliers of
+    them (defaults to BOXPLOT_MAX_FLIERS)
+    """
     if not conn:
         conn = sql.connection.ConnectionManager.current
 
+    if max_fliers is None:
+        max_fliers = BOXPLOT_MAX_FLIERS
+
     def _compute_conf_interval(N, med, iqr):
         notch_min = med - 1.57 * iqr / np.sqrt(N)
         notch_max = med + 1.57 * iqr / np.sqrt(N)
 
         return notch_min, notch_max
 
+    query = _boxplot_stats_query(conn, table, column, whis=whis, autorange=autorange)
+
+    try:
+        row = conn.execute(query, with_).fetchone()
+    except ProgrammingError as e:
+        driver = conn._get_database_information()["driver"]
+        raise exceptions.RuntimeError(
+            f"\nEnsure that percentile_disc function is available on {driver}."
+        ) from e
+
+    # there are no rows, or all the values are NULL
+    if row is None or row[0] is None:
+        raise exceptions.UsageError(
+            f"Cannot create a boxplot: column {column!r} from {table} has no values"
+        )
+
+    q1, med, q3, mean, N, whislo, whishi = (
+        None if value is None else float(value) for value in row[:7]
+    )
+    fliers = _boxplot_fliers(conn, table, column, *row[7:], with_, max_fliers)
+
     stats = dict()
 
     # arithmetic mean
-    s_stats = _summary_stats(conn, table, column, with_=with_)
-
-    stats["mean"] = s_stats["mean"]
-    q1, med, q3 = s_stats["q1"], s_stats["med"], s_stats["q3"]
-    N = s_stats["N"]
+    stats["mean"] = mean
 
     # interquartile range
     stats["iqr"] = q3 - q1
 
-    if stats["iqr"] == 0 and autorange:
-        whis = (0, 100)
-
     # conf. interval around median
     stats["cilo"], stats["cihi"] = _compute_conf_interval(N, med, stats["iqr"])
 
     # lowest/highest non-outliers
-    if np.iterable(whis) and not isinstance(whis, str):
-        loval, hival = _percentile(conn, table, column, whis, with_=with_)
-
-    elif np.isreal(whis):
-        loval = q1 - whis * stats["iqr"]
-        hival = q3 + whis * stats["iqr"]
-    else:
-        raise ValueError("whis must be a float or list of percentiles")
-
-    # get high extreme
-    wiskhi_d = _whishi(conn, table, column, hival, with_=with_)
-
-    if wiskhi_d["N"] == 0 or wiskhi_d["wiskhi_max"] < q3:
-        stats["whishi"] = q3
-    else:
-        stats["whishi"] = wiskhi_d["wiskhi_max"]
-
-    # get low extreme
-    wisklo_d = _whislo(conn, table, column, loval, with_=with_)
-
-    if wisklo_d["N"] == 0 or wisklo_d["wisklo_min"] > q1:
-        stats["whislo"] = q1
-    else:
-        stats["whislo"] = wisklo_d["wisklo_min"]
+    stats["whishi"] = q3 if whishi is None or whishi < q3 else whishi
+    stats["whislo"] = q1 if whislo is None or whislo > q1 else whislo
 
     # compute a single array of outliers
-    stats["fliers"] = np.array(
-        _between(conn, table, column, stats["whislo"], stats["whishi"], with_=with_)
-    )
+    stats["fliers"] = np.array(fliers)
 
     # add in the remaining stats
     stats["q1"], stats["med"], stats["q3"] = q1, med, q3
@@ -176,6 +243,26 @@ def _boxplot_stats(conn, table, column, whis=1.5, autorange=False, with_=None):
     return bxpstats
 
 
+def _boxplot_fliers(conn, table, column, flierlo, flierhi, with_, max_fliers):
+    """Fetch (at most max_fliers) values outside of [flierlo, flierhi]"""
+    # the bounds come from the database (int, float, or Decimal), so their string
+    # representation is a valid numeric literal
+    query = Template(_BOXPLOT_FLIERS).render(
+        table=table, column=column, flierlo=str(flierlo), flierhi=str(flierhi)
+    )
+    rows = conn.execute(query, with_).fetchmany(max_fliers + 1)
+
+    if len(rows) > max_fliers:
+        warnings.warn(
+            f"Column {column!r} has more than {max_fliers} outliers, the boxplot "
+            f"only shows {max_fliers} of them (set sql.plot.BOXPLOT_MAX_FLIERS "
+            "to show more)",
+            UserWarning,
+        )
+
+    return [float(value) for value, in rows[:max_fliers]]
+
+
 # https://github.com/matplotlib/matplotlib/blob/ddc260ce5a53958839c244c0ef0565160aeec174/lib/matplotlib/axes/_axes.py#L3915
 @requires(["matplotlib"])
 @telemetry.log_call("boxplot", payload=True)
@@ -250,7 +337,9 @@ def boxplot(
         set_label(column)
         set_ticklabels([column])
     else:
-        stats = [_boxplot_stats(conn, _table, col, with_=with_) for col in column]
+        stats = conn._map_concurrently(
+            lambda conn_, col: _boxplot_stats(conn_, _table, col, with_=with_), column
+        )
         ax.bxp(stats, vert=vert)
         ax.set_title(f"Boxplot from {table!r}")
         set_ticklabels(column)
@@ -516,17 +605,21 @@ def histogram(
             raise exceptions.UsageError(
                 "Multiple columns don't support breaks. Please use bins instead."
             )
-        for i, col in enumerate(column):
-            bin_, height, bin_size = _histogram(
+        histograms = conn._map_concurrently(
+            lambda conn_, col: _histogram(
                 _table,
                 col,
                 bins,
                 with_=with_,
-                conn=conn,
+                conn=conn_,
                 facet=facet,
                 breaks=breaks,
                 binwidth=binwidth,
-            )
+            ),
+            column,
+        )
+
+        for i, (col, (bin_, height, bin_size)) in enumerate(zip(column, histograms)):
             width = _get_bar_width(ax, bin_, bin_size, binwidth)
 
             if isinstance(color, list):
@@ -0,0 +1,240 @@
+"""
+Run queries in a background thread (%%sql --async) so the kernel can keep
+executing cells while a long query runs
+"""
+
+import threading
+import time
+from contextlib import ExitStack
+
+from sql.run.cache import CacheEntry, CachedCursor
+from sql.run.disk_cache import ArrowCursor
+from sql.run.resultset import ResultSet
+from sql.run.run import run_statements
+
+# number of rows fetched at a time, the progress (rows_fetched) is updated after
+# each batch
+FETCH_BATCH_SIZE = 10_000
+
+
+class _BackgroundConfig:
+    """
+    Wraps the configuration to disable the messages (e.g., "N rows affected"),
+    since they'd be displayed in whatever cell is running when the query finishes
+    """
+
+    feedback = 0
+
+    def __init__(self, config):
+        self._config = config
+
+    def __getattr__(self, name):
+        return getattr(self._config, name)
+
+
+class QueryFuture:
+    """
+    A handle to a query running in a background thread, returned by
+    run_statements_async and %%sql --async
+
+    Parameters
+    ----------
+    sql : str
+        The SQL statements
+
+    alias : str
+        The alias of the connection running the query
+    """
+
+    def __init__(self, sql, alias):
+        self.sql = sql
+        self.alias = alias
+        self.rows_fetched = 0
+        self._result = None
+        self._exception = None
+        self._started_at = time.monotonic()
+        self._finished_at = None
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def status(self):
+        """'running', 'finished', or 'failed'"""
+        if not self._done.is_set():
+            return "running"
+
+        return "failed" if self._exception is not None else "finished"
+
+    @property
+    def elapsed(self):
+        """Seconds since the query started (until it finished, if done)"""
+        end = self._finished_at if self._finished_at is not None else time.monotonic()
+        return end - self._started_at
+
+    def done(self):
+        """Returns True if the query finished (successfully or not)"""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until the query finishes or the timeout (in seconds) expires.
+        Returns True if the query finished
+        """
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """
+        Block until the query finishes and return the results (a ResultSet, or a
+        data frame if autopandas/autopolars are enabled). Raises the query's
+        exception if it failed, or TimeoutError if it doesn't finish in time
+        """
+        if not self.wait(timeout):
+            raise TimeoutError(
+                f"The query didn't finish in {timeout} seconds "
+                f"(it's been running for {self.elapsed:.1f} seconds)"
+            )
+
+        if self._exception is not None:
+            raise self._exception
+
+        return self._result
+
+    def exception(self, timeout=None):
+        """Block until the query finishes and return its exception (or None)"""
+        self.wait(timeout)
+        return self._exception
+
+    def add_done_callback(self, callback):
+        """
+        Call callback(future) when the query finishes (in the background thread),
+        or right away if it already finished
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+
+        callback(self)
+
+    def _start(self, function):
+        self._thread = threading.Thread(
+            target=self._run, args=(function,), name="jupysql-async", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, function):
+        try:
+            self._result = function(self)
+        except BaseException as e:
+            self._exception = e
+
+        self._finished_at = time.monotonic()
+
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            callback(self)
+
+    def __repr__(self):
+        return (
+            f"<QueryFuture alias={self.alias!r} status={self.status!r} "
+            f"elapsed={self.elapsed:.1f}s rows_fetched={self.rows_fetched}>"
+        )
+
+
+def _fetch_all(result, future):
+    """Fetch all the rows in the ResultSet, updating the future's progress"""
+    future.rows_fetched = len(result._results)
+
+    while not result._done_fetching():
+        result.fetchmany(FETCH_BATCH_SIZE)
+        future.rows_fetched = len(result._results)
+
+
+def _detach(result, conn, config):
+    """
+    Return a ResultSet with the fetched rows that doesn't read from the worker
+    connection (it's closed once the query finishes), so the results can still be
+    converted to a data frame
+    """
+    if result._is_cached:
+        return result
+
+    if result._is_columnar:
+        cursor = ArrowCursor(result._results.to_arrow())
+    else:
+        rows = [tuple(row) for row in result._results]
+        cursor = CachedCursor(CacheEntry(result.keys, rows, size=0))
+
+    return ResultSet(cursor, config, result._statement, conn)
+
+
+def run_statements_async(
+    conn,
+    sql,
+    config,
+    parameters=None,
+    yield_per=None,
+    cache=False,
+    timeout=None,
+    partition_on=None,
+    partitions=None,
+    on_done=None,
+):
+    """
+    Run the SQL statements in a background thread, using a new connection to the
+    same database (see run_statements for the parameters). Returns a QueryFuture;
+    all the rows are fetched before the query is marked as finished
+
+    Parameters
+    ----------
+    on_done : callable, default None
+        Called with the results once the query finishes successfully (in the
+        background thread)
+
+    Examples
+    --------
+    >>> future = run_statements_async(conn, "SELECT * FROM numbers", config)
+    >>> future.status
+    'running'
+    >>> results = future.result()
+    """
+    future = QueryFuture(sql, conn.alias)
+    config = _BackgroundConfig(config)
+
+    # open the connection here so errors (e.g., an in-memory database) are raised
+    # right away, it's closed by the background thread
+    stack = ExitStack()
+    worker = stack.enter_context(conn._copy_with_new_connection())
+
+    def run(future):
+        with stack:
+            result = run_statements(
+                worker,
+                sql,
+                config,
+                parameters=parameters,
+                yield_per=yield_per,
+                cache=cache,
+                timeout=timeout,
+                partition_on=partition_on,
+                partitions=partitions,
+            )
+
+            if isinstance(result, ResultSet):
+                _fetch_all(result, future)
+                result = _detach(result, conn, config)
+            elif hasattr(result, "__len__") and not isinstance(result, str):
+                future.rows_fetched = len(result)
+
+        if on_done is not None:
+            on_done(result)
+
+        return result
+
+    future._start(run)
+    return future
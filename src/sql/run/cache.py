@@ -0,0 +1,210 @@
+"""
+In-memory cache for the results of read-only queries (opt-in via
+SqlMagic.result_cache)
+"""
+
+import sys
+import time
+from collections import OrderedDict, namedtuple
+
+from sql.parse import SQLStatement, normalize_statement, split_statements
+
+# number of rows used to estimate the memory used by a result
+SIZE_ESTIMATE_SAMPLE = 100
+
+CacheKey = namedtuple("CacheKey", ["alias", "sql", "parameters", "autolimit"])
+
+
+class CacheEntry:
+    """The rows (and column names) returned by a query"""
+
+    def __init__(self, keys, rows, size):
+        self.keys = list(keys)
+        self.rows = rows
+        self.size = size
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+    @property
+    def age(self):
+        """Seconds since the entry was stored"""
+        return time.monotonic() - self.created_at
+
+
+class CachedCursor:
+    """
+    A DBAPI-like cursor that returns the rows stored in a cache entry, so a
+    ResultSet can be created without running the query
+    """
+
+    rowcount = -1
+    # cursors backed by a pyarrow.Table (see sql.run.disk_cache) set this
+    table = None
+
+    def __init__(self, entry):
+        self.description = [
+            (key, None, None, None, None, None, None) for key in entry.keys
+        ]
+        self._rows = entry.rows
+        self._position = 0
+
+    def fetchmany(self, size):
+        rows = self._rows[self._position : self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._position :]
+        self._position = len(self._rows)
+        return rows
+
+    def close(self):
+        pass
+
+
+class ResultCache:
+    """
+    A least-recently-used cache of query results with a memory budget and a
+    time-to-live
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._listeners = []
+
+    def get(self, key, ttl=0):
+        """
+        Return the entry for the given key (or None if missing or older than ttl
+        seconds, 0 means entries never expire)
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if ttl and entry.age > ttl:
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        return entry
+
+    def put(self, key, keys, rows, size, max_size):
+        """
+        Store the rows, evicting the least recently used entries to keep the total
+        size under max_size (in bytes). Returns the entry or None if the rows do
+        not fit in the cache
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        if size > max_size:
+            return None
+
+        entry = CacheEntry(keys, rows, size)
+        self._entries[key] = entry
+        self._size += size
+
+        while self._size > max_size:
+            self._remove(next(iter(self._entries)))
+
+        return entry
+
+    def invalidate(self, alias):
+        """Remove all entries for the given connection alias"""
+        for key in [key for key in self._entries if key.alias == alias]:
+            self._remove(key)
+
+        self._notify(alias)
+
+    def clear(self):
+        """Remove all entries, returns the number of removed entries"""
+        n_entries = len(self._entries)
+        self._entries.clear()
+        self._size = 0
+        self._notify(None)
+        return n_entries
+
+    def add_invalidation_listener(self, listener):
+        """
+        Call listener(alias) when a connection's entries are invalidated (alias
+        is None when all the entries are removed)
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, alias):
+        for listener in self._listeners:
+            listener(alias)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    @property
+    def size(self):
+        """Estimated memory used by the cached rows (in bytes)"""
+        return self._size
+
+    def items(self):
+        return self._entries.items()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+def make_key(alias, statements, parameters, autolimit):
+    """
+    Build the cache key for the given statements. Returns None if the parameters
+    cannot be hashed (e.g., a list), in such case the results are not cached
+    """
+    # statements from split_statements don't have comments
+    if not all(isinstance(statement, SQLStatement) for statement in statements):
+        statements = [
+            split for statement in statements for split in split_statements(statement)
+        ]
+
+    sql = ";".join(normalize_statement(statement) for statement in statements)
+
+    if parameters:
+        # when named parameters are enabled, parameters is the whole user namespace,
+        # so only keep the ones that appear in the query
+        found = [
+            name for statement in statements for name in statement.named_parameters
+        ]
+        names = sorted({name for name in found if name in parameters})
+        parameters = tuple((name, parameters[name]) for name in names)
+    else:
+        parameters = ()
+
+    key = CacheKey(alias, sql, parameters, autolimit)
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def estimate_size(rows):
+    """Estimate the memory used by the rows (in bytes) using a sample"""
+    n_rows = len(rows)
+
+    if not n_rows:
+        return 0
+
+    sample = rows[:SIZE_ESTIMATE_SAMPLE]
+    sample_size = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+        for row in sample
+    )
+
+    return sys.getsizeof(rows) + sample_size * n_rows // len(sample)
+
+
+result_cache = ResultCache()
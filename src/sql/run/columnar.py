@@ -0,0 +1,262 @@
+"""
+Columnar (Arrow-backed) storage for the rows fetched by a ResultSet
+"""
+
+import datetime
+import sys
+from decimal import Decimal
+from itertools import islice
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+# PEP 249 type objects (e.g., psycopg2.NUMBER), they compare equal to the type
+# codes in cursor.description
+_DBAPI_TYPE_OBJECTS = {
+    "NUMBER": "number",
+    "STRING": "string",
+    "DATETIME": "datetime",
+    "BINARY": "binary",
+}
+
+# drivers that use strings as type codes (e.g., DuckDB)
+_TYPE_NAMES = {
+    "NUMBER": "number",
+    "STRING": "string",
+    "DATE": "datetime",
+    "DATETIME": "datetime",
+    "TIME": "datetime",
+    "BOOL": "bool",
+    "BINARY": "binary",
+}
+
+# drivers that use Python types as type codes (e.g., pyodbc), bool goes first
+# since it's a subclass of int
+_PYTHON_TYPES = [
+    (bool, "bool"),
+    ((int, float, Decimal), "number"),
+    (str, "string"),
+    ((datetime.date, datetime.time), "datetime"),
+    ((bytes, bytearray), "binary"),
+]
+
+
+def concat_tables(tables):
+    """
+    Concatenate tables whose column types might differ (e.g., int64 and double, or
+    a column with only NULLs), promoting them to a common type
+    """
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    # pyarrow < 14 only promotes null columns
+    except TypeError:
+        return pa.concat_tables(tables, promote=True)
+
+
+def unify_schemas(schemas):
+    """Unify schemas, promoting compatible types (see concat_tables)"""
+    try:
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    # pyarrow < 14 only unifies identical types
+    except TypeError:
+        return pa.unify_schemas(schemas)
+
+
+class ArrowResults:
+    """
+    A list-like container that stores fetched rows as Arrow record batches instead
+    of a Python list of row objects. It supports the subset of the list interface
+    used by ResultSet (len, iteration, indexing, slicing, and extend)
+
+    If a batch cannot be converted to Arrow (e.g., a SQLite column mixing integers
+    and strings), the container falls back to storing plain tuples so results are
+    never lost.
+
+    Parameters
+    ----------
+    keys : list
+        Column names
+    """
+
+    def __init__(self, keys):
+        self._keys = list(keys)
+        self._batches = []
+        self._schema = None
+        self._fallback = None
+        self._length = 0
+
+    @property
+    def is_columnar(self):
+        """True if the rows are stored as Arrow record batches"""
+        return self._fallback is None
+
+    def extend(self, rows):
+        rows = list(rows)
+
+        if not rows:
+            return
+
+        if self._fallback is not None:
+            self._fallback.extend(tuple(row) for row in rows)
+        else:
+            try:
+                batch = self._to_record_batch(rows)
+                self._schema = self._unify_schema(batch.schema)
+                self._batches.append(batch)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+                self._fallback = [tuple(row) for row in self._iter_batches()]
+                self._batches = []
+                self._schema = None
+                self._fallback.extend(tuple(row) for row in rows)
+
+        self._length += len(rows)
+
+    def _to_record_batch(self, rows):
+        arrays = [pa.array(column) for column in zip(*rows)]
+        return pa.RecordBatch.from_arrays(arrays, names=self._keys)
+
+    def _unify_schema(self, schema):
+        # batches are inferred independently, so we need to check that the types
+        # are compatible (e.g., int64 and double) before adding a new one
+        if self._schema is None or self._schema.equals(schema):
+            return schema
+
+        return unify_schemas([self._schema, schema])
+
+    def _iter_batches(self):
+        for batch in self._batches:
+            columns = [column.to_pylist() for column in batch.columns]
+            yield from zip(*columns)
+
+    def to_arrow(self):
+        """Return the stored rows as a pyarrow.Table"""
+        if self._fallback is not None:
+            columns = list(zip(*self._fallback)) or [()] * len(self._keys)
+            return pa.table(
+                [pa.array(column, from_pandas=True) for column in columns],
+                names=self._keys,
+            )
+
+        tables = [pa.Table.from_batches([batch]) for batch in self._batches]
+
+        if not tables:
+            return pa.table([pa.array([]) for _ in self._keys], names=self._keys)
+
+        return concat_tables(tables).cast(self._schema)
+
+    def columns(self):
+        """Return a list with one tuple of values per column"""
+        if self._fallback is not None:
+            return list(zip(*self._fallback))
+
+        table = self.to_arrow()
+        return [tuple(column.to_pylist()) for column in table.columns]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        if self._fallback is not None:
+            return iter(self._fallback)
+
+        return self._iter_batches()
+
+    def __getitem__(self, key):
+        if self._fallback is not None:
+            return self._fallback[key]
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+
+            if step > 0:
+                return list(islice(self, start, stop, step))
+
+            return list(self)[key]
+
+        if not isinstance(key, int):
+            raise TypeError(f"indices must be integers or slices, not {type(key)}")
+
+        if key < 0:
+            key += self._length
+
+        if not 0 <= key < self._length:
+            raise IndexError("ResultSet index out of range")
+
+        for batch in self._batches:
+            if key < batch.num_rows:
+                return tuple(column[key].as_py() for column in batch.columns)
+
+            key -= batch.num_rows
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(n_rows={self._length}, keys={self._keys!r})"
+
+
+def _column_kind(type_code, module):
+    if type_code is None:
+        return None
+
+    if isinstance(type_code, type):
+        for types, kind in _PYTHON_TYPES:
+            if issubclass(type_code, types):
+                return kind
+
+        return None
+
+    if isinstance(type_code, str):
+        return _TYPE_NAMES.get(type_code.upper())
+
+    for name, kind in _DBAPI_TYPE_OBJECTS.items():
+        type_object = getattr(module, name, None)
+
+        try:
+            if type_object is not None and type_code == type_object:
+                return kind
+        # some type objects can't be compared with arbitrary type codes
+        except Exception:
+            pass
+
+    return None
+
+
+def get_column_kinds(cursor):
+    """
+    Return the kind of each column ("number", "string", "datetime", "bool",
+    "binary", or None if unknown) from the type codes in cursor.description, or
+    None if the cursor has no description
+    """
+    description = getattr(cursor, "description", None)
+
+    if not isinstance(description, (list, tuple)):
+        return None
+
+    module = sys.modules.get(type(cursor).__module__.split(".")[0])
+    return [_column_kind(column[1], module) for column in description]
+
+
+def _empty_type(kind):
+    """The type of a column with no values (or only NULLs), None to keep null"""
+    return {"number": pa.float64(), "string": pa.string(), "bool": pa.bool_()}.get(kind)
+
+
+def to_arrow_array(values, kind=None):
+    """
+    Convert the values of a column to a pyarrow.Array, using the column kind (see
+    get_column_kinds) to type columns where all values are NULL. Returns None if
+    the values can't be converted (e.g., a SQLite column mixing numbers and strings)
+    """
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        return None
+
+    if pa.types.is_null(array.type):
+        type_ = _empty_type(kind)
+        return array if type_ is None else array.cast(type_)
+
+    return array
@@ -0,0 +1,147 @@
+"""
+On-disk cache for query results (%%sql --cache). Results are stored as Arrow IPC
+files so they can be memory-mapped when loading them in a new session
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from ploomber_core.dependencies import check_installed
+
+from sql import exceptions
+from sql.run.cache import CachedCursor, make_key
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+
+class ArrowCursor(CachedCursor):
+    """A DBAPI-like cursor that returns the rows of a pyarrow.Table"""
+
+    def __init__(self, table):
+        self.description = [
+            (name, None, None, None, None, None, None) for name in table.column_names
+        ]
+        self.table = table
+        self._position = 0
+
+    def _to_rows(self, table):
+        columns = [column.to_pylist() for column in table.columns]
+        return list(zip(*columns))
+
+    def fetchmany(self, size):
+        rows = self._to_rows(self.table.slice(self._position, size))
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._to_rows(self.table.slice(self._position))
+        self._position = self.table.num_rows
+        return rows
+
+
+class DiskCache:
+    """
+    Stores pyarrow.Tables in a directory, one Arrow IPC file per key
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory to store the files
+    """
+
+    SUFFIX = ".arrow"
+
+    def __init__(self, directory):
+        check_installed(["pyarrow"], "%%sql --cache")
+        self._directory = Path(directory)
+
+    def _path(self, key):
+        return self._directory / f"{key}{self.SUFFIX}"
+
+    def get(self, key):
+        """Memory-map the table stored with the given key, None if missing"""
+        path = self._path(key)
+
+        if not path.exists():
+            return None
+
+        try:
+            return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        # a corrupted file (e.g., the kernel died while writing it) is treated as
+        # a miss, the file will be overwritten
+        except (pa.ArrowInvalid, OSError):
+            return None
+
+    def put(self, key, table):
+        """Store the table with the given key"""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        # write to a temporary file first, so a concurrent reader never sees a
+        # partially written file
+        os.replace(tmp, path)
+
+    def clear(self):
+        """Delete all the stored tables, returns the number of deleted files"""
+        if not self._directory.exists():
+            return 0
+
+        paths = list(self._directory.glob(f"*{self.SUFFIX}"))
+
+        for path in paths:
+            path.unlink()
+
+        return len(paths)
+
+
+def make_disk_key(conn, statements, parameters, autolimit):
+    """
+    Build the key (a hash of the connection URL and the query) to store the results
+    in the disk cache. Returns None if the parameters cannot be hashed
+    """
+    # DBAPI connections don't have a URL, so we use the alias. The default one is
+    # the class name (e.g., "Connection"), which doesn't identify the database
+    if conn.url is None and conn.alias == getattr(conn, "_connection_class_name", None):
+        raise exceptions.UsageError(
+            f"--cache requires a connection URL, but {conn.alias!r} doesn't have "
+            "one. Pass a unique alias to identify the database "
+            "(e.g., %sql conn --alias mydb) to cache its results"
+        )
+
+    key = make_key(conn.url or conn.alias, statements, parameters, autolimit)
+
+    if key is None:
+        return None
+
+    return hashlib.sha256(repr(tuple(key)).encode("utf-8")).hexdigest()
+
+
+def result_set_to_arrow(result_set):
+    """
+    Fetch all the rows in the ResultSet and convert them to a pyarrow.Table.
+    Returns None if they can't be converted (e.g., a column mixing numbers and
+    strings)
+    """
+    result_set.fetchall()
+
+    if result_set._is_columnar:
+        return result_set._results.to_arrow()
+
+    columns = list(zip(*result_set._results)) or [()] * len(result_set.keys)
+
+    try:
+        return pa.table(
+            [pa.array(column, from_pandas=True) for column in columns],
+            names=list(result_set.keys),
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
@@ -0,0 +1,285 @@
+"""
+Run queries in an embedded DuckDB database. Used to query in-memory data frames
+(pandas, polars, and Arrow) from SQLite, PostgreSQL, and MySQL connections without
+copying them into the database (SqlMagic.query_dataframes): DuckDB attaches the
+database and reads the data frames directly
+"""
+
+import sqlglot
+from sqlglot import exp
+from ploomber_core.dependencies import check_installed
+
+from sql import ast_cache, catalog, exceptions
+from sql.parse import split_statements
+from sql.catalog import catalog_cache
+from sql.run.cache import result_cache
+from sql.run.disk_cache import ArrowCursor
+from sql.run.resultset import ResultSet, _statement_is_select
+from sql.run.run import select_df_type
+
+try:
+    import duckdb
+except ModuleNotFoundError:
+    duckdb = None
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+# name of the database attached to the embedded DuckDB
+ATTACHED_DATABASE = "jupysql_source"
+
+# SQLAlchemy dialect -> DuckDB extension to attach the database
+_EXTENSIONS = {
+    "sqlite": "sqlite",
+    "postgresql": "postgres",
+    "mysql": "mysql",
+}
+
+# (module, class name) of the objects DuckDB can read without copying them
+_DATA_FRAME_TYPES = {
+    ("pandas", "DataFrame"),
+    ("polars", "DataFrame"),
+    ("pyarrow", "Table"),
+}
+
+
+def is_data_frame(obj):
+    """Check if the object is a data frame that DuckDB can read"""
+    module = type(obj).__module__.split(".")[0]
+    return (module, type(obj).__name__) in _DATA_FRAME_TYPES
+
+
+def supports_data_frames(conn):
+    """Check if the embedded DuckDB can attach the connection's database"""
+    return not conn.is_dbapi_connection and conn.dialect in _EXTENSIONS
+
+
+def find_data_frames(sql, namespace, conn):
+    """
+    Return the data frames (a {name: data frame} dictionary) referenced as tables
+    in the query. Tables that exist in the database take precedence over data
+    frames with the same name
+    """
+    try:
+        expressions = ast_cache.parse(sql, read=conn._get_sqlglot_dialect(), copy=False)
+    except sqlglot.errors.ParseError:
+        return {}
+
+    names, ctes = set(), set()
+
+    for expression in expressions:
+        if expression is None:
+            continue
+
+        ctes.update(cte.alias_or_name for cte in expression.find_all(exp.CTE))
+        names.update(
+            table.name
+            for table in expression.find_all(exp.Table)
+            if not table.db and not table.catalog
+        )
+
+    data_frames = {
+        name: namespace[name]
+        for name in names - ctes
+        if name in namespace and is_data_frame(namespace[name])
+    }
+
+    if not data_frames:
+        return {}
+
+    tables = {table.lower() for table in catalog.get_table_names(conn)}
+    return {
+        name: data_frame
+        for name, data_frame in data_frames.items()
+        if name.lower() not in tables
+    }
+
+
+def _quote_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _key_value_string(parameters):
+    """Format connection parameters as a libpq-style key=value string"""
+    pairs = []
+
+    for key, value in parameters.items():
+        if value is None:
+            continue
+
+        value = str(value).replace("\\", "\\\\").replace("'", "\\'")
+        pairs.append(f"{key}='{value}'")
+
+    return " ".join(pairs)
+
+
+def attach_statement(url):
+    """
+    Return the statement to attach the database (a sqlalchemy.engine.URL) to
+    DuckDB
+    """
+    dialect = url.get_backend_name()
+
+    if dialect == "sqlite":
+        if url.database in {None, "", ":memory:"}:
+            raise exceptions.UsageError(
+                "Cannot query data frames in an in-memory SQLite database since "
+                "DuckDB can't attach it. Use --persist to store the data frames "
+                "in the database, or use a SQLite file"
+            )
+
+        source = url.database
+    elif dialect == "postgresql":
+        source = _key_value_string(
+            {
+                "host": url.host,
+                "port": url.port,
+                "dbname": url.database,
+                "user": url.username,
+                "password": url.password,
+            }
+        )
+    elif dialect == "mysql":
+        source = _key_value_string(
+            {
+                "host": url.host,
+                "port": url.port,
+                "database": url.database,
+                "user": url.username,
+                "password": url.password,
+            }
+        )
+    else:
+        raise exceptions.UsageError(
+            f"Querying data frames is not supported with {dialect!r} connections. "
+            "Use --persist to store the data frames in the database"
+        )
+
+    return (
+        f"ATTACH {_quote_literal(source)} AS {ATTACHED_DATABASE} "
+        f"(TYPE {_EXTENSIONS[dialect]})"
+    )
+
+
+def _load_extension(connection, extension):
+    try:
+        connection.load_extension(extension)
+    except duckdb.Error:
+        try:
+            connection.install_extension(extension)
+            connection.load_extension(extension)
+        except duckdb.Error as e:
+            raise exceptions.RuntimeError(
+                f"Querying data frames requires DuckDB's {extension!r} extension, "
+                f"but it couldn't be loaded: {e}"
+            ) from e
+
+
+def connect(conn):
+    """
+    Return an embedded DuckDB connection with the connection's database attached
+    (and used as the default database)
+    """
+    check_installed(["duckdb", "pyarrow"], "SqlMagic.query_dataframes")
+
+    statement = attach_statement(conn._connection.engine.url)
+    connection = duckdb.connect()
+
+    try:
+        _load_extension(connection, _EXTENSIONS[conn.dialect])
+        connection.execute(statement)
+        connection.execute(f"USE {ATTACHED_DATABASE}")
+    except Exception:
+        connection.close()
+        raise
+
+    return connection
+
+
+def _transpile(statement, dialect):
+    try:
+        return ast_cache.transpile(statement, read=dialect, write="duckdb")[0]
+    except sqlglot.errors.SqlglotError:
+        return statement
+
+
+def _has_parameters(sql, dialect):
+    try:
+        expressions = ast_cache.parse(sql, read=dialect, copy=False)
+    except sqlglot.errors.ParseError:
+        return False
+
+    return any(
+        expression is not None and expression.find(exp.Placeholder) is not None
+        for expression in expressions
+    )
+
+
+def _fetch(connection, limit):
+    """
+    Fetch the results of the last statement as a pyarrow.Table, reading at most
+    limit rows (all of them if limit is 0 or None)
+    """
+    if not limit:
+        return connection.fetch_arrow_table()
+
+    reader = connection.fetch_record_batch(rows_per_batch=limit)
+    batches, n_rows = [], 0
+
+    for batch in reader:
+        batches.append(batch)
+        n_rows += batch.num_rows
+
+        if n_rows >= limit:
+            break
+
+    return pa.Table.from_batches(batches, schema=reader.schema).slice(0, limit)
+
+
+def run_statements(conn, sql, config, data_frames):
+    """
+    Run the SQL statements in an embedded DuckDB that attaches the connection's
+    database and reads the data frames directly (without copying them). Returns
+    the results of the last statement (a ResultSet, or a data frame if autopandas
+    or autopolars are enabled)
+
+    Parameters
+    ----------
+    conn : sql.connection.SQLAlchemyConnection
+        The connection to query
+
+    data_frames : dict
+        The data frames referenced in the query (see find_data_frames)
+    """
+    if _has_parameters(sql, conn._get_sqlglot_dialect()):
+        raise exceptions.UsageError(
+            "Queries that use data frames do not support query parameters (e.g., "
+            ":name). Use {{name}} to render the variable in the query instead"
+        )
+
+    statements = split_statements(sql)
+    connection = connect(conn)
+
+    try:
+        for name, data_frame in data_frames.items():
+            connection.register(name, data_frame)
+
+        for statement in statements:
+            connection.execute(_transpile(statement, conn._get_sqlglot_dialect()))
+
+            if not _statement_is_select(statement):
+                result_cache.invalidate(conn.alias)
+
+                if catalog.statement_changes_catalog(statement):
+                    catalog_cache.invalidate(conn.alias)
+
+        # only SELECT statements are limited (same as run.run_statements)
+        limit = config.autolimit if _statement_is_select(statements[-1]) else None
+        table = _fetch(connection, limit)
+    finally:
+        connection.close()
+
+    result_set = ResultSet(ArrowCursor(table), config, statements[-1], conn)
+    return select_df_type(result_set, config)
@@ -0,0 +1,369 @@
+"""
+Federated queries (%%sql --federate): join tables from different connections.
+Tables are qualified with the connection alias (e.g., pg.orders, or
+pg.public.orders), unqualified tables come from the current connection. Each
+table is fetched from its connection, selecting only the columns used in the
+query and applying the filters that only involve that table, and the query runs
+in an embedded DuckDB
+"""
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.optimizer.qualify import qualify
+from sqlglot.optimizer.scope import traverse_scope
+from ploomber_core.dependencies import check_installed
+
+from sql import catalog, exceptions
+from sql.parse import split_statements
+from sql.run.columnar import concat_tables
+from sql.run.disk_cache import ArrowCursor
+from sql.run.resultset import ResultSet
+from sql.run.run import select_df_type
+
+try:
+    import duckdb
+except ModuleNotFoundError:
+    duckdb = None
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+# number of rows fetched from the sources at a time
+FETCH_BATCH_SIZE = 10_000
+
+# prefix for the names of the fetched tables in the embedded DuckDB
+PLACEHOLDER_PREFIX = "jupysql_federated_"
+
+
+class Source:
+    """
+    A table referenced in a federated query
+
+    Parameters
+    ----------
+    conn : sql.connection.AbstractConnection
+        The connection that has the table
+
+    table : sqlglot.exp.Table
+        The table (relative to the connection)
+
+    alias : str
+        The name used in the query to refer to the table
+
+    name : str
+        The name of the fetched table in the embedded DuckDB
+    """
+
+    def __init__(self, conn, table, alias, name):
+        self.conn = conn
+        self.table = table
+        self.alias = alias
+        self.name = name
+        self.columns = []
+        self.used_columns = set()
+        self.filters = []
+
+    def _original_name(self, column):
+        """Map a normalized column name to the name in the source"""
+        for original in self.columns:
+            if original.lower() == column.lower():
+                return original
+
+        return column
+
+    def to_sql(self):
+        """Return the query that fetches the table from its connection"""
+        columns = [
+            column for column in self.columns if column.lower() in self.used_columns
+        ]
+
+        # no columns are used (e.g., SELECT COUNT(*)), but we need the rows
+        if not columns:
+            columns = self.columns[:1]
+
+        query = exp.select(
+            *[exp.column(column, table=self.alias, quoted=True) for column in columns]
+        ).from_(exp.alias_(self.table.copy(), self.alias, table=True))
+
+        for condition in self.filters:
+            condition = condition.copy()
+
+            for column in condition.find_all(exp.Column):
+                column.set(
+                    "this",
+                    exp.to_identifier(self._original_name(column.name), quoted=True),
+                )
+
+            query = query.where(condition)
+
+        return query.sql(dialect=self.conn._get_sqlglot_dialect())
+
+    def __repr__(self):
+        return f"Source(alias={self.conn.alias!r}, table={self.table.sql()!r})"
+
+
+def _is_file(table):
+    """Check if a table is a file path (e.g., 'data.parquet'), read by DuckDB"""
+    return not table.db and any(char in table.name for char in "./*")
+
+
+def _resolve(table, conn, connections):
+    """
+    Return the connection and the table (relative to the connection) referenced by
+    a table in the query, or (None, None) if DuckDB reads it directly
+    """
+    qualifiers = [part for part in (table.catalog, table.db) if part]
+
+    if qualifiers and qualifiers[0] in connections:
+        db = qualifiers[1] if len(qualifiers) == 2 else None
+        return connections[qualifiers[0]], exp.table_(table.name, db=db)
+
+    if _is_file(table):
+        return None, None
+
+    return conn, exp.table_(
+        table.name, db=table.db or None, catalog=table.catalog or None
+    )
+
+
+def _get_columns(conn, table):
+    """Return the names of the columns in the table"""
+    if not conn.is_dbapi_connection:
+        try:
+            columns = catalog.get_columns(conn, table.name, schema=table.db or None)
+        except Exception:
+            columns = None
+
+        if columns:
+            return [column["name"] for column in columns]
+
+    query = exp.select("*").from_(table).where("1 = 0")
+    return _column_names(
+        conn.raw_execute(query.sql(dialect=conn._get_sqlglot_dialect()))
+    )
+
+
+def _column_names(result):
+    """Return the column names of a SQLAlchemy result or a DBAPI cursor"""
+    if hasattr(result, "keys"):
+        return list(result.keys())
+
+    return [description[0] for description in result.description]
+
+
+def _nullable_aliases(select):
+    """Return the aliases of the tables on the null-supplying side of outer joins"""
+    joins = select.args.get("joins") or []
+    nullable = set()
+
+    if any(join.side in {"RIGHT", "FULL"} for join in joins):
+        from_ = select.args.get("from")
+
+        if from_ is not None:
+            nullable.add(from_.this.alias_or_name)
+
+    for join in joins:
+        if join.side in {"LEFT", "FULL"}:
+            nullable.add(join.this.alias_or_name)
+
+    return nullable
+
+
+def _conjuncts(condition):
+    if isinstance(condition, exp.And):
+        return list(condition.flatten())
+
+    return [condition]
+
+
+def _push_down(query, sources):
+    """
+    Find the columns used from each source and the filters that only involve a
+    single source (they're also kept in the query)
+    """
+    by_name = {source.name: source for source in sources}
+    schema = {
+        source.name: {column: "UNKNOWN" for column in source.columns}
+        for source in sources
+    }
+
+    try:
+        qualified = qualify(
+            query.copy(),
+            schema=schema,
+            dialect="duckdb",
+            quote_identifiers=False,
+            validate_qualify_columns=False,
+        )
+    except sqlglot.errors.SqlglotError:
+        # we can't tell which columns are used, so we fetch all of them
+        for source in sources:
+            source.used_columns = {column.lower() for column in source.columns}
+
+        return
+
+    for scope in traverse_scope(qualified):
+        aliases = {
+            alias: by_name[table.name]
+            for alias, table in scope.sources.items()
+            if isinstance(table, exp.Table) and table.name in by_name
+        }
+
+        for column in scope.columns:
+            if column.table in aliases:
+                aliases[column.table].used_columns.add(column.name.lower())
+            # the column couldn't be resolved, so it might be in any of the tables
+            elif not column.table:
+                for source in aliases.values():
+                    source.used_columns.update(c.lower() for c in source.columns)
+
+        where = scope.expression.args.get("where")
+
+        if not isinstance(scope.expression, exp.Select) or where is None:
+            continue
+
+        nullable = _nullable_aliases(scope.expression)
+
+        for condition in _conjuncts(where.this):
+            tables = {column.table for column in condition.find_all(exp.Column)}
+
+            if (
+                len(tables) == 1
+                and not tables & nullable
+                and next(iter(tables)) in aliases
+                and condition.find(exp.Select) is None
+            ):
+                aliases[next(iter(tables))].filters.append(condition)
+
+
+def plan(sql, conn, connections):
+    """
+    Parse the query and return the query to run in DuckDB and the list of Source
+    objects to fetch
+
+    Parameters
+    ----------
+    conn : sql.connection.AbstractConnection
+        The current connection (for unqualified tables)
+
+    connections : dict
+        Connections by alias (ConnectionManager.connections)
+    """
+    statements = split_statements(sql)
+
+    if len(statements) != 1:
+        raise exceptions.UsageError("--federate only supports a single statement")
+
+    query = sqlglot.parse_one(statements[0], read="duckdb")
+
+    if query.find(exp.Placeholder) is not None:
+        raise exceptions.UsageError(
+            "--federate does not support query parameters (e.g., :name). Use "
+            "{{name}} to render the variable in the query instead"
+        )
+
+    ctes = {cte.alias_or_name for cte in query.find_all(exp.CTE)}
+    sources = []
+
+    for table in list(query.find_all(exp.Table)):
+        if not table.db and table.name in ctes:
+            continue
+
+        source_conn, source_table = _resolve(table, conn, connections)
+
+        if source_conn is None:
+            continue
+
+        name = f"{PLACEHOLDER_PREFIX}{len(sources)}"
+        alias = table.alias_or_name
+        source = Source(source_conn, source_table, alias, name)
+        source.columns = _get_columns(source_conn, source_table)
+        sources.append(source)
+        table.replace(exp.table_(name, alias=alias))
+
+    if not sources:
+        raise exceptions.UsageError(
+            "--federate found no tables in the query. Qualify the tables with "
+            "the connection alias (e.g., SELECT * FROM alias.table)"
+        )
+
+    _push_down(query, sources)
+    return query, sources
+
+
+def _mixed_types_error(source, e):
+    return exceptions.ValueError(
+        f"Cannot fetch {source.table.sql()!r} from {source.conn.alias!r}: "
+        f"the columns have mixed data types ({e})"
+    )
+
+
+def fetch(source):
+    """Fetch the source's rows (in batches) as a pyarrow.Table"""
+    result = source.conn.raw_execute(source.to_sql())
+
+    names = _column_names(result)
+    batches = []
+
+    while True:
+        rows = result.fetchmany(FETCH_BATCH_SIZE)
+
+        if not rows:
+            break
+
+        columns = [list(column) for column in zip(*rows)]
+
+        try:
+            batches.append(pa.table(dict(zip(names, columns))))
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise _mixed_types_error(source, e) from e
+
+    if not batches:
+        return pa.table({name: pa.array([], type=pa.null()) for name in names})
+
+    # the types are inferred per batch, so they might differ (e.g., a batch with
+    # integers and one with floats, or one with only NULLs)
+    try:
+        return concat_tables(batches)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise _mixed_types_error(source, e) from e
+
+
+def run_statements(conn, sql, config, connections):
+    """
+    Run a query that joins tables from different connections. Returns the results
+    (a ResultSet, or a data frame if autopandas or autopolars are enabled)
+
+    Parameters
+    ----------
+    conn : sql.connection.AbstractConnection
+        The current connection (for unqualified tables)
+
+    connections : dict
+        Connections by alias (ConnectionManager.connections)
+
+    Examples
+    --------
+    >>> run_statements(conn, "SELECT * FROM pg.orders JOIN lite.customers "
+    ...                "USING (customer_id)", config, connections)
+    """
+    check_installed(["duckdb", "pyarrow"], "--federate")
+
+    query, sources = plan(sql, conn, connections)
+    tables = {source.name: fetch(source) for source in sources}
+
+    connection = duckdb.connect()
+
+    try:
+        for name, table in tables.items():
+            connection.register(name, table)
+
+        connection.execute(query.sql(dialect="duckdb"))
+        table = connection.fetch_arrow_table()
+    finally:
+        connection.close()
+
+    result_set = ResultSet(ArrowCursor(table), config, sql, conn)
+    return select_df_type(result_set, config)
@@ -0,0 +1,221 @@
+"""
+Partitioned reads (ResultSet.DataFrame(partition_on=...) and %%sql
+--partition-on): split a query into ranges of a numeric or date column, run them
+concurrently (each one in its own connection from the pool, see
+AbstractConnection._map_concurrently), and concatenate the results as Arrow
+"""
+
+import datetime
+import math
+from decimal import Decimal
+from functools import partial
+
+import sqlglot
+from sqlglot import exp
+from ploomber_core.dependencies import check_installed
+
+from sql import ast_cache, exceptions
+from sql.connection.connection import _get_concurrent_queries
+from sql.run.columnar import ArrowResults, concat_tables
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+# number of rows fetched at a time in each partition
+FETCH_BATCH_SIZE = 10_000
+
+_SUBQUERY_ALIAS = "jupysql_partition"
+
+
+def _column(partition_on):
+    return exp.column(exp.to_identifier(partition_on))
+
+
+def _subquery(statement):
+    return f"({statement.strip().rstrip(';')}) AS {_SUBQUERY_ALIAS}"
+
+
+def _literal(value):
+    """Convert a boundary to a SQL literal"""
+    if isinstance(value, datetime.datetime):
+        return exp.cast(exp.Literal.string(value.isoformat(sep=" ")), "TIMESTAMP")
+
+    if isinstance(value, datetime.date):
+        return exp.cast(exp.Literal.string(value.isoformat()), "DATE")
+
+    return exp.Literal.number(value)
+
+
+def split_range(low, high, partitions):
+    """
+    Split the [low, high] range into (at most) the given number of partitions.
+    Returns a list of boundaries (the first is low and the last is high)
+    """
+    if low == high:
+        return [low, high]
+
+    if isinstance(low, datetime.datetime) or isinstance(low, datetime.date):
+        step = (high - low) / partitions
+
+        # dates can't be split in less than a day
+        if not isinstance(low, datetime.datetime):
+            step = datetime.timedelta(days=max(1, math.ceil(step.days)))
+    elif isinstance(low, int):
+        step = max(1, math.ceil((high - low) / partitions))
+    elif isinstance(low, (float, Decimal)):
+        step = (high - low) / partitions
+    else:
+        raise exceptions.UsageError(
+            f"Cannot partition on a column with values of type {type(low).__name__}, "
+            "the column must be numeric or a date"
+        )
+
+    boundaries = [low]
+
+    while len(boundaries) < partitions and boundaries[-1] + step < high:
+        boundaries.append(boundaries[-1] + step)
+
+    boundaries.append(high)
+    return boundaries
+
+
+def partition_queries(statement, partition_on, boundaries, dialect=None):
+    """
+    Return the queries that select each partition: one per range (the last one
+    includes the upper boundary) plus one for the rows where the column is NULL
+    """
+    column = _column(partition_on)
+    conditions = []
+
+    for i, (low, high) in enumerate(zip(boundaries, boundaries[1:])):
+        upper = exp.LTE if i == len(boundaries) - 2 else exp.LT
+        conditions.append(
+            exp.and_(
+                exp.GTE(this=column.copy(), expression=_literal(low)),
+                upper(this=column.copy(), expression=_literal(high)),
+            )
+        )
+
+    conditions.append(exp.Is(this=column.copy(), expression=exp.Null()))
+
+    return [
+        f"SELECT * FROM {_subquery(statement)} WHERE {condition.sql(dialect=dialect)}"
+        for condition in conditions
+    ]
+
+
+def _check_statement(statement, dialect):
+    try:
+        parsed = ast_cache.parse_one(statement, read=dialect, copy=False)
+    except sqlglot.errors.ParseError:
+        return
+
+    if parsed.args.get("limit") or parsed.args.get("offset"):
+        raise exceptions.UsageError(
+            "Cannot partition a query with LIMIT or OFFSET, since each partition "
+            "would select different rows"
+        )
+
+    if parsed.args.get("order"):
+        raise exceptions.UsageError(
+            "Cannot partition a query with ORDER BY, since the rows are returned "
+            "by partition. Remove it and sort the data frame instead"
+        )
+
+
+def _get_range(conn, statement, partition_on, dialect, parameters):
+    column = _column(partition_on).sql(dialect=dialect)
+    query = f"SELECT MIN({column}), MAX({column}) FROM {_subquery(statement)}"
+    return tuple(conn.raw_execute(query, parameters=parameters).fetchone())
+
+
+def _fetch_partition(conn, query, parameters=None):
+    result = conn.raw_execute(query, parameters=parameters)
+
+    if hasattr(result, "keys"):
+        keys = list(result.keys())
+    else:
+        keys = [description[0] for description in result.description]
+
+    results = ArrowResults(keys)
+
+    while True:
+        rows = result.fetchmany(FETCH_BATCH_SIZE)
+
+        if not rows:
+            break
+
+        results.extend(rows)
+
+    if not results.is_columnar:
+        raise exceptions.ValueError(
+            "Cannot read the partitions: the results can't be converted to Arrow "
+            "(e.g., a column mixes numbers and strings)"
+        )
+
+    return results.to_arrow()
+
+
+def read(conn, statement, partition_on, partitions=None, parameters=None):
+    """
+    Run the SELECT statement in partitions and return the results as a
+    pyarrow.Table. The rows are sorted by partition. If the connection can't run
+    queries concurrently (e.g., SQLite or DuckDB), the statement runs as is
+
+    Parameters
+    ----------
+    conn : sql.connection.AbstractConnection
+        The connection to use
+
+    partition_on : str
+        A numeric or date column (in the statement's results) to split the query
+
+    partitions : int, default None
+        Number of partitions, defaults to SqlMagic.concurrent_queries
+
+    parameters : dict, default None
+        Parameters to use in the query (:variable format)
+    """
+    check_installed(["pyarrow"], "partition_on")
+
+    partitions = partitions or _get_concurrent_queries()
+
+    if partitions < 1:
+        raise exceptions.UsageError("partitions must be a positive integer")
+
+    dialect = conn._get_sqlglot_dialect()
+    _check_statement(statement, dialect)
+
+    # the partitions would run one after the other, each one scanning the data
+    if not conn._supports_concurrency():
+        return _fetch_partition(
+            conn, f"SELECT * FROM {_subquery(statement)}", parameters
+        )
+
+    low, high = _get_range(conn, statement, partition_on, dialect, parameters)
+
+    # there are no rows, or all the values are NULL
+    if low is None:
+        return _fetch_partition(
+            conn, f"SELECT * FROM {_subquery(statement)}", parameters
+        )
+
+    boundaries = split_range(low, high, partitions)
+    queries = partition_queries(statement, partition_on, boundaries, dialect)
+    tables = conn._map_concurrently(
+        partial(_fetch_partition, parameters=parameters), queries
+    )
+
+    return concat_tables([table for table in tables if table.num_rows] or tables[:1])
+
+
+def to_data_frame(table, config):
+    """Convert the table to a pandas or polars (if autopolars) data frame"""
+    if config.autopolars:
+        import polars as pl
+
+        return pl.DataFrame(table, **config.polars_dataframe_kwargs)
+
+    return table.to_pandas()
@@ -1,20 +1,42 @@
 import re
 import operator
 from functools import reduce
+from itertools import islice
 from io import StringIO
 from html import unescape
 from collections.abc import Iterable
 
 import prettytable
 import warnings
+from ploomber_core.dependencies import check_installed
 
 from sql.column_guesser import ColumnGuesserMixin
 from sql.run.csv import CSVWriter, CSVResultDescriptor
 from sql.telemetry import telemetry
 from sql.run.table import CustomPrettyTable
+from sql.run.columnar import (
+    ArrowResults,
+    concat_tables,
+    get_column_kinds,
+    to_arrow_array,
+)
+from sql.run.cache import CachedCursor
+from sql.run import partition
 from sql._current import _config_feedback_all
 
-from sql.exceptions import RuntimeError
+from sql.exceptions import RuntimeError, ValueError
+from sql.parse import writes_data
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+# number of rows to fetch at a time when storing results in a columnar backend
+ARROW_FETCH_BATCH_SIZE = 10_000
+
+# default number of rows per batch when streaming results
+DEFAULT_BATCH_SIZE = 1_000
 
 
 class ResultSet(ColumnGuesserMixin):
@@ -23,25 +45,48 @@ class ResultSet(ColumnGuesserMixin):
     preview based on the current configuration)
     """
 
-    def __init__(self, sqlaproxy, config, statement=None, conn=None):
+    def __init__(
+        self,
+        sqlaproxy,
+        config,
+        statement=None,
+        conn=None,
+        prefetch=True,
+        unlimited_statement=None,
+    ):
         self._closed = False
         self._config = config
         self._statement = statement
+        # the statement before autolimit was pushed down, partitioned reads
+        # run it again without the LIMIT
+        self._unlimited_statement = unlimited_statement or statement
         self._sqlaproxy = sqlaproxy
         self._conn = conn
         self._dialect = conn._get_sqlglot_dialect()
         self._keys = None
         self._field_names = None
-        self._results = []
         # https://peps.python.org/pep-0249/#description
         self._is_dbapi_results = hasattr(sqlaproxy, "description")
 
         # note that calling this will fetch the keys
         self._pretty_table = self._init_table()
+        # the description might not be available once all rows are fetched
+        self._column_kinds = get_column_kinds(
+            sqlaproxy if self._is_dbapi_results else getattr(sqlaproxy, "cursor", None)
+        )
+        self._results = self._init_results()
 
         self._mark_fetching_as_done = False
-
-        if self._config.autolimit == 1:
+        self._consumed = False
+        # whether we've read rows from the cursor. native DuckDB converters
+        # (.df(), .pl()) only return the rows that haven't been fetched yet
+        self._fetched_from_cursor = False
+
+        if not prefetch:
+            # the caller converts the results right away (e.g., autopandas), so
+            # there's no need to fetch the rows for the preview
+            pass
+        elif self._config.autolimit == 1:
             # if autolimit is 1, we only want to fetch one row
             self.fetchmany(size=1)
             self._done_fetching()
@@ -54,11 +99,19 @@ class ResultSet(ColumnGuesserMixin):
 
         self._finished_init = True
 
-        if conn:
+        # results from the cache don't hold an open cursor in the connection
+        if conn and not self._is_cached:
             conn._result_sets.append(self)
 
+    @property
+    def _is_cached(self):
+        return isinstance(self._sqlaproxy, CachedCursor)
+
     @property
     def sqlaproxy(self):
+        if self._is_cached:
+            return self._sqlaproxy
+
         conn = self._conn
 
         # mssql with pyodbc does not support multiple open result sets, so we need
@@ -89,12 +142,25 @@ class ResultSet(ColumnGuesserMixin):
         ):
             self._sqlaproxy = self._conn.raw_execute(self._statement)
             self._sqlaproxy.fetchmany(size=len(self._results))
+            self._fetched_from_cursor = True
 
             # ensure we make his result set the last one
             self._conn._result_sets.append(self)
 
         return self._sqlaproxy
 
+    def _init_results(self):
+        """Initialize the container that stores the fetched rows"""
+        if self._config.result_backend == "arrow":
+            check_installed(["pyarrow"], 'SqlMagic.result_backend = "arrow"')
+            return ArrowResults(self.keys)
+
+        return []
+
+    @property
+    def _is_columnar(self):
+        return isinstance(self._results, ArrowResults) and self._results.is_columnar
+
     def _extend_results(self, elements):
         """Store the DB fetched results into the internal list of results"""
         to_add = self._config.displaylimit - len(self._results)
@@ -239,6 +305,10 @@ class ResultSet(ColumnGuesserMixin):
         """Returns a single dict built from the result set
 
         Keys are column names; values are a tuple"""
+        if self._is_columnar:
+            self.fetchall()
+            return dict(zip(self.keys, self._results.columns()))
+
         return dict(zip(self.keys, zip(*self)))
 
     def dicts(self):
@@ -247,21 +317,57 @@ class ResultSet(ColumnGuesserMixin):
             yield dict(zip(self.keys, row))
 
     @telemetry.log_call("data-frame", payload=True)
-    def DataFrame(self, payload):
-        """Returns a Pandas DataFrame instance built from the result set."""
+    def DataFrame(self, payload, partition_on=None, partitions=None):
+        """Returns a Pandas DataFrame instance built from the result set.
+
+        Pass ``partition_on`` (a numeric or date column) to run the query again
+        in ``partitions`` ranges of that column (concurrently if the connection
+        has a pool), which is faster for large results. Partitioned reads return
+        all the rows of the query, ``SqlMagic.autolimit`` doesn't apply to them
+        """
         payload["connection_info"] = self._conn._get_database_information()
         import pandas as pd
 
+        if partition_on is not None:
+            table = self._read_partitioned(partition_on, partitions)
+            return _arrow_to_data_frame(table, "df", pd.DataFrame, {})
+
         return _convert_to_data_frame(self, "df", pd.DataFrame)
 
     @telemetry.log_call("polars-data-frame")
-    def PolarsDataFrame(self, **polars_dataframe_kwargs):
-        """Returns a Polars DataFrame instance built from the result set."""
+    def PolarsDataFrame(
+        self, partition_on=None, partitions=None, **polars_dataframe_kwargs
+    ):
+        """Returns a Polars DataFrame instance built from the result set.
+
+        ``partition_on`` and ``partitions`` work as in ``DataFrame``
+        """
         import polars as pl
 
         polars_dataframe_kwargs["schema"] = self.keys
+
+        if partition_on is not None:
+            table = self._read_partitioned(partition_on, partitions)
+            return _arrow_to_data_frame(
+                table, "pl", pl.DataFrame, polars_dataframe_kwargs
+            )
+
         return _convert_to_data_frame(self, "pl", pl.DataFrame, polars_dataframe_kwargs)
 
+    def _read_partitioned(self, partition_on, partitions):
+        if self._conn is None or self._statement is None or self._is_cached:
+            raise RuntimeError(
+                "partition_on can only be used with results from a query "
+                "executed in a connection"
+            )
+
+        if partitions is not None and partitions < 1:
+            raise ValueError("partitions must be a positive integer")
+
+        return partition.read(
+            self._conn, self._unlimited_statement, partition_on, partitions
+        )
+
     @telemetry.log_call("pie")
     def pie(self, key_word_sep=" ", title=None, **kwargs):
         """Generates a pylab pie chart from the result set.
@@ -413,30 +519,145 @@ class ResultSet(ColumnGuesserMixin):
         else:
             return outfile.getvalue()
 
+    @telemetry.log_call("iter-batches")
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE, output="rows"):
+        """
+        Iterate over the results in batches. Batches are fetched from the database
+        as needed and are not stored in the result set, so this allows processing
+        results that do not fit in memory.
+
+        Once the iteration starts reading from the database, the result set is
+        consumed: it can still be displayed (showing the rows fetched for the
+        preview), but iterating over it or converting it to a data frame raises an
+        error.
+
+        Parameters
+        ----------
+        batch_size : int, default=1000
+            Maximum number of rows in each batch
+
+        output : {"rows", "pandas", "polars"}, default="rows"
+            Type of each batch: a list of rows, a pandas.DataFrame or a
+            polars.DataFrame
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+
+        converters = {
+            "rows": list,
+            "pandas": self._rows_to_pandas,
+            "polars": self._rows_to_polars,
+        }
+
+        if output not in converters:
+            raise ValueError(
+                f"{output!r} is not a valid output. "
+                "Valid options are: 'rows', 'pandas', and 'polars'"
+            )
+
+        self._raise_if_consumed()
+
+        convert = converters[output]
+        return (convert(batch) for batch in self._iter_rows_in_batches(batch_size))
+
+    def _rows_to_pandas(self, rows):
+        import pandas as pd
+
+        return pd.DataFrame.from_records(
+            [tuple(row) for row in rows], columns=self.keys
+        )
+
+    def _rows_to_polars(self, rows):
+        import polars as pl
+
+        return pl.DataFrame(
+            [tuple(row) for row in rows],
+            schema=self.keys,
+            orient="row",
+            **self._config.polars_dataframe_kwargs,
+        )
+
+    def _iter_rows_in_batches(self, batch_size):
+        if hasattr(self._sqlaproxy, "dataframe"):
+            # spark doesn't support cursors, so we start over from the first row
+            # and stream the partitions
+            pending, iterator = [], self._sqlaproxy.dataframe.toLocalIterator()
+
+            def fetch(size):
+                return list(islice(iterator, size))
+
+        else:
+            pending = list(self._results)
+            fetch = None
+
+        n_fetched = len(pending)
+        autolimit = self._config.autolimit
+        done = self._done_fetching() and fetch is None
+
+        if not done:
+            self._consumed = True
+
+            if fetch is None:
+                fetch = self.sqlaproxy.fetchmany
+
+        while True:
+            while not done and len(pending) < batch_size:
+                size = batch_size - len(pending)
+
+                if autolimit:
+                    size = min(size, autolimit - n_fetched)
+
+                if size <= 0:
+                    done = True
+                    break
+
+                returned = fetch(size=size)
+                n_fetched += len(returned)
+                pending.extend(returned)
+
+                if len(returned) < size:
+                    done = True
+
+            if not pending:
+                return
+
+            yield pending[:batch_size]
+            pending = pending[batch_size:]
+
+    def _raise_if_consumed(self):
+        if self._consumed:
+            raise RuntimeError(
+                "The results have already been consumed by .iter_batches(). "
+                "Re-run the query to fetch them again"
+            )
+
     def fetchmany(self, size):
         """Fetch n results and add it to the results"""
+        # the rows were streamed by iter_batches, nothing left to fetch
+        if self._consumed:
+            return
+
         if not self._done_fetching():
-            try:
-                returned = self.sqlaproxy.fetchmany(size=size)
-            # sqlite with sqlalchemy raises sqlalchemy.exc.ResourceClosedError,
-            # psycopg2 raises psycopg2.ProgrammingError error when running a script
-            # that doesn't return rows e.g, 'CREATE TABLE' but others don't
-            # (e.g., duckdb), so here we catch all
-            except Exception as e:
-                if not any(
-                    substring in str(e)
-                    for substring in [
-                        "This result object does not return rows",
-                        "no results to fetch",
-                    ]
-                ):
-                    # raise specific DB driver errors
-                    raise RuntimeError(f"Error running the query: {str(e)}") from e
+            autolimit = self._config.autolimit
+
+            # autolimit isn't always pushed to the database (e.g., queries with
+            # bind parameters), so we don't fetch past it
+            if autolimit and not hasattr(self._sqlaproxy, "dataframe"):
+                size = min(size, autolimit - len(self._results))
+
+                if size <= 0:
+                    self.mark_fetching_as_done()
+                    return
+
+            returned = self._fetch_from_cursor(size)
+
+            if returned is None:
                 self.mark_fetching_as_done()
                 return
+
             # spark doesn't support cursor
             if hasattr(self._sqlaproxy, "dataframe"):
-                self._results = []
+                self._results = self._init_results()
                 self._pretty_table.clear()
             self._extend_results(returned)
 
@@ -451,6 +672,9 @@ class ResultSet(ColumnGuesserMixin):
                 self.mark_fetching_as_done()
 
     def fetch_for_repr_if_needed(self):
+        if self._consumed:
+            return
+
         if self._config.displaylimit == 0:
             self.fetchall()
 
@@ -460,13 +684,63 @@ class ResultSet(ColumnGuesserMixin):
             self.fetchmany(missing)
 
     def fetchall(self):
+        self._raise_if_consumed()
+
         if not self._done_fetching():
-            if hasattr(self._sqlaproxy, "dataframe"):
-                self._results = []
+            is_spark = hasattr(self._sqlaproxy, "dataframe")
+            autolimit = self._config.autolimit
+
+            # fetch in batches so we never hold all rows as Python objects
+            if isinstance(self._results, ArrowResults) and not is_spark:
+                while not self._done_fetching():
+                    self.fetchmany(ARROW_FETCH_BATCH_SIZE)
+
+                return
+
+            if is_spark:
+                self._results = self._init_results()
                 self._pretty_table.clear()
-            self._extend_results(self.sqlaproxy.fetchall())
+
+            returned = self._fetch_from_cursor()
+
+            # autolimit isn't always pushed to the database (see fetchmany)
+            if returned is not None and autolimit and not is_spark:
+                returned = returned[: max(autolimit - len(self._results), 0)]
+
+            if returned is not None:
+                self._extend_results(returned)
+
             self.mark_fetching_as_done()
 
+    def _fetch_from_cursor(self, size=None):
+        """
+        Fetch rows from the cursor (all of them if size is None). Returns None if
+        the statement doesn't return rows
+        """
+        self._fetched_from_cursor = True
+
+        try:
+            if size is None:
+                return self.sqlaproxy.fetchall()
+
+            return self.sqlaproxy.fetchmany(size=size)
+        # sqlite with sqlalchemy raises sqlalchemy.exc.ResourceClosedError,
+        # psycopg2 raises psycopg2.ProgrammingError error when running a script
+        # that doesn't return rows e.g, 'CREATE TABLE' but others don't
+        # (e.g., duckdb), so here we catch all
+        except Exception as e:
+            if not any(
+                substring in str(e)
+                for substring in [
+                    "This result object does not return rows",
+                    "no results to fetch",
+                ]
+            ):
+                # raise specific DB driver errors
+                raise RuntimeError(f"Error running the query: {str(e)}") from e
+
+            return None
+
     def _init_table(self):
         pretty = CustomPrettyTable(self.field_names)
 
@@ -504,7 +778,19 @@ def _convert_to_data_frame(
     constructor_kwargs = constructor_kwargs or {}
 
     # maybe create accessors in the connection objects?
-    if result_set._conn.is_dbapi_connection:
+    if result_set._is_cached:
+        # results loaded from the disk cache are already a pyarrow.Table
+        if result_set.sqlaproxy.table is not None:
+            return _arrow_to_data_frame(
+                result_set.sqlaproxy.table,
+                converter_name,
+                constructor,
+                constructor_kwargs,
+            )
+
+        # the rows come from the cache, the connection has nothing to convert
+        native_connection = None
+    elif result_set._conn.is_dbapi_connection:
         native_connection = result_set.sqlaproxy
     elif hasattr(result_set.sqlaproxy, "dataframe"):
         return result_set.sqlaproxy.dataframe.toPandas()
@@ -515,13 +801,14 @@ def _convert_to_data_frame(
 
     # native duckdb connection
     if has_converter_method:
-        # we need to re-execute the statement because if we fetched some rows
-        # already, .df() will return None. But only if it's a select statement
-        # otherwise we might end up re-execute INSERT INTO or CREATE TABLE
-        # statements.
+        # we need to re-execute the statement if we fetched some rows already,
+        # since .df() only returns the rows that haven't been fetched. But only if
+        # it's a select statement otherwise we might end up re-execute INSERT INTO
+        # or CREATE TABLE statements. When the results are converted right away
+        # (e.g., autopandas), nothing has been fetched and we can skip this
         is_select = _statement_is_select(result_set._statement)
 
-        if is_select:
+        if is_select and result_set._fetched_from_cursor:
             # If command includes PIVOT, current transaction must be closed.
             # Otherwise, re-executing the statement will return
             # TransactionContext Error: cannot start a transaction within a transaction
@@ -533,17 +820,118 @@ def _convert_to_data_frame(
             native_connection.execute(result_set._statement)
 
         return getattr(native_connection, converter_name)()
-    else:
-        if converter_name == "df":
-            constructor_kwargs["columns"] = result_set.keys
+    elif isinstance(result_set._results, ArrowResults):
+        result_set.fetchall()
+
+        if result_set._is_columnar:
+            return _arrow_to_data_frame(
+                result_set._results.to_arrow(),
+                converter_name,
+                constructor,
+                constructor_kwargs,
+            )
 
-        frame = constructor(
-            (tuple(row) for row in result_set),
-            **constructor_kwargs,
-        )
+    frame = _rows_to_data_frame(result_set, converter_name)
 
+    if frame is not None:
         return frame
 
+    if converter_name == "df":
+        constructor_kwargs["columns"] = result_set.keys
+
+    frame = constructor(
+        (tuple(row) for row in result_set),
+        **constructor_kwargs,
+    )
+
+    return frame
+
+
+def _rows_to_data_frame(result_set, converter_name):
+    """
+    Convert the rows to a pandas data frame with pyarrow, a batch at a time as they
+    are fetched, so the columns get proper dtypes (e.g., float64 for numeric
+    columns with only NULLs). Decimal values are kept as Python objects so they
+    don't lose precision. Returns None if pyarrow isn't installed or the rows can't
+    be converted this way
+    """
+    keys = result_set.keys
+
+    if pa is None or not keys or converter_name != "df":
+        return None
+
+    result_set._raise_if_consumed()
+    kinds = result_set._column_kinds
+
+    if kinds is None or len(kinds) != len(keys):
+        kinds = [None] * len(keys)
+
+    def to_arrays(rows):
+        columns = list(zip(*rows)) or [()] * len(keys)
+        arrays = [to_arrow_array(values) for values in columns]
+        # columns that Arrow can't represent (e.g., mixed types) are objects
+        object_columns.update(idx for idx, array in enumerate(arrays) if array is None)
+        return arrays
+
+    batches, object_columns, converted = [], set(), 0
+
+    while True:
+        done = result_set._done_fetching()
+        rows = result_set._results[converted:]
+        converted += len(rows)
+
+        if rows:
+            batches.append(to_arrays(rows))
+
+        if done:
+            break
+
+        result_set.fetchmany(ARROW_FETCH_BATCH_SIZE)
+
+    if not batches:
+        batches.append(to_arrays([]))
+
+    import pandas as pd
+
+    names = result_set.field_names
+    typed = [idx for idx in range(len(keys)) if idx not in object_columns]
+
+    try:
+        table = concat_tables(
+            [
+                pa.Table.from_arrays(
+                    [arrays[idx] for idx in typed], names=[names[idx] for idx in typed]
+                )
+                for arrays in batches
+            ]
+        )
+
+        # type the columns with only NULLs once all the batches are read, a batch
+        # with only NULLs doesn't tell us the type of the rest (e.g., decimals)
+        for position, idx in enumerate(typed):
+            if pa.types.is_null(table.schema.types[position]):
+                values = to_arrow_array([None] * table.num_rows, kinds[idx])
+                table = table.set_column(position, names[idx], values)
+
+        frame = table.to_pandas() if typed else pd.DataFrame(index=range(converted))
+    # e.g., dates out of the range supported by pandas
+    except (pa.ArrowException, ValueError, OverflowError):
+        return None
+
+    for idx in sorted(object_columns):
+        values = [row[idx] for row in result_set._results]
+        frame.insert(idx, names[idx], pd.Series(values, dtype=object))
+
+    frame.columns = keys
+    return frame
+
+
+def _arrow_to_data_frame(table, converter_name, constructor, constructor_kwargs):
+    if converter_name == "df":
+        return table.to_pandas()
+    else:
+        return constructor(table, **constructor_kwargs)
+
 
 def _nonbreaking_spaces(match_obj):
     """
@@ -559,9 +947,6 @@ def _nonbreaking_spaces(match_obj):
 def _statement_is_select(statement):
     statement_ = statement.lower().strip()
     # duckdb also allows FROM without SELECT
-    return (
-        statement_.startswith("select")
-        or statement_.startswith("from")
-        or statement_.startswith("with")
-        or statement_.startswith("pivot")
+    return statement_.startswith(("select", "from", "with", "pivot")) and not (
+        writes_data(statement_)
     )
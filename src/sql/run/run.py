@@ -1,13 +1,35 @@
-import sqlparse
-
 from sql import exceptions, display
-from sql.run.resultset import ResultSet
+from sql.parse import split_statements
+from sql.run.resultset import ResultSet, _statement_is_select
 from sql.run.pgspecial import handle_postgres_special
+from sql.run import partition
+from sql.catalog import catalog_cache, statement_changes_catalog
+from sql.run.cache import CachedCursor, estimate_size, make_key, result_cache
+from sql.run.disk_cache import (
+    ArrowCursor,
+    DiskCache,
+    make_disk_key,
+    result_set_to_arrow,
+)
+
+# number of rows to fetch at a time when storing results in the cache
+CACHE_FETCH_BATCH_SIZE = 10_000
 
 
 # TODO: conn also has access to config, we should clean this up to provide a clean
 # way to access the config
-def run_statements(conn, sql, config, parameters=None):
+def run_statements(
+    conn,
+    sql,
+    config,
+    parameters=None,
+    stream=None,
+    yield_per=None,
+    cache=False,
+    timeout=None,
+    partition_on=None,
+    partitions=None,
+):
     """
     Run a SQL query (supports running multiple SQL statements) with the given
     connection. This is the function that's called when executing SQL magic.
@@ -23,6 +45,38 @@ def run_statements(conn, sql, config, parameters=None):
     config
         Configuration object
 
+    parameters : dict, default None
+        Parameters to use in the query (:variable format)
+
+    stream : int, default None
+        If passed, return an iterator that yields batches of (at most) this number
+        of rows instead of a ResultSet. Batches are pandas or polars data frames if
+        autopandas or autopolars are enabled
+
+    yield_per : int, default None
+        If passed, run SELECT statements with a server-side cursor that fetches
+        this number of rows at a time (only supported by SQLAlchemy connections).
+        Defaults to the stream batch size (if streaming) or config.yield_per
+
+    cache : bool, default False
+        If True, store the results of SELECT statements in config.cache_dir (as
+        Arrow files) and load them from there if the same query runs again (even
+        in a new session)
+
+    timeout : int, default None
+        Cancel each statement if it runs for longer than this number of seconds
+        (0 means no timeout). Defaults to config.statement_timeout
+
+    partition_on : str, default None
+        If passed, read the results of the last statement (if it's a SELECT) in
+        ranges of this numeric or date column, concurrently if the connection
+        supports it, and return a data frame (pandas, or polars if autopolars is
+        enabled). See sql.run.partition
+
+    partitions : int, default None
+        Number of partitions when passing partition_on. Defaults to
+        config.concurrent_queries
+
     Examples
     --------
 
@@ -32,15 +86,45 @@ def run_statements(conn, sql, config, parameters=None):
     if not sql.strip():
         return "Connected: %s" % conn.name
 
-    for statement in sqlparse.split(sql):
-        # strip all comments from sql
-        statement = sqlparse.format(statement, strip_comments=True)
-        # trailing comment after semicolon can be confused as its own statement,
-        # so we ignore it here.
-        if not statement:
-            continue
+    yield_per = yield_per or stream or config.yield_per
+    timeout = config.statement_timeout if timeout is None else timeout
+
+    # a single pass that splits the statements and strips the comments (trailing
+    # comments after a semicolon don't become statements), the statements carry
+    # what the connection needs to execute them without scanning them again
+    statements = split_statements(sql)
+
+    # partitioned reads return a data frame, so they skip the result caches
+    cache_key = (
+        get_cache_key(conn, statements, config, parameters, stream)
+        if partition_on is None
+        else None
+    )
+
+    if cache_key is not None:
+        entry = result_cache.get(cache_key, ttl=config.result_cache_ttl)
+
+        if entry is not None:
+            result_set = ResultSet(CachedCursor(entry), config, statements[-1], conn)
+            return select_df_type(result_set, config)
+
+    disk_cache_key = (
+        get_disk_cache_key(conn, statements, config, parameters, stream)
+        if cache and partition_on is None
+        else None
+    )
+
+    if disk_cache_key is not None:
+        disk_cache = DiskCache(config.cache_dir)
+        table = disk_cache.get(disk_cache_key)
+
+        if table is not None:
+            result_set = ResultSet(ArrowCursor(table), config, statements[-1], conn)
+            return select_df_type(result_set, config)
 
-        first_word = sql.strip().split()[0].lower()
+    for statement in statements:
+        first_word = statement.first_word
+        unlimited_statement = None
 
         if first_word == "begin":
             raise exceptions.RuntimeError("JupySQL does not support transactions")
@@ -51,7 +135,32 @@ def run_statements(conn, sql, config, parameters=None):
 
         # regular query
         else:
-            result = conn.raw_execute(statement, parameters=parameters)
+            # DDL and DML statements might change the results of cached queries
+            if not _statement_is_select(statement):
+                result_cache.invalidate(conn.alias)
+
+                if statement_changes_catalog(statement):
+                    catalog_cache.invalidate(conn.alias)
+            # the last SELECT is read in partitions instead
+            elif partition_on is not None and statement is statements[-1]:
+                table = partition.read(
+                    conn, statement, partition_on, partitions, parameters=parameters
+                )
+                return partition.to_data_frame(table, config)
+            # push autolimit to the database so it doesn't compute the full result
+            elif config.autolimit:
+                unlimited_statement = statement
+                statement = conn._add_limit(statement, config.autolimit)
+
+            # server-side cursors are only useful (and supported by some drivers
+            # such as psycopg2) for statements that return rows
+            with conn._cancel_on_timeout(timeout):
+                result = conn.raw_execute(
+                    statement,
+                    parameters=parameters,
+                    yield_per=yield_per if _statement_is_select(statement) else None,
+                )
+
             if is_spark(conn.dialect) and config.lazy_execution:
                 return result.dataframe
 
@@ -62,7 +171,32 @@ def run_statements(conn, sql, config, parameters=None):
             ):
                 display.message_success(f"{result.rowcount} rows affected.")
 
-    result_set = ResultSet(result, config, statement, conn)
+    # if we're returning a data frame, we don't need to fetch rows for the preview.
+    # this also allows native DuckDB connections to convert the results of this
+    # execution (via .df() or .pl()) instead of running the query again
+    prefetch = bool(stream) or not (config.autopandas or config.autopolars)
+    result_set = ResultSet(
+        result,
+        config,
+        statement,
+        conn,
+        prefetch=prefetch,
+        unlimited_statement=unlimited_statement,
+    )
+
+    if cache_key is not None:
+        result_set = cache_results(result_set, cache_key, config)
+
+    if disk_cache_key is not None:
+        result_set = cache_results_on_disk(
+            result_set, disk_cache, disk_cache_key, config
+        )
+
+    if stream:
+        return result_set.iter_batches(
+            batch_size=stream, output=select_batch_output(config)
+        )
+
     return select_df_type(result_set, config)
 
 
@@ -75,6 +209,105 @@ def is_spark(dialect):
     return "spark" in str(dialect)
 
 
+def is_cacheable(conn, statements, stream=None):
+    """
+    Checks if the results of the statements can be cached (we're not streaming,
+    and all statements are SELECT)
+    """
+    return (
+        not stream
+        and not is_spark(conn.dialect)
+        and bool(statements)
+        and all(_statement_is_select(statement) for statement in statements)
+    )
+
+
+def get_cache_key(conn, statements, config, parameters=None, stream=None):
+    """
+    Returns the key to store the results in the cache, or None if the results
+    should not be cached
+    """
+    if not config.result_cache or not is_cacheable(conn, statements, stream):
+        return None
+
+    return make_key(conn.alias, statements, parameters, config.autolimit)
+
+
+def get_disk_cache_key(conn, statements, config, parameters=None, stream=None):
+    """
+    Returns the key to store the results in the disk cache, or None if the results
+    should not be cached
+    """
+    if stream:
+        display.message_warning("Skipping --cache: streamed results are not cached")
+        return None
+
+    if not is_cacheable(conn, statements):
+        display.message_warning(
+            "Skipping --cache: only the results of SELECT statements are cached"
+        )
+        return None
+
+    return make_disk_key(conn, statements, parameters, config.autolimit)
+
+
+def cache_results(result_set, key, config):
+    """
+    Fetches all the rows and stores them in the cache. Returns a ResultSet that
+    reads from the cache, or the original one if the rows exceed the memory budget
+    """
+    max_size = config.result_cache_max_memory * 1024 * 1024
+
+    while not result_set._done_fetching():
+        result_set.fetchmany(CACHE_FETCH_BATCH_SIZE)
+
+        if estimate_size(result_set._results) > max_size:
+            return result_set
+
+    rows = [tuple(row) for row in result_set._results]
+    entry = result_cache.put(key, result_set.keys, rows, estimate_size(rows), max_size)
+
+    if entry is None:
+        return result_set
+
+    return ResultSet(
+        CachedCursor(entry), config, result_set._statement, result_set._conn
+    )
+
+
+def cache_results_on_disk(result_set, disk_cache, key, config):
+    """
+    Fetches all the rows and stores them in the disk cache. Returns a ResultSet that
+    reads from the stored table, or the original one if the rows can't be stored
+    """
+    table = result_set_to_arrow(result_set)
+
+    if table is None:
+        display.message_warning(
+            "Skipping --cache: the results contain columns with mixed data types"
+        )
+        return result_set
+
+    disk_cache.put(key, table)
+
+    return ResultSet(
+        ArrowCursor(table), config, result_set._statement, result_set._conn
+    )
+
+
+def select_batch_output(config):
+    """
+    Returns the type of batches to yield when streaming based on the config
+    settings.
+    """
+    if config.autopandas:
+        return "pandas"
+    elif config.autopolars:
+        return "polars"
+    else:
+        return "rows"
+
+
 def select_df_type(resultset, config):
     """
     Converts the input resultset to either a Pandas DataFrame
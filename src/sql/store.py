@@ -1,7 +1,6 @@
 import sqlparse
 from typing import Iterator, Iterable
 from collections.abc import MutableMapping
-from jinja2 import Template
 from ploomber_core.exceptions import modify_exceptions
 import sql.connection
 import difflib
@@ -39,8 +38,18 @@ class SQLStore(MutableMapping):
 
     def __init__(self):
         self._data = dict()
+        # dependency graph: snippet -> snippets it uses (forward edges) and
+        # snippet -> snippets that use it (reverse edges)
+        self._dependencies = dict()
+        self._dependents = dict()
+        # memoized results, invalidated when a snippet or its upstream changes:
+        # snippet -> all its dependencies, and (snippet, quote) -> rendered CTE
+        self._closures = dict()
+        self._ctes = dict()
 
     def __setitem__(self, key: str, value: str) -> None:
+        self._invalidate(key)
+        self._set_dependencies(key, getattr(value, "_with_", ()))
         self._data[key] = value
 
     def __getitem__(self, key) -> str:
@@ -62,17 +71,114 @@ class SQLStore(MutableMapping):
         return len(self._data)
 
     def __delitem__(self, key: str) -> None:
+        self._invalidate(key)
+        # snippets that use key keep their edges to it, so rendering them still
+        # fails with an invalid identifier error (see remove_dependency)
+        self._set_dependencies(key, ())
         del self._data[key]
 
+    def _set_dependencies(self, key, with_):
+        for dependency in self._dependencies.pop(key, ()):
+            self._dependents[dependency].discard(key)
+
+        if with_:
+            self._dependencies[key] = tuple(with_)
+
+            for dependency in with_:
+                self._dependents.setdefault(dependency, set()).add(key)
+
+    def _invalidate(self, key):
+        """Remove the memoized results of key and of the snippets that use it"""
+        for affected in [key] + self.get_dependents(key):
+            self._closures.pop(affected, None)
+            self._ctes.pop((affected, "`"), None)
+            self._ctes.pop((affected, ""), None)
+
+    def _find_cycle(self, key, with_):
+        """
+        Return the path from key back to itself if storing key with the given
+        dependencies creates a cycle, None otherwise
+        """
+        parents = {}
+        pending = [dependency for dependency in with_ if dependency != key]
+
+        for dependency in pending:
+            parents.setdefault(dependency, key)
+
+        while pending:
+            current = pending.pop()
+
+            for dependency in self._dependencies.get(current, ()):
+                if dependency == key:
+                    path = [current]
+
+                    while path[-1] != key:
+                        path.append(parents[path[-1]])
+
+                    return [key] + path[::-1][1:] + [key]
+
+                if dependency not in parents:
+                    parents[dependency] = current
+                    pending.append(dependency)
+
+        return None
+
+    def get_dependencies(self, key):
+        """
+        Return the snippets needed to render key (its dependencies, their
+        dependencies, and so on), in the order the CTEs must appear
+        """
+        if key not in self._closures:
+            # raises an error if key isn't a stored snippet
+            self[key]
+
+            dependencies = []
+
+            for dependency in self._dependencies.get(key, ()):
+                dependencies.extend(self.get_dependencies(dependency))
+
+            dependencies.extend(self._dependencies.get(key, ()))
+            self._closures[key] = tuple(dict.fromkeys(dependencies))
+
+        return list(self._closures[key])
+
+    def get_dependents(self, key):
+        """Return the stored snippets that use key (directly or indirectly)"""
+        found = set()
+        pending = [key]
+
+        while pending:
+            for dependent in self._dependents.get(pending.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+
+        found.discard(key)
+        # same order as the snippets were stored
+        return [snippet for snippet in self._data if snippet in found]
+
+    def remove_dependency(self, key, dependency):
+        """Remove dependency from the snippets key uses"""
+        query = self[key]
+        query.remove_snippet_dependency(dependency)
+        self._invalidate(key)
+        self._set_dependencies(key, query._with_)
+
+    def render_cte(self, key, quote=""):
+        """Render the CTE for key (e.g., name AS (query)), memoized"""
+        if (key, quote) not in self._ctes:
+            query = _remove_trailing_semicolon(self[key]._query)
+            self._ctes[(key, quote)] = f"{quote}{key}{quote} AS ({query})"
+
+        return self._ctes[(key, quote)]
+
     def render(self, query, with_=None):
         # TODO: if with is false, WITH should not appear
         return SQLQuery(self, query, with_)
 
     def infer_dependencies(self, query, key):
         dependencies = []
-        saved_keys = [
-            saved_key for saved_key in list(self._data.keys()) if saved_key != key
-        ]
+        saved_keys = set(self._data) - {key}
         if saved_keys and query:
             tables = util.extract_tables_from_query(query)
             for table in tables:
@@ -91,11 +197,20 @@ class SQLStore(MutableMapping):
             raise exceptions.UsageError(
                 f"Script name ({key!r}) cannot appear in with_ argument"
             )
+
+        cycle = self._find_cycle(key, with_ or ())
+
+        if cycle:
+            raise exceptions.UsageError(
+                f"Cannot save {key!r}, it would create a circular dependency "
+                f"between snippets: {' -> '.join(cycle)}"
+            )
+
         # We need to strip comments before storing else the comments
         # are added within brackets as part of the CTE query, which
         # causes the query to fail
         query = sqlparse.format(query, strip_comments=True)
-        self._data[key] = SQLQuery(self, query, with_)
+        self[key] = SQLQuery(self, query, with_)
 
 
 class SQLQuery:
@@ -119,31 +234,18 @@ class SQLQuery:
         We use the ' (backtick symbol) to wrap the CTE alias if the dialect supports
         ` (backtick)
         """
-        with_clause_template = Template(
-            """WITH{% for name in with_ %} {{name}} AS ({{rts(saved[name]._query)}})\
-{{ "," if not loop.last }}{% endfor %}{{query}}"""
-        )
-
-        with_clause_template_backtick = Template(
-            """WITH{% for name in with_ %} `{{name}}` AS ({{rts(saved[name]._query)}})\
-{{ "," if not loop.last }}{% endfor %}{{query}}"""
-        )
-        is_use_backtick = (
-            sql.connection.ConnectionManager.current.is_use_backtick_template()
-        )
         with_all = _get_dependencies(self._store, self._with_)
-        template = (
-            with_clause_template_backtick if is_use_backtick else with_clause_template
-        )
+
         # return query without 'with' when no dependency exists
         if len(with_all) == 0:
             return self._query.strip()
-        return template.render(
-            query=self._query,
-            saved=self._store._data,
-            with_=with_all,
-            rts=_remove_trailing_semicolon,
+
+        is_use_backtick = (
+            sql.connection.ConnectionManager.current.is_use_backtick_template()
         )
+        quote = "`" if is_use_backtick else ""
+        ctes = ", ".join(self._store.render_cte(key, quote) for key in with_all)
+        return f"WITH {ctes}{self._query}"
 
     def remove_snippet_dependency(self, snippet):
         if snippet in self._with_:
@@ -158,30 +260,18 @@ def _remove_trailing_semicolon(query):
 def _get_dependencies(store, keys):
     """Get a list of all dependencies to reconstruct the CTEs in keys"""
     # get the dependencies for each key
-    deps = _flatten([_get_dependencies_for_key(store, key) for key in keys])
+    deps = _flatten([store.get_dependencies(key) for key in keys])
     # remove duplicates but preserve order
     return list(dict.fromkeys(deps + keys))
 
 
-def _get_dependencies_for_key(store, key):
-    """Retrieve dependencies for a single key"""
-    deps = store[key]._with_
-    deps_of_deps = _flatten([_get_dependencies_for_key(store, dep) for dep in deps])
-    return deps_of_deps + deps
-
-
 def _flatten(elements):
     """Flatten a list of lists"""
     return [element for sub in elements for element in sub]
 
 
 def get_dependents_for_key(store, key):
-    key_dependents = []
-    for k in list(store):
-        deps = _get_dependencies_for_key(store, k)
-        if key in deps:
-            key_dependents.append(k)
-    return key_dependents
+    return store.get_dependents(key)
 
 
 def get_all_keys():
@@ -1,15 +1,17 @@
 import warnings
 import difflib
-from sql import exceptions, display
+from sql import ast_cache, exceptions, display
 import json
 from pathlib import Path
-from sqlglot import parse_one, exp
+from sqlglot import exp
 from sqlglot.errors import ParseError
 from sqlalchemy.exc import SQLAlchemyError
 from ploomber_core.dependencies import requires
 import ast
 from os.path import isfile
 import re
+from collections import ChainMap
+from functools import lru_cache
 
 from jinja2 import Template
 
@@ -22,6 +24,12 @@ except ModuleNotFoundError:
 SINGLE_QUOTE = "'"
 DOUBLE_QUOTE = '"'
 
+# maximum number of compiled Jinja templates to keep (see render_template)
+TEMPLATE_CACHE_SIZE = 256
+
+# a string without these is rendered as is (except for newlines, see _render_plain)
+_TEMPLATE_MARKERS = ("{{", "{%", "{#")
+
 CONFIGURATION_DOCS_STR = "https://jupysql.ploomber.io/en/latest/api/configuration.html#loading-from-a-file"  # noqa
 
 
@@ -532,7 +540,7 @@ def extract_tables_from_query(query):
     try:
         tables = [
             table.name
-            for table in parse_one(query).find_all(exp.Table)
+            for table in ast_cache.parse_one(query, copy=False).find_all(exp.Table)
             if hasattr(table, "name")
         ]
         return tables
@@ -596,6 +604,52 @@ def is_rendering_required(line):
     return "{{" in line and "}}" in line
 
 
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile_template(source):
+    return Template(source)
+
+
+def _render_plain(source):
+    """
+    Return what Jinja renders for a string without template markers: newlines are
+    normalized to \\n and a single trailing newline is removed
+    """
+    if "\r" in source:
+        source = source.replace("\r\n", "\n").replace("\r", "\n")
+
+    return source[:-1] if source.endswith("\n") else source
+
+
+def render_template(source, namespace):
+    """
+    Render a Jinja template with the variables in namespace (any mapping, e.g., a
+    ChainMap). Unlike Template.render, the namespace isn't copied into a new dict,
+    variables are looked up in it as the template uses them. Strings without
+    template markers skip Jinja, and compiled templates are cached, so running
+    the same cell repeatedly (e.g., in a loop) doesn't compile it again
+
+    Parameters
+    ----------
+    source : str,
+        Template to render
+
+    namespace : mapping,
+        Variables available in the template
+    """
+    if not any(marker in source for marker in _TEMPLATE_MARKERS):
+        return _render_plain(source)
+
+    template = _compile_template(source)
+    # Template.render would call dict(namespace) and merge it with the globals,
+    # a shared context keeps a reference to the namespace instead
+    context = template.new_context(ChainMap(namespace, template.globals), shared=True)
+
+    try:
+        return template.environment.concat(template.root_render_func(context))
+    except Exception:
+        template.environment.handle_exception()
+
+
 def render_string_using_namespace(value, user_ns):
     """
     Function to substitute command line arguments
@@ -612,7 +666,7 @@ def render_string_using_namespace(value, user_ns):
     """
 
     if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
-        return Template(value).render(user_ns)
+        return render_template(value, user_ns)
     return value
 
 
@@ -55,7 +55,8 @@ function sortColumnClick(element, column, order, callback) {
         rowsPerPage : parseInt(rowsPerPage),
         page : parseInt(currrPage),
         sort : sort,
-        table : table.getAttribute("table-name")
+        table : table.getAttribute("table-name"),
+        alias : table.getAttribute("connection-alias")
     }
 
     fetchTableData(fetchParameters, callback)
@@ -66,7 +67,8 @@ function fetchTableData(fetchParameters, callback) {
     sendObject = {
         'nRows' : fetchParameters.rowsPerPage,
         'page': fetchParameters.page,
-        'table' : fetchParameters.table
+        'table' : fetchParameters.table,
+        'alias' : fetchParameters.alias
     }
 
     if (fetchParameters.sort) {
@@ -83,6 +85,7 @@ function fetchTableData(fetchParameters, callback) {
         comm.send(sendObject)
         comm.on_msg(function(msg) {
             const rows = JSON.parse(msg.content.data['rows']);
+            updateRowCount(fetchParameters, msg.content.data['nTotal']);
             if (callback) {
                 callback(rows)
             }
@@ -95,6 +98,7 @@ function fetchTableData(fetchParameters, callback) {
     
         document.addEventListener('onTableWidgetRowsReady', (customEvent) => {
             const rows = JSON.parse(customEvent.detail.data.rows)
+            updateRowCount(fetchParameters, customEvent.detail.data.nTotal)
             controller.abort()
             if (callback) {
                 callback(rows)
@@ -106,6 +110,25 @@ function fetchTableData(fetchParameters, callback) {
 }
 
 
+function updateRowCount(fetchParameters, nTotal) {
+    // the kernel sends the number of rows once it's counted (it's
+    // initially estimated for large tables)
+    if (nTotal === undefined) {
+        return;
+    }
+
+    document.querySelectorAll(".table-container table").forEach(table => {
+        if (table.getAttribute("table-name") === fetchParameters.table &&
+            table.getAttribute("connection-alias") === fetchParameters.alias) {
+            const rowsPerPage = parseInt(table.getAttribute("rows-per-page"));
+            table.setAttribute("n-total", nTotal);
+            table.setAttribute("n-total-approximate", false);
+            table.setAttribute("max-pages", Math.ceil(nTotal / rowsPerPage));
+        }
+    });
+}
+
+
 function dispatchEventToKernel(data) {
     let customEvent = new CustomEvent('onUpdateTableWidget', {
     bubbles: true,
@@ -132,7 +155,8 @@ function handleRowsNumberOfRowsChange(e) {
         rowsPerPage : rowsPerPage,
         page : 0,
         sort : getSortDetails(),
-        table : table.getAttribute("table-name")
+        table : table.getAttribute("table-name"),
+        alias : table.getAttribute("connection-alias")
     }
 
     setTimeout(() => {
@@ -203,7 +227,8 @@ function nextPageClick(element) {
             rowsPerPage : rowsPerPage,
             page : nextPage,
             sort : getSortDetails(),
-            table : table.getAttribute("table-name")
+            table : table.getAttribute("table-name"),
+            alias : table.getAttribute("connection-alias")
         }
 
         fetchTableData(fetchParameters, (rows) => {
@@ -223,7 +248,8 @@ function prevPageClick() {
             rowsPerPage : rowsPerPage,
             page : prevPage,
             sort : getSortDetails(),
-            table : table.getAttribute("table-name")
+            table : table.getAttribute("table-name"),
+            alias : table.getAttribute("connection-alias")
         }
 
         fetchTableData(fetchParameters, (rows) => {
@@ -243,7 +269,8 @@ function setPageButton(table, label, navigateTo, isSelected) {
                 rowsPerPage : ${rowsPerPage},
                 page : ${navigateTo},
                 sort : getSortDetails(),
-                table : getTable(this).getAttribute('table-name')
+                table : getTable(this).getAttribute('table-name'),
+                alias : getTable(this).getAttribute('connection-alias')
             },
             (rows) => {
                 showTablePage(${navigateTo}, ${rowsPerPage}, rows);
@@ -321,8 +348,12 @@ function updatePaginationBar(table, currPage) {
 
     selected = currPage === maxPages - 1 ? "selected" : "";
 
+    // the number of rows might be an estimate
+    const approximate = table.getAttribute("n-total-approximate") === "true";
+    const lastLabel = approximate ? `~${maxPages}` : maxPages;
+
     buttonsArray.
-    push(setPageButton(table, maxPages, maxPages - 1, selected))
+    push(setPageButton(table, lastLabel, maxPages - 1, selected))
 
     const buttonsHtml = buttonsArray.join("");
     table.parentNode
@@ -341,7 +372,9 @@ function initTable() {
     const rowsPerPage={{rows_per_page}};
     const nPages={{n_pages}};
     const nTotal={{n_total}};
+    const nTotalApproximate={{n_total_approximate | tojson}};
     const tableName="{{table_name}}";
+    const connectionAlias={{connection_alias | tojson}};
     const tableContainerId = "{{table_container_id}}";
     const options = [10, 25, 50, 100];
     options_html =
@@ -367,7 +400,9 @@ function initTable() {
         rows-per-page=${rowsPerPage}
         max-pages = ${nPages}
         n-total=${nTotal}
+        n-total-approximate=${nTotalApproximate}
         table-name=${tableName}
+        connection-alias="${connectionAlias}"
     >
         <thead>
             <tr>
@@ -404,7 +439,8 @@ function initTable() {
                 rowsPerPage : rowsPerPage,
                 page : 0,
                 sort : getSortDetails(),
-                table : tableName
+                table : tableName,
+                alias : connectionAlias
             }
 
             fetchTableData(fetchParameters, (rows) => {
@@ -0,0 +1,281 @@
+"""
+Fetches the pages displayed by the TableWidget
+"""
+
+import math
+from collections import OrderedDict
+from decimal import Decimal
+
+import sqlglot
+
+from sql import catalog
+from sql.connection import ConnectionManager
+from sql.inspect import fetch_sql_with_pagination
+
+# maximum number of pages to keep in memory (per table)
+PAGE_CACHE_SIZE = 20
+
+# number of pages fetched after the requested one (in the same query)
+PREFETCH_PAGES = 1
+
+
+def _is_literal(value):
+    """Check if a key value can be safely embedded in the query as a literal"""
+    if isinstance(value, bool):
+        return False
+
+    if isinstance(value, float):
+        return math.isfinite(value)
+
+    return isinstance(value, (int, str, Decimal))
+
+
+class TablePaginator:
+    """
+    Fetches pages of a table. When the table has a primary key, pages are
+    fetched using keyset (seek) pagination: instead of skipping rows with OFFSET,
+    it filters the rows that come after the last row of the previous page, so
+    fetching a page takes the same time regardless of its position. Pages near
+    the end of the table are fetched in reverse order.
+
+    The table columns are fetched once, fetched pages are cached, and the pages
+    after the requested one are fetched in the same query.
+
+    Parameters
+    ----------
+    table : str
+        Table name
+
+    schema : str, default None
+        Schema name
+
+    rows_per_page : int, default 10
+        Number of rows per page
+
+    n_total : int, default None
+        Number of rows in the table, used to fetch the last pages in reverse order
+
+    conn : connection, default None
+        Database connection. If None, it uses the current connection
+    """
+
+    def __init__(self, table, schema=None, rows_per_page=10, n_total=None, conn=None):
+        self.conn = conn or ConnectionManager.current
+        self.table = f"{schema}.{table}" if schema else table
+        self.rows_per_page = rows_per_page
+        self.n_total = n_total
+
+        result = self.conn.raw_execute(f"SELECT * FROM {self.table} WHERE 1=0")
+
+        if self.conn.is_dbapi_connection:
+            self.columns = [column[0] for column in result.description]
+        else:
+            self.columns = list(result.keys())
+
+        self._dialect = self.conn._get_sqlglot_dialect()
+        self._primary_key, self._not_null = self._reflect_keys(table, schema)
+
+        try:
+            self._select = sqlglot.parse_one(
+                f"SELECT * FROM {self.table}", read=self._dialect
+            )
+        except sqlglot.errors.ParseError:
+            self._select = None
+
+        self._sort = None
+        self._pages = OrderedDict()
+        # last key of each page (for the current sort)
+        self._boundaries = dict()
+
+    def _reflect_keys(self, table, schema):
+        """
+        Return the primary key columns, and the columns that cannot be NULL
+        (empty if they cannot be retrieved)
+        """
+        if self.conn.is_dbapi_connection:
+            return [], set()
+
+        try:
+            primary_key = catalog.get_primary_key(self.conn, table, schema=schema)
+        except Exception:
+            return [], set()
+
+        if not set(primary_key) <= set(self.columns):
+            return [], set()
+
+        not_null = set(primary_key)
+
+        try:
+            not_null.update(
+                column["name"]
+                for column in catalog.get_columns(self.conn, table, schema=schema)
+                if not column["nullable"]
+            )
+        except Exception:
+            pass
+
+        return primary_key, not_null
+
+    def _key_columns(self, sort_column):
+        """
+        Return the columns that uniquely identify the position of a row with the
+        given sort column, or None if keyset pagination cannot be used (no primary
+        key, or the sort column contains NULLs)
+        """
+        if not self._primary_key or self._select is None:
+            return None
+
+        if sort_column is None:
+            return list(self._primary_key)
+
+        if sort_column not in self._not_null:
+            return None
+
+        return [sort_column] + [
+            column for column in self._primary_key if column != sort_column
+        ]
+
+    def fetch_page(self, page, sort_column=None, sort_order=None):
+        """Return the rows in the given page (0-indexed)"""
+        sort_order = (sort_order or "ASC").upper()
+        sort = (sort_column, sort_order) if sort_column else None
+
+        if sort != self._sort:
+            self._sort = sort
+            self._pages.clear()
+            self._boundaries.clear()
+
+        if page not in self._pages:
+            self._fetch_pages(page, sort_column, sort_order)
+
+        self._pages.move_to_end(page)
+        return self._pages[page]
+
+    def _fetch_pages(self, page, sort_column, sort_order):
+        key_columns = self._key_columns(sort_column)
+
+        if self._select is None:
+            rows, _ = fetch_sql_with_pagination(
+                self.table,
+                page * self.rows_per_page,
+                self.rows_per_page * (1 + PREFETCH_PAGES),
+                sort_column=sort_column,
+                sort_order=sort_order,
+            )
+            self._store_pages(page, rows, key_columns)
+            return
+
+        descending = sort_order == "DESC"
+        order_by = (
+            [(column, descending) for column in key_columns]
+            if key_columns
+            else [(sort_column, descending)] if sort_column else []
+        )
+
+        # find the closest page before the requested one whose last key we know
+        boundary_page, boundary_key = -1, None
+
+        if key_columns:
+            for known_page, key in self._boundaries.items():
+                if boundary_page < known_page < page:
+                    boundary_page, boundary_key = known_page, key
+
+        offset = (page - 1 - boundary_page) * self.rows_per_page
+        n_rows = self.rows_per_page * (1 + PREFETCH_PAGES)
+
+        # pages near the end are fetched by reversing the order, including the
+        # previous pages instead of the next ones
+        if self.n_total is not None and order_by:
+            start = max(page - PREFETCH_PAGES, 0)
+            end = min((page + 1) * self.rows_per_page, self.n_total)
+            offset_reverse = self.n_total - end
+
+            if offset_reverse < offset and end > start * self.rows_per_page:
+                order_by_reverse = [
+                    (column, not descending_) for column, descending_ in order_by
+                ]
+                rows = self._execute(
+                    order_by_reverse,
+                    offset=offset_reverse,
+                    limit=end - start * self.rows_per_page,
+                )
+                self._store_pages(start, rows[::-1], key_columns)
+                return
+
+        condition = (
+            self._seek_condition(key_columns, boundary_key, descending)
+            if boundary_key is not None
+            else None
+        )
+        rows = self._execute(order_by, offset=offset, limit=n_rows, where=condition)
+        self._store_pages(page, rows, key_columns)
+
+    def _store_pages(self, first_page, rows, key_columns):
+        if key_columns:
+            indexes = [self.columns.index(column) for column in key_columns]
+
+        for i in range(1 + PREFETCH_PAGES):
+            page_rows = rows[i * self.rows_per_page : (i + 1) * self.rows_per_page]
+
+            # store the requested page even if empty, but only full pages after it
+            if i and not page_rows:
+                break
+
+            page = first_page + i
+            self._pages[page] = page_rows
+            self._pages.move_to_end(page)
+
+            if key_columns and len(page_rows) == self.rows_per_page:
+                key = tuple(page_rows[-1][index] for index in indexes)
+
+                if all(_is_literal(value) for value in key):
+                    self._boundaries[page] = key
+
+        while len(self._pages) > PAGE_CACHE_SIZE:
+            self._pages.popitem(last=False)
+
+    def _seek_condition(self, key_columns, key, descending):
+        """
+        Build the condition to get the rows after the given key, e.g.
+        a > 1 OR (a = 1 AND b > 2)
+        """
+        compare = sqlglot.exp.LT if descending else sqlglot.exp.GT
+        disjuncts, equals = [], []
+
+        for column, value in zip(key_columns, key):
+            identifier = sqlglot.exp.column(sqlglot.exp.to_identifier(column))
+            literal = sqlglot.exp.convert(value)
+            disjuncts.append(
+                sqlglot.exp.and_(
+                    *equals, compare(this=identifier.copy(), expression=literal)
+                )
+            )
+            equals.append(
+                sqlglot.exp.EQ(this=identifier.copy(), expression=literal.copy())
+            )
+
+        return sqlglot.exp.or_(*disjuncts)
+
+    def _execute(self, order_by, offset, limit, where=None):
+        query = self._select.copy()
+
+        if where is not None:
+            query = query.where(where)
+
+        if order_by:
+            query = query.order_by(
+                *(
+                    sqlglot.exp.Ordered(
+                        this=sqlglot.exp.column(sqlglot.exp.to_identifier(column)),
+                        desc=descending,
+                    )
+                    for column, descending in order_by
+                )
+            )
+
+        query = query.limit(limit)
+
+        if offset:
+            query = query.offset(offset)
+
+        return self.conn.raw_execute(query.sql(dialect=self._dialect)).fetchall()
@@ -1,10 +1,14 @@
+from sql.catalog import catalog_cache
 from sql.connection import ConnectionManager
 from IPython import get_ipython
 import math
+import threading
 import time
 from sql.util import parse_sql_results_to_json
-from sql.inspect import fetch_sql_with_pagination, is_table_exists
+from sql.inspect import estimate_row_count, is_table_exists
 from sql.widgets import utils
+from sql.widgets.table_widget.pagination import TablePaginator
+from sql.run.cache import result_cache
 from sql.telemetry import telemetry
 
 import os
@@ -13,10 +17,47 @@ from ploomber_core.dependencies import check_installed
 # Widget base dir
 BASE_DIR = os.path.dirname(__file__)
 
+# paginators of the created widgets, by (connection alias, schema, table) (the
+# comm target is shared by all widgets, so we use the connection alias and table
+# name sent by the frontend to find it)
+_paginators = dict()
+
+# exact number of rows, by (connection alias, schema, table)
+_row_counts = dict()
+
+
+def _get_key(alias, table_name):
+    schema, _, table = table_name.rpartition(".")
+    return alias, schema or None, table
+
+
+def _forget_tables(alias):
+    """
+    Remove the paginators (and their cached pages) and row counts of the tables
+    in the connection (all connections if alias is None), since the data might
+    have changed
+    """
+    for cache in (_paginators, _row_counts):
+        for key in [key for key in cache if alias is None or key[0] == alias]:
+            del cache[key]
+
+
+result_cache.add_invalidation_listener(_forget_tables)
+catalog_cache.add_invalidation_listener(_forget_tables)
+
+
+def _can_count_in_background(conn):
+    """
+    Check if the rows can be counted in another connection: DBAPI connections
+    can't open one, and other connections to some databases (e.g., in-memory
+    SQLite and DuckDB) see a different, empty database
+    """
+    return not conn.is_dbapi_connection and conn._supports_new_connections()
+
 
 class TableWidget:
     @telemetry.log_call("TableWidget-init")
-    def __init__(self, table, schema=None):
+    def __init__(self, table, schema=None, refine_count=True):
         """
         Creates an HTML table element and populates it with SQL table
 
@@ -24,6 +65,15 @@ class TableWidget:
         ----------
         table : str
             Table name where the data is located
+
+        schema : str, default None
+            Schema name where the table is located
+
+        refine_count : bool, default True
+            Estimate the number of rows from the database statistics (if
+            available), and count them in a background thread to update the
+            number of pages once it finishes. If False, or if the rows can't be
+            counted in the background, they're counted before showing the table
         """
 
         self.html = ""
@@ -34,7 +84,7 @@ class TableWidget:
         html_style = utils.load_css(f"{BASE_DIR}/css/tableWidget.css")
         self.add_to_html(html_style)
 
-        self.create_table(table, schema)
+        self.create_table(table, schema, refine_count=refine_count)
 
         # register listener for jupyter lab
         self.register_comm()
@@ -48,7 +98,7 @@ class TableWidget:
     def add_to_html(self, html):
         self.html += html
 
-    def create_table(self, table, schema):
+    def create_table(self, table, schema, refine_count=True):
         """
         Creates an HTML table with default data
         """
@@ -58,12 +108,41 @@ class TableWidget:
             table_ = table
 
         rows_per_page = 10
-        rows, columns = fetch_sql_with_pagination(table_, 0, rows_per_page)
-        rows = parse_sql_results_to_json(rows, columns)
+        table_name = table_.strip('"').strip("'")
+        conn = ConnectionManager.current
+        key = _get_key(conn.alias, table_name)
 
         query = f"SELECT count(*) FROM {table_}"
-        n_total = ConnectionManager.current.raw_execute(query).fetchone()[0]
-        table_name = table_.strip('"').strip("'")
+
+        # counting the rows requires a full scan in most databases, so we use the
+        # estimate from the database statistics (if available) and count them in
+        # the background. DuckDB counts rows quickly, so we count them right away
+        use_estimate = (
+            refine_count and conn.dialect != "duckdb" and _can_count_in_background(conn)
+        )
+        n_total = estimate_row_count(table, schema) if use_estimate else None
+        n_total_approximate = n_total is not None
+
+        if n_total_approximate:
+            _row_counts.pop(key, None)
+        else:
+            n_total = conn.raw_execute(query).fetchone()[0]
+            _row_counts[key] = n_total
+
+        paginator = TablePaginator(
+            table,
+            schema=schema,
+            rows_per_page=rows_per_page,
+            n_total=None if n_total_approximate else n_total,
+            conn=conn,
+        )
+        _paginators[key] = paginator
+
+        if n_total_approximate:
+            self._count_rows_in_background(key, query)
+
+        columns = paginator.columns
+        rows = parse_sql_results_to_json(paginator.fetch_page(0), columns)
 
         n_pages = math.ceil(n_total / rows_per_page)
 
@@ -84,7 +163,9 @@ class TableWidget:
                     rows_per_page=rows_per_page,
                     n_pages=n_pages,
                     n_total=n_total,
+                    n_total_approximate=n_total_approximate,
                     table_name=table_name,
+                    connection_alias=conn.alias,
                     table_container_id=table_container_id,
                     table=table_,
                     initialRows=rows,
@@ -93,6 +174,27 @@ class TableWidget:
         )
         self.add_to_html(html_scripts)
 
+    def _count_rows_in_background(self, key, query):
+        """
+        Count the rows in a thread (with a new connection since connections
+        can't be shared across threads), the frontend gets the number of rows
+        with the next page it requests
+        """
+        engine = ConnectionManager.current.connection_sqlalchemy.engine
+
+        def count():
+            try:
+                with engine.connect() as connection:
+                    n_total = connection.exec_driver_sql(query).scalar()
+            except Exception:
+                return
+
+            _row_counts[key] = n_total
+
+        thread = threading.Thread(target=count, daemon=True)
+        thread.start()
+        self._count_thread = thread
+
     def load_tests(self):
         """
         Define which JS functions we should
@@ -177,18 +279,35 @@ class TableWidget:
                     sort_column = sort["column"]
                     sort_order = sort["order"]
 
-                offset = page * n_rows
-
-                rows, columns = fetch_sql_with_pagination(
-                    table_name,
-                    offset,
-                    n_rows,
-                    sort_column=sort_column,
-                    sort_order=sort_order,
+                # widgets created with an older version don't send the alias
+                alias = data.get("alias") or ConnectionManager.current.alias
+                key = _get_key(alias, table_name)
+                paginator = _paginators.get(key)
+
+                if paginator is None or paginator.rows_per_page != n_rows:
+                    conn = ConnectionManager.connections.get(
+                        alias, ConnectionManager.current
+                    )
+                    is_table_exists(table_name, conn=conn)
+                    paginator = TablePaginator(
+                        table_name, rows_per_page=n_rows, conn=conn
+                    )
+                    _paginators[key] = paginator
+
+                paginator.n_total = _row_counts.get(key)
+
+                rows = paginator.fetch_page(
+                    page, sort_column=sort_column, sort_order=sort_order
                 )
-                rows_json = parse_sql_results_to_json(rows, columns)
+                rows_json = parse_sql_results_to_json(rows, paginator.columns)
+                response = {"rows": rows_json}
+
+                # the exact number of rows (if it was estimated when creating the
+                # widget)
+                if paginator.n_total is not None:
+                    response["nTotal"] = paginator.n_total
 
-                comm.send({"rows": rows_json})
+                comm.send(response)
 
         ipython = get_ipython()
 
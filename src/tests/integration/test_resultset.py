@@ -13,6 +13,10 @@ class Config:
     style = "DEFAULT"
     autolimit = 0
     displaylimit = 10
+    result_backend = "list"
+    yield_per = 0
+    statement_timeout = 0
+    result_cache = False
 
 
 def test_resultset(setup_postgreSQL):
@@ -38,6 +38,10 @@ class ConfigAutocommit:
     style = "DEFAULT"
     autolimit = 0
     displaylimit = 10
+    result_backend = "list"
+    yield_per = 0
+    statement_timeout = 0
+    result_cache = False
 
 
 class ConfigNoAutocommit(ConfigAutocommit):
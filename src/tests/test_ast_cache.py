@@ -0,0 +1,88 @@
+from unittest.mock import Mock
+
+import pytest
+import sqlglot
+
+from sql import ast_cache, util
+
+
+@pytest.fixture(autouse=True)
+def clear_ast_cache():
+    ast_cache.clear()
+    yield
+    ast_cache.clear()
+
+
+@pytest.fixture
+def sqlglot_parse(monkeypatch):
+    mock = Mock(wraps=sqlglot.parse)
+    monkeypatch.setattr(ast_cache.sqlglot, "parse", mock)
+    return mock
+
+
+def test_parse_is_cached_by_query_and_dialect(sqlglot_parse):
+    ast_cache.parse("SELECT * FROM t", read="postgres")
+    ast_cache.parse("SELECT * FROM t", read="postgres")
+    ast_cache.parse("SELECT * FROM t", read="tsql")
+
+    assert sqlglot_parse.call_count == 2
+
+
+def test_parse_returns_copies():
+    first = ast_cache.parse_one("SELECT * FROM t")
+    first.where("x > 1", copy=False)
+
+    assert ast_cache.parse_one("SELECT * FROM t").sql() == "SELECT * FROM t"
+
+
+def test_parse_without_copy_returns_the_cached_expression():
+    first = ast_cache.parse_one("SELECT 1", copy=False)
+    assert ast_cache.parse_one("SELECT 1", copy=False) is first
+
+
+@pytest.mark.parametrize(
+    "function, args",
+    [
+        (ast_cache.parse, ("SELECT * FROM (",)),
+        (ast_cache.transpile, ("SELECT * FROM (", "duckdb", "postgres")),
+    ],
+)
+def test_errors_are_raised_fresh(function, args):
+    errors = []
+
+    for _ in range(2):
+        with pytest.raises(sqlglot.errors.ParseError) as excinfo:
+            function(*args)
+
+        errors.append(excinfo.value)
+
+    # a cached exception would be re-raised with an ever-growing traceback
+    assert errors[0] is not errors[1]
+
+
+def test_transpile_is_cached(monkeypatch):
+    mock = Mock(wraps=sqlglot.transpile)
+    monkeypatch.setattr(ast_cache.sqlglot, "transpile", mock)
+
+    for _ in range(2):
+        assert ast_cache.transpile("SELECT TOP 1 x FROM t", "tsql", "postgres") == [
+            "SELECT x FROM t LIMIT 1"
+        ]
+
+    mock.assert_called_once()
+
+
+def test_cache_is_bounded(monkeypatch, sqlglot_parse):
+    for i in range(ast_cache.MAX_SIZE + 1):
+        ast_cache.parse(f"SELECT {i}")
+
+    # the first query was evicted
+    ast_cache.parse("SELECT 0")
+    assert sqlglot_parse.call_count == ast_cache.MAX_SIZE + 2
+
+
+def test_extract_tables_from_query_uses_the_cache(sqlglot_parse):
+    for _ in range(3):
+        assert util.extract_tables_from_query("SELECT * FROM a JOIN b") == ["a", "b"]
+
+    sqlglot_parse.assert_called_once()
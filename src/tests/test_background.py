@@ -0,0 +1,142 @@
+import threading
+
+import duckdb
+import pytest
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine
+
+from sql.connection import DBAPIConnection, SQLAlchemyConnection
+from sql.run import background
+from sql.run.background import QueryFuture, run_statements_async
+from sql.run.resultset import ResultSet
+
+
+class Config:
+    autopandas = None
+    autopolars = None
+    autocommit = True
+    feedback = 1
+    polars_dataframe_kwargs = {}
+    style = "DEFAULT"
+    autolimit = 0
+    displaylimit = 10
+    lazy_execution = False
+    result_backend = "list"
+    yield_per = 0
+    statement_timeout = 0
+    result_cache = False
+    result_cache_max_memory = 256
+    result_cache_ttl = 0
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = SQLAlchemyConnection(
+        create_engine(f"sqlite:///{tmp_path / 'my.db'}"), alias="async-test"
+    )
+    conn.raw_execute("CREATE TABLE numbers (x INT)")
+    conn.raw_execute("INSERT INTO numbers VALUES (1), (2), (3)")
+    yield conn
+    conn.close()
+
+
+def test_run_statements_async(conn, monkeypatch):
+    monkeypatch.setattr(background, "FETCH_BATCH_SIZE", 1)
+    results = []
+
+    future = run_statements_async(
+        conn, "SELECT * FROM numbers", Config, on_done=results.append
+    )
+    result = future.result(timeout=60)
+
+    assert isinstance(result, ResultSet)
+    assert list(result) == [(1,), (2,), (3,)]
+    assert results == [result]
+    assert future.status == "finished"
+    assert future.rows_fetched == 3
+
+
+def test_run_statements_async_uses_another_connection(conn):
+    future = run_statements_async(conn, "INSERT INTO numbers VALUES (4)", Config)
+    future.result(timeout=60)
+
+    assert conn.raw_execute("SELECT COUNT(*) FROM numbers").fetchone() == (4,)
+    assert len(conn._result_sets) == 0
+
+
+def test_run_statements_async_failed(conn):
+    future = run_statements_async(conn, "SELECT * FROM missing", Config)
+
+    assert "no such table" in str(future.exception(timeout=60))
+    assert future.status == "failed"
+
+    with pytest.raises(Exception, match="no such table"):
+        future.result()
+
+
+def test_run_statements_async_with_native_duckdb():
+    conn = DBAPIConnection(duckdb.connect(), alias="async-duckdb")
+    conn.raw_execute("CREATE TABLE numbers AS SELECT 42 AS x")
+
+    future = run_statements_async(conn, "SELECT * FROM numbers", Config)
+
+    assert list(future.result(timeout=60)) == [(42,)]
+    conn.close()
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "duckdb://"])
+def test_run_statements_async_with_in_memory_database(url):
+    conn = SQLAlchemyConnection(create_engine(url), alias="async-memory")
+
+    with pytest.raises(UsageError, match="in-memory database"):
+        run_statements_async(conn, "SELECT 1", Config)
+
+    conn.close()
+
+
+def test_query_future_result_timeout():
+    future = QueryFuture("SELECT 1", "conn")
+    finish = threading.Event()
+    future._start(lambda future: finish.wait())
+
+    assert future.status == "running"
+
+    with pytest.raises(TimeoutError):
+        future.result(timeout=0.01)
+
+    finish.set()
+
+    assert future.result(timeout=60) is True
+    assert "status='finished'" in repr(future)
+
+
+def test_query_future_done_callback():
+    future = QueryFuture("SELECT 1", "conn")
+    called = []
+    future.add_done_callback(called.append)
+    future._start(lambda future: 1)
+    future.wait(timeout=60)
+    future.add_done_callback(called.append)
+
+    assert called == [future, future]
+
+
+@pytest.mark.parametrize("result_backend", ["list", "arrow"])
+@pytest.mark.parametrize("method", ["DataFrame", "PolarsDataFrame"])
+def test_run_statements_async_data_frame(conn, monkeypatch, result_backend, method):
+    monkeypatch.setattr(Config, "result_backend", result_backend)
+
+    result = run_statements_async(conn, "SELECT * FROM numbers", Config).result(60)
+
+    assert getattr(result, method)()["x"].to_list() == [1, 2, 3]
+
+
+def test_run_statements_async_data_frame_with_native_duckdb():
+    conn = DBAPIConnection(duckdb.connect(), alias="async-duckdb-df")
+    conn.raw_execute("CREATE TABLE numbers AS SELECT * FROM range(3) AS t(x)")
+
+    result = run_statements_async(conn, "SELECT * FROM numbers", Config).result(60)
+
+    assert result.DataFrame()["x"].to_list() == [0, 1, 2]
+    assert list(result) == [(0,), (1,), (2,)]
+    conn.close()
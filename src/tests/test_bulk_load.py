@@ -0,0 +1,183 @@
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+
+from sql.connection import SQLAlchemyConnection, bulk_load
+
+
+@pytest.fixture
+def duckdb_conn():
+    conn = SQLAlchemyConnection(create_engine("duckdb://"), alias="bulk-duckdb")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def sqlite_conn():
+    conn = SQLAlchemyConnection(create_engine("sqlite://"), alias="bulk-sqlite")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"x": [1, 2, 3, 4, 5], "y": ["a", "b", "c", "d", "e"]})
+
+
+def count_statements(conn):
+    statements = []
+    event.listen(
+        conn._connection,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    return statements
+
+
+@pytest.mark.parametrize(
+    "dialect, driver, expected",
+    [
+        ("postgresql", "psycopg2", bulk_load.insert_copy),
+        ("postgresql", "psycopg", bulk_load.insert_copy),
+        ("postgresql", "pg8000", bulk_load.insert_multi_values),
+        ("sqlite", "pysqlite", bulk_load.insert_executemany),
+        ("mysql", "pymysql", bulk_load.insert_multi_values),
+    ],
+)
+def test_select_insert_method(dialect, driver, expected):
+    assert bulk_load.select_insert_method(dialect, driver) is expected
+
+
+def test_select_insert_method_without_multi_row_inserts():
+    # e.g., oracle
+    method = bulk_load.select_insert_method("oracle", "oracledb", False)
+    assert method is bulk_load.insert_executemany
+
+
+@pytest.mark.parametrize("index", [True, False])
+def test_to_table_duckdb(duckdb_conn, df, index):
+    duckdb_conn.to_table("numbers", df, if_exists="fail", index=index)
+
+    expected = pd.read_sql("SELECT * FROM numbers", duckdb_conn.connection_sqlalchemy)
+    pd.testing.assert_frame_equal(
+        expected, df.reset_index() if index else df, check_dtype=False
+    )
+
+
+def test_to_table_duckdb_does_not_insert_rows(duckdb_conn, df):
+    statements = count_statements(duckdb_conn)
+
+    duckdb_conn.to_table("numbers", df, if_exists="fail", index=False)
+
+    assert not any(s.lstrip().upper().startswith("INSERT") for s in statements)
+
+
+def test_to_table_duckdb_series(duckdb_conn):
+    duckdb_conn.to_table("numbers", pd.Series([1, 2], name="x"), "fail", index=False)
+
+    assert duckdb_conn.raw_execute("SELECT x FROM numbers").fetchall() == [(1,), (2,)]
+
+
+def test_to_table_duckdb_if_exists(duckdb_conn, df):
+    duckdb_conn.to_table("numbers", df, if_exists="fail", index=False)
+
+    with pytest.raises(UsageError, match="already exists"):
+        duckdb_conn.to_table("numbers", df, if_exists="fail", index=False)
+
+    # columns are matched by name
+    duckdb_conn.to_table("numbers", df[["y", "x"]], if_exists="append", index=False)
+
+    assert duckdb_conn.raw_execute("SELECT SUM(x) FROM numbers").fetchone() == (30,)
+
+    duckdb_conn.to_table("numbers", df.head(1), if_exists="replace", index=False)
+
+    assert duckdb_conn.raw_execute("SELECT * FROM numbers").fetchall() == [(1, "a")]
+
+
+def test_to_table_in_chunks(sqlite_conn, df, monkeypatch):
+    progress = Mock()
+    monkeypatch.setattr(bulk_load.display, "ProgressMessage", progress)
+    statements = count_statements(sqlite_conn)
+
+    sqlite_conn.to_table("numbers", df, if_exists="fail", index=False, chunksize=2)
+
+    assert sqlite_conn.raw_execute("SELECT * FROM numbers").fetchall() == list(
+        df.itertuples(index=False, name=None)
+    )
+    assert sum(s.startswith("INSERT") for s in statements) == 3
+    assert progress.return_value.update.call_args_list[-1][0] == (
+        "Persisting numbers: 5/5 rows loaded",
+    )
+
+
+def test_to_table_does_not_report_progress_for_a_single_chunk(
+    sqlite_conn, df, monkeypatch
+):
+    progress = Mock()
+    monkeypatch.setattr(bulk_load.display, "ProgressMessage", progress)
+
+    sqlite_conn.to_table("numbers", df, if_exists="fail", index=False)
+
+    progress.assert_not_called()
+
+
+def test_insert_multi_values_respects_parameter_limit(sqlite_conn, df, monkeypatch):
+    monkeypatch.setattr(
+        bulk_load, "select_insert_method", lambda *args: bulk_load.insert_multi_values
+    )
+    monkeypatch.setattr(bulk_load, "_MAX_PARAMETERS", {"sqlite": 4})
+    statements = count_statements(sqlite_conn)
+
+    sqlite_conn.to_table("numbers", df, if_exists="fail", index=False)
+
+    # 2 columns and at most 4 parameters per statement: 2 rows per INSERT
+    assert sum(s.startswith("INSERT") for s in statements) == 3
+    assert sqlite_conn.raw_execute("SELECT COUNT(*) FROM numbers").fetchone() == (5,)
+
+
+def test_insert_multi_values_respects_row_limit(sqlite_conn, df, monkeypatch):
+    monkeypatch.setattr(
+        bulk_load, "select_insert_method", lambda *args: bulk_load.insert_multi_values
+    )
+    monkeypatch.setattr(bulk_load, "_MAX_ROWS", {"sqlite": 2})
+    statements = count_statements(sqlite_conn)
+
+    sqlite_conn.to_table("numbers", df, if_exists="fail", index=False)
+
+    assert sum(s.startswith("INSERT") for s in statements) == 3
+    assert sqlite_conn.raw_execute("SELECT COUNT(*) FROM numbers").fetchone() == (5,)
+
+
+def test_insert_copy_writes_nulls_and_empty_strings_differently():
+    copied = {}
+
+    class Cursor:
+        rowcount = 2
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def copy_expert(self, statement, buffer):
+            copied["statement"] = statement
+            copied["data"] = buffer.read()
+
+    conn = Mock()
+    conn.dialect = postgresql.dialect()
+    conn.connection.dbapi_connection.cursor.return_value = Cursor()
+    pd_table = Mock()
+    pd_table.name, pd_table.schema = "names", None
+
+    bulk_load.insert_copy(pd_table, conn, ["x", "y"], [(1, ""), (2, None)])
+
+    assert copied["statement"] == (
+        "COPY names (x, y) FROM STDIN WITH (FORMAT CSV, NULL '\\N')"
+    )
+    # with NULL '\N', the empty value is loaded as an empty string
+    assert copied["data"] == "1,\r\n2,\\N\r\n"
@@ -0,0 +1,372 @@
+import sqlite3
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine
+
+from sql.connection import DBAPIConnection, SQLAlchemyConnection
+from sql.run.cache import (
+    CacheEntry,
+    CachedCursor,
+    ResultCache,
+    make_key,
+    result_cache,
+)
+from sql.run.disk_cache import ArrowCursor, DiskCache, make_disk_key
+from sql.run.resultset import ResultSet, _statement_is_select
+from sql.run.run import run_statements
+
+
+class Config:
+    autopandas = None
+    autopolars = None
+    autocommit = True
+    feedback = True
+    polars_dataframe_kwargs = {}
+    style = "DEFAULT"
+    autolimit = 0
+    displaylimit = 10
+    result_backend = "list"
+    yield_per = 0
+    statement_timeout = 0
+    result_cache = True
+    result_cache_max_memory = 256
+    result_cache_ttl = 0
+
+
+class ConfigPandas(Config):
+    autopandas = True
+
+
+class ConfigNoCache(Config):
+    result_cache = False
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+@pytest.fixture
+def conn():
+    conn = SQLAlchemyConnection(create_engine("sqlite://"), alias="cache-test")
+    conn.raw_execute("CREATE TABLE numbers (x INT)")
+    conn.raw_execute("INSERT INTO numbers VALUES (1), (2), (3)")
+    yield conn
+    conn.close()
+
+
+def spy_raw_execute(conn, monkeypatch):
+    mock = Mock(wraps=conn.raw_execute)
+    monkeypatch.setattr(conn, "raw_execute", mock)
+    return mock
+
+
+def test_cached_cursor():
+    cursor = CachedCursor(CacheEntry(["x"], [(1,), (2,), (3,)], size=0))
+
+    assert cursor.description[0][0] == "x"
+    assert cursor.fetchmany(2) == [(1,), (2,)]
+    assert cursor.fetchall() == [(3,)]
+    assert cursor.fetchmany(2) == []
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache()
+
+    cache.put("a", ["x"], [(1,)], size=40, max_size=100)
+    cache.put("b", ["x"], [(2,)], size=40, max_size=100)
+    cache.get("a")
+    cache.put("c", ["x"], [(3,)], size=40, max_size=100)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.size == 80
+
+
+def test_result_cache_does_not_store_results_over_budget():
+    cache = ResultCache()
+
+    assert cache.put("a", ["x"], [(1,)], size=101, max_size=100) is None
+    assert len(cache) == 0
+
+
+def test_result_cache_ttl(monkeypatch):
+    cache = ResultCache()
+    cache.put("a", ["x"], [(1,)], size=1, max_size=100)
+    now = time.monotonic()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+    assert cache.get("a", ttl=0) is not None
+    assert cache.get("a", ttl=10) is None
+    assert "a" not in cache
+    assert cache.size == 0
+
+
+def test_make_key_normalizes_sql():
+    first = make_key("conn", ["SELECT *\n  FROM numbers -- comment"], None, 0)
+    second = make_key("conn", ["select * from numbers"], None, 0)
+
+    assert first == second
+    assert make_key("conn", ["SELECT * FROM numbers WHERE x = 'A  B'"], None, 0) != (
+        make_key("conn", ["SELECT * FROM numbers WHERE x = 'A B'"], None, 0)
+    )
+    assert make_key("conn", ['SELECT "X" FROM numbers'], None, 0) != (
+        make_key("conn", ['SELECT "x" FROM numbers'], None, 0)
+    )
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        ("SELECT * FROM numbers", True),
+        ("with t as (select 1) select * from t", True),
+        ("SELECT 'insert into' AS x", True),
+        ("WITH t AS (SELECT 1) INSERT INTO numbers SELECT * FROM t", False),
+        ("WITH t AS (DELETE FROM numbers RETURNING *) SELECT * FROM t", False),
+        ("SELECT * INTO copied FROM numbers", False),
+        ("INSERT INTO numbers VALUES (1)", False),
+    ],
+)
+def test_statement_is_select(statement, expected):
+    assert _statement_is_select(statement) is expected
+
+
+def test_make_key_only_uses_parameters_in_the_query():
+    key = make_key(
+        "conn", ["SELECT * FROM numbers WHERE x = :x"], {"x": 1, "other": []}, 0
+    )
+
+    assert key.parameters == (("x", 1),)
+
+
+def test_make_key_returns_none_if_parameters_are_not_hashable():
+    key = make_key("conn", ["SELECT * FROM numbers WHERE x IN :x"], {"x": [1]}, 0)
+
+    assert key is None
+
+
+def test_run_statements_returns_cached_results(conn, monkeypatch):
+    first = run_statements(conn, "SELECT * FROM numbers", Config)
+    raw_execute = spy_raw_execute(conn, monkeypatch)
+    second = run_statements(conn, "select *   from numbers", Config)
+
+    raw_execute.assert_not_called()
+    assert isinstance(second, ResultSet)
+    assert list(first) == list(second) == [(1,), (2,), (3,)]
+    assert second.keys == ["x"]
+
+
+def test_run_statements_returns_cached_data_frame(conn, monkeypatch):
+    run_statements(conn, "SELECT * FROM numbers", ConfigPandas)
+    raw_execute = spy_raw_execute(conn, monkeypatch)
+    df = run_statements(conn, "SELECT * FROM numbers", ConfigPandas)
+
+    raw_execute.assert_not_called()
+    assert isinstance(df, pd.DataFrame)
+    assert df.to_dict(orient="list") == {"x": [1, 2, 3]}
+
+
+def test_run_statements_with_duckdb_does_not_convert_pending_results(monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"), alias="cache-duckdb")
+
+    run_statements(conn, "SELECT 42 AS x", ConfigPandas)
+    conn.raw_execute("SELECT 'pending' AS y")
+    df = run_statements(conn, "SELECT 42 AS x", ConfigPandas)
+
+    assert df.to_dict(orient="list") == {"x": [42]}
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "INSERT INTO numbers VALUES (4)",
+        "DROP TABLE other",
+        "WITH new AS (SELECT 4) INSERT INTO numbers SELECT * FROM new",
+        "WITH old AS (SELECT 1) DELETE FROM numbers WHERE x IN (SELECT * FROM old)",
+    ],
+)
+def test_run_statements_invalidates_cache(conn, statement):
+    conn.raw_execute("CREATE TABLE other (x INT)")
+    run_statements(conn, "SELECT * FROM numbers", Config)
+
+    run_statements(conn, statement, Config)
+
+    assert len(result_cache) == 0
+
+
+def test_run_statements_sees_changes_after_dml(conn):
+    run_statements(conn, "SELECT * FROM numbers", Config)
+    run_statements(conn, "INSERT INTO numbers VALUES (4)", Config)
+    result = run_statements(conn, "SELECT * FROM numbers", Config)
+
+    assert list(result) == [(1,), (2,), (3,), (4,)]
+
+
+def test_run_statements_does_not_cache_if_disabled(conn):
+    run_statements(conn, "SELECT * FROM numbers", ConfigNoCache)
+
+    assert len(result_cache) == 0
+
+
+def test_run_statements_does_not_cache_results_over_budget(conn):
+    class ConfigNoMemory(Config):
+        result_cache_max_memory = 0
+
+    result = run_statements(conn, "SELECT * FROM numbers", ConfigNoMemory)
+
+    assert len(result_cache) == 0
+    assert list(result) == [(1,), (2,), (3,)]
+
+
+def test_run_statements_key_includes_parameters(conn):
+    query = "SELECT * FROM numbers WHERE x = :x"
+
+    first = run_statements(conn, query, Config, parameters={"x": 1})
+    second = run_statements(conn, query, Config, parameters={"x": 2})
+
+    assert list(first) == [(1,)]
+    assert list(second) == [(2,)]
+    assert len(result_cache) == 2
+
+
+def test_closing_connection_invalidates_cache(conn):
+    run_statements(conn, "SELECT * FROM numbers", Config)
+
+    conn.close()
+
+    assert len(result_cache) == 0
+
+
+@pytest.fixture
+def config_disk(tmp_path):
+    class ConfigDisk(ConfigNoCache):
+        cache_dir = str(tmp_path / "cache")
+
+    return ConfigDisk
+
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    url = f"sqlite:///{tmp_path / 'my.db'}"
+    conn = SQLAlchemyConnection(create_engine(url), alias="disk-cache-test")
+    conn.raw_execute("CREATE TABLE numbers (x INT, y TEXT)")
+    conn.raw_execute("INSERT INTO numbers VALUES (1, 'a'), (2, 'b'), (3, 'c')")
+    yield conn, url
+    conn.close()
+
+
+def test_disk_cache_put_and_get(tmp_path):
+    cache = DiskCache(tmp_path)
+    table = pa.table({"x": [1, 2, 3]})
+
+    cache.put("key", table)
+
+    assert cache.get("key").equals(table)
+    assert cache.get("missing") is None
+    assert [path.name for path in tmp_path.iterdir()] == ["key.arrow"]
+
+
+def test_disk_cache_get_corrupted_file(tmp_path):
+    (tmp_path / "key.arrow").write_text("not an arrow file")
+
+    assert DiskCache(tmp_path).get("key") is None
+
+
+def test_disk_cache_clear(tmp_path):
+    cache = DiskCache(tmp_path / "cache")
+    cache.put("a", pa.table({"x": [1]}))
+    cache.put("b", pa.table({"x": [2]}))
+
+    assert cache.clear() == 2
+    assert cache.get("a") is None
+
+
+def test_disk_cache_clear_missing_directory(tmp_path):
+    assert DiskCache(tmp_path / "missing").clear() == 0
+
+
+def test_arrow_cursor():
+    cursor = ArrowCursor(pa.table({"x": [1, 2, 3], "y": ["a", "b", "c"]}))
+
+    assert [column[0] for column in cursor.description] == ["x", "y"]
+    assert cursor.fetchmany(2) == [(1, "a"), (2, "b")]
+    assert cursor.fetchall() == [(3, "c")]
+
+
+def test_make_disk_key(conn):
+    key = make_disk_key(conn, ["SELECT * FROM numbers"], None, 0)
+
+    assert len(key) == 64
+    assert key == make_disk_key(conn, ["select *\nfrom numbers"], None, 0)
+    assert key != make_disk_key(conn, ["SELECT * FROM numbers"], None, 10)
+
+
+def test_make_disk_key_requires_alias_for_dbapi_connections():
+    first = DBAPIConnection(sqlite3.connect(":memory:"))
+    second = DBAPIConnection(sqlite3.connect(":memory:"), alias="second")
+
+    with pytest.raises(UsageError) as excinfo:
+        make_disk_key(first, ["SELECT 1"], None, 0)
+
+    assert "--cache requires a connection URL" in str(excinfo.value)
+    assert make_disk_key(second, ["SELECT 1"], None, 0) is not None
+
+
+def test_run_statements_with_disk_cache(sqlite_file, config_disk, monkeypatch):
+    conn, _ = sqlite_file
+    query = "SELECT * FROM numbers"
+
+    first = run_statements(conn, query, config_disk, cache=True)
+    raw_execute = spy_raw_execute(conn, monkeypatch)
+    second = run_statements(conn, query, config_disk, cache=True)
+
+    raw_execute.assert_not_called()
+    assert list(first) == list(second) == [(1, "a"), (2, "b"), (3, "c")]
+    assert second.keys == ["x", "y"]
+
+
+def test_run_statements_with_disk_cache_in_new_session(sqlite_file, config_disk):
+    conn, url = sqlite_file
+    query = "SELECT * FROM numbers"
+    run_statements(conn, query, config_disk, cache=True)
+    conn.close()
+
+    class ConfigDiskPandas(config_disk):
+        autopandas = True
+
+    # simulate a new session: same URL but the table no longer exists
+    Path(url.replace("sqlite:///", "")).unlink()
+    new_conn = SQLAlchemyConnection(create_engine(url), alias="disk-cache-test")
+    df = run_statements(new_conn, query, ConfigDiskPandas, cache=True)
+
+    assert df.to_dict(orient="list") == {"x": [1, 2, 3], "y": ["a", "b", "c"]}
+    new_conn.close()
+
+
+def test_run_statements_with_disk_cache_ignores_other_statements(
+    conn, config_disk, capsys
+):
+    run_statements(conn, "CREATE TABLE other (x INT)", config_disk, cache=True)
+
+    assert "only the results of SELECT statements are cached" in capsys.readouterr().out
+    assert not Path(config_disk.cache_dir).exists()
+
+
+def test_run_statements_with_disk_cache_mixed_types(conn, config_disk, capsys):
+    conn.raw_execute("INSERT INTO numbers VALUES ('four')")
+
+    result = run_statements(conn, "SELECT * FROM numbers", config_disk, cache=True)
+
+    assert "columns with mixed data types" in capsys.readouterr().out
+    assert list(result) == [(1,), (2,), (3,), ("four",)]
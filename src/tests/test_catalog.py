@@ -0,0 +1,165 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import create_engine
+
+from sql import catalog, inspect
+from sql.catalog import CatalogCache, catalog_cache, statement_changes_catalog
+from sql.connection import SQLAlchemyConnection
+from sql.run.run import run_statements
+
+
+class Config:
+    autopandas = None
+    autopolars = None
+    autocommit = True
+    feedback = True
+    polars_dataframe_kwargs = {}
+    style = "DEFAULT"
+    autolimit = 0
+    displaylimit = 10
+    result_backend = "list"
+    yield_per = 0
+    statement_timeout = 0
+    result_cache = False
+    result_cache_max_memory = 256
+    result_cache_ttl = 0
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    catalog_cache.clear()
+    yield
+    catalog_cache.clear()
+
+
+@pytest.fixture
+def conn():
+    conn = SQLAlchemyConnection(create_engine("sqlite://"), alias="catalog-test")
+    conn.raw_execute("CREATE TABLE numbers (x INT PRIMARY KEY, y TEXT)")
+    yield conn
+    conn.close()
+
+
+def spy_raw_execute(conn, monkeypatch):
+    mock = Mock(wraps=conn.raw_execute)
+    monkeypatch.setattr(conn, "raw_execute", mock)
+    return mock
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        ("CREATE TABLE t (x INT)", True),
+        ("create or replace view v as select 1", True),
+        ("  DROP TABLE t", True),
+        ("ALTER TABLE t ADD COLUMN y INT", True),
+        ("ATTACH 'other.db' AS other", True),
+        ("INSERT INTO t VALUES (1)", False),
+        ("SELECT * FROM created", False),
+        ("SELECT * INTO copied FROM t", True),
+        ("SELECT 'select into' AS x FROM t", False),
+        ("", False),
+    ],
+)
+def test_statement_changes_catalog(statement, expected):
+    assert statement_changes_catalog(statement) is expected
+
+
+def test_catalog_cache_ttl(monkeypatch):
+    cache = CatalogCache()
+    cache.put("conn", ("tables", None), ["numbers"])
+    now = time.monotonic()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+    assert cache.get("conn", ("tables", None), ttl=0) == ["numbers"]
+    assert cache.get("conn", ("tables", None), ttl=10) is catalog._MISSING
+    assert len(cache) == 0
+
+
+def test_catalog_cache_invalidate():
+    cache = CatalogCache()
+    cache.put("first", ("schemas",), ["main"])
+    cache.put("second", ("schemas",), ["main"])
+
+    cache.invalidate("first")
+
+    assert cache.get("first", ("schemas",)) is catalog._MISSING
+    assert cache.get("second", ("schemas",)) == ["main"]
+
+
+def test_get_table_names_is_cached(conn):
+    assert catalog.get_table_names(conn) == ["numbers"]
+
+    conn.raw_execute("CREATE TABLE other (x INT)")
+
+    assert catalog.get_table_names(conn) == ["numbers"]
+
+
+def test_get_columns_and_primary_key(conn):
+    columns = catalog.get_columns(conn, "numbers")
+
+    assert [column["name"] for column in columns] == ["x", "y"]
+    assert catalog.get_primary_key(conn, "numbers") == ["x"]
+
+
+def test_is_table_exists_probes_once(conn, monkeypatch):
+    assert inspect._is_table_exists("numbers", conn)
+
+    execute = Mock(wraps=conn.execute)
+    monkeypatch.setattr(conn, "execute", execute)
+
+    assert inspect._is_table_exists("numbers", conn)
+    execute.assert_not_called()
+
+
+def test_is_table_exists_does_not_store_missing_tables(conn):
+    assert not inspect._is_table_exists("other", conn)
+
+    conn.raw_execute("CREATE TABLE other (x INT)")
+
+    assert inspect._is_table_exists("other", conn)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "CREATE TABLE other (x INT)",
+        "ALTER TABLE numbers ADD COLUMN z INT",
+        "DROP TABLE numbers",
+    ],
+)
+def test_run_statements_invalidates_catalog(conn, statement):
+    catalog.get_table_names(conn)
+    catalog.get_columns(conn, "numbers")
+
+    run_statements(conn, statement, Config)
+
+    assert len(catalog_cache) == 0
+
+
+def test_run_statements_keeps_catalog_after_dml(conn):
+    catalog.get_table_names(conn)
+
+    run_statements(conn, "INSERT INTO numbers VALUES (1, 'one')", Config)
+    run_statements(conn, "SELECT * FROM numbers", Config)
+
+    assert len(catalog_cache)
+
+
+def test_run_statements_sees_new_tables(conn):
+    assert catalog.get_table_names(conn) == ["numbers"]
+
+    run_statements(conn, "CREATE TABLE other (x INT)", Config)
+
+    assert catalog.get_table_names(conn) == ["numbers", "other"]
+
+
+def test_closing_connection_invalidates_catalog(conn):
+    catalog.get_table_names(conn)
+
+    conn.close()
+
+    assert len(catalog_cache) == 0
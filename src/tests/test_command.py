@@ -172,6 +172,15 @@ def test_args(ip, sql_magic):
         "connection_arguments": None,
         "file": None,
         "interact": None,
+        "stream": None,
+        "yield_per": None,
+        "partition_on": None,
+        "partitions": None,
+        "federate": False,
+        "chunksize": None,
+        "timeout": None,
+        "async_": False,
+        "cache": False,
         "save": None,
         "with_": ["author_one"],
         "no_execute": False,
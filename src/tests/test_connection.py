@@ -973,6 +973,65 @@ def test_execute_transpiles_sql_query(fixture_name, request):
     assert calls == expected_calls
 
 
+@pytest.mark.parametrize(
+    "dialect, query, expected",
+    [
+        ["duckdb", "SELECT * FROM foo", "SELECT * FROM foo\nLIMIT 10"],
+        ["duckdb", "FROM foo;", "FROM foo\nLIMIT 10"],
+        ["duckdb", "SELECT * FROM foo LIMIT 100", "SELECT * FROM foo LIMIT 10"],
+        ["duckdb", "SELECT * FROM foo LIMIT 5", "SELECT * FROM foo LIMIT 5"],
+        [
+            "postgres",
+            "SELECT * FROM foo LIMIT 100 OFFSET 5",
+            "SELECT * FROM foo LIMIT 10 OFFSET 5",
+        ],
+        [
+            "postgres",
+            "SELECT 1 AS x UNION SELECT 2 AS x",
+            "SELECT 1 AS x UNION SELECT 2 AS x\nLIMIT 10",
+        ],
+        [
+            "postgres",
+            "WITH a AS (SELECT * FROM foo) SELECT * FROM a",
+            "WITH a AS (SELECT * FROM foo) SELECT * FROM a\nLIMIT 10",
+        ],
+        # the original text is kept (sqlglot would write CAST(x AS INT))
+        ["postgres", "SELECT x::int FROM foo", "SELECT x::int FROM foo\nLIMIT 10"],
+        [
+            "duckdb",
+            "SELECT * FROM foo QUALIFY ROW_NUMBER() OVER (PARTITION BY x) = 1",
+            "SELECT * FROM foo QUALIFY ROW_NUMBER() OVER (PARTITION BY x) = 1"
+            "\nLIMIT 10",
+        ],
+        ["oracle", "SELECT * FROM foo", "SELECT * FROM foo\nFETCH FIRST 10 ROWS ONLY"],
+        # TOP can't be appended to the query, the rows are truncated when fetching
+        ["tsql", "SELECT * FROM foo", "SELECT * FROM foo"],
+        # the LIMIT must go before FOR UPDATE
+        ["mysql", "SELECT * FROM foo FOR UPDATE", "SELECT * FROM foo FOR UPDATE"],
+        # sqlglot drops TABLESAMPLE in MySQL
+        [
+            "mysql",
+            "SELECT * FROM foo TABLESAMPLE (10 PERCENT)",
+            "SELECT * FROM foo TABLESAMPLE (10 PERCENT)",
+        ],
+        ["duckdb", "SELECT * FROM foo WHERE x > :x", "SELECT * FROM foo WHERE x > :x"],
+        [
+            "postgres",
+            "SELECT * FROM foo FETCH FIRST 100 ROWS WITH TIES",
+            "SELECT * FROM foo FETCH FIRST 100 ROWS WITH TIES",
+        ],
+        ["postgres", "SELECT * INTO bar FROM foo", "SELECT * INTO bar FROM foo"],
+        ["postgres", "SELECT * FROM foo LIMIT :n", "SELECT * FROM foo LIMIT :n"],
+        ["duckdb", "INSERT INTO foo VALUES (1)", "INSERT INTO foo VALUES (1)"],
+        ["duckdb", "SELECT * FROM (((", "SELECT * FROM ((("],
+    ],
+)
+def test_add_limit(monkeypatch, conn_sqlalchemy_duckdb, dialect, query, expected):
+    monkeypatch.setattr(conn_sqlalchemy_duckdb, "_get_sqlglot_dialect", lambda: dialect)
+
+    assert conn_sqlalchemy_duckdb._add_limit(query, 10) == expected
+
+
 @pytest.mark.parametrize(
     "fixture_name",
     [
@@ -1309,3 +1368,87 @@ def test_database_in_directory_that_doesnt_exist(tmp_empty, uri, expected):
 )
 def test_detect_duckdb_summarize_or_select(query, expected_output):
     assert detect_duckdb_summarize_or_select(query) == expected_output
+
+
+@pytest.fixture
+def conn_concurrent(tmp_path, monkeypatch, cleanup):
+    # SQLite is excluded since in-memory databases aren't shared across connections,
+    # but a file database behaves like a server database
+    monkeypatch.setattr(connection_module, "_NO_CONCURRENCY_DIALECTS", set())
+    conn = SQLAlchemyConnection(create_engine(f"sqlite:///{tmp_path / 'my.db'}"))
+    conn.raw_execute("CREATE TABLE numbers (x INT)")
+    conn.raw_execute("INSERT INTO numbers VALUES (1), (2), (3)")
+    yield conn
+    conn.close()
+
+
+def _select_number(conn, x):
+    return conn.execute(f"SELECT x FROM numbers WHERE x = {x}").fetchone()[0]
+
+
+def test_map_concurrently_uses_pooled_connections(conn_concurrent):
+    connections = []
+
+    def function(conn, x):
+        connections.append(conn._connection)
+        return _select_number(conn, x)
+
+    results = conn_concurrent._map_concurrently(function, [1, 2, 3])
+
+    assert results == [1, 2, 3]
+    assert conn_concurrent._connection not in connections
+    assert conn_concurrent._executor is not None
+
+
+def test_map_concurrently_runs_again_serially_if_a_query_fails(conn_concurrent):
+    main = conn_concurrent._connection
+
+    def function(conn, x):
+        # simulates a temporary table that's only visible in the main connection
+        if conn._connection is not main:
+            raise exc.OperationalError("SELECT", {}, Exception("no such table"))
+
+        return _select_number(conn, x)
+
+    assert conn_concurrent._map_concurrently(function, [1, 2]) == [1, 2]
+
+
+def test_map_concurrently_raises_other_errors(conn_concurrent):
+    calls = []
+
+    def function(conn, x):
+        calls.append(x)
+
+        if x == 2:
+            raise exc.OperationalError("SELECT", {}, Exception("division by zero"))
+
+        return _select_number(conn, x)
+
+    with pytest.raises(exc.OperationalError, match="division by zero"):
+        conn_concurrent._map_concurrently(function, [1, 2])
+
+    assert sorted(calls) == [1, 2]
+
+
+def test_map_concurrently_disabled(conn_concurrent, monkeypatch):
+    monkeypatch.setattr(connection_module, "_get_concurrent_queries", lambda: 1)
+    connections = []
+
+    def function(conn, x):
+        connections.append(conn._connection)
+        return _select_number(conn, x)
+
+    assert conn_concurrent._map_concurrently(function, [1, 2]) == [1, 2]
+    assert connections == [conn_concurrent._connection] * 2
+    assert conn_concurrent._executor is None
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "duckdb://"])
+def test_map_concurrently_runs_serially_with_embedded_databases(url, cleanup):
+    conn = SQLAlchemyConnection(create_engine(url))
+    connections = []
+
+    conn._map_concurrently(lambda conn_, x: connections.append(conn_), [1, 2])
+
+    assert connections == [conn, conn]
+    conn.close()
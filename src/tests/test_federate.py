@@ -0,0 +1,219 @@
+import duckdb
+import pytest
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine
+
+from sql.catalog import catalog_cache
+from sql.connection import DBAPIConnection, SQLAlchemyConnection
+from sql.run import federate
+
+
+class Config:
+    autopandas = None
+    autopolars = None
+    autocommit = True
+    feedback = True
+    polars_dataframe_kwargs = {}
+    style = "DEFAULT"
+    autolimit = 0
+    displaylimit = 10
+    result_backend = "list"
+
+
+@pytest.fixture
+def connections(tmp_path):
+    catalog_cache.clear()
+
+    lite = SQLAlchemyConnection(
+        create_engine(f"sqlite:///{tmp_path / 'my.db'}"), alias="lite"
+    )
+    lite.raw_execute("CREATE TABLE customers (id INT, name TEXT, country TEXT)")
+    lite.raw_execute(
+        "INSERT INTO customers VALUES (1, 'Alice', 'UK'), (2, 'Bob', 'US'), "
+        "(3, 'Carol', 'US')"
+    )
+
+    duck = DBAPIConnection(duckdb.connect(), alias="duck")
+    duck.raw_execute(
+        "CREATE TABLE orders AS SELECT * FROM "
+        "(VALUES (1, 10), (1, 5), (2, 20), (4, 1)) t(customer_id, amount)"
+    )
+
+    yield {"lite": lite, "duck": duck}
+
+    lite.close()
+    duck.close()
+    catalog_cache.clear()
+
+
+def test_plan_pushes_down_columns_and_filters(connections):
+    query, sources = federate.plan(
+        """
+        SELECT c.name, o.amount
+        FROM lite.customers c
+        JOIN duck.orders o ON c.id = o.customer_id
+        WHERE o.amount > 5 AND c.country = 'US' AND o.amount > c.id
+        """,
+        connections["duck"],
+        connections,
+    )
+    customers, orders = sources
+
+    assert customers.conn is connections["lite"]
+    # columns in the filters are fetched since the filters are also applied in DuckDB
+    assert customers.to_sql() == (
+        'SELECT "c"."id", "c"."name", "c"."country" FROM customers AS c '
+        "WHERE c.\"country\" = 'US'"
+    )
+    assert orders.conn is connections["duck"]
+    assert orders.to_sql() == (
+        'SELECT "o"."customer_id", "o"."amount" FROM orders AS o '
+        'WHERE o."amount" > 5'
+    )
+    assert "jupysql_federated_0 AS c" in query.sql()
+
+
+def test_plan_does_not_push_filters_to_outer_joined_tables(connections):
+    _, (customers, orders) = federate.plan(
+        """
+        SELECT * FROM lite.customers c
+        LEFT JOIN duck.orders o ON c.id = o.customer_id
+        WHERE o.amount IS NULL AND c.id > 1
+        """,
+        connections["duck"],
+        connections,
+    )
+
+    assert customers.filters
+    assert not orders.filters
+
+
+def test_plan_uses_current_connection_for_unqualified_tables(connections):
+    _, (orders,) = federate.plan(
+        "SELECT COUNT(*) FROM orders", connections["duck"], connections
+    )
+
+    assert orders.conn is connections["duck"]
+    # no columns are needed, but we need the number of rows
+    assert orders.to_sql() == 'SELECT "orders"."customer_id" FROM orders AS orders'
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        [
+            """
+            SELECT c.name, SUM(o.amount) AS total
+            FROM lite.customers c
+            JOIN duck.orders o ON c.id = o.customer_id
+            WHERE o.amount > 5
+            GROUP BY c.name
+            ORDER BY c.name
+            """,
+            [("Alice", 10), ("Bob", 20)],
+        ],
+        [
+            """
+            SELECT c.name FROM lite.customers c
+            LEFT JOIN duck.orders o ON c.id = o.customer_id
+            WHERE o.amount IS NULL
+            """,
+            [("Carol",)],
+        ],
+        [
+            """
+            WITH big AS (SELECT * FROM duck.orders WHERE amount >= 10)
+            SELECT name FROM big JOIN lite.customers ON big.customer_id = customers.id
+            ORDER BY name
+            """,
+            [("Alice",), ("Bob",)],
+        ],
+        [
+            "SELECT COUNT(*) FROM lite.customers WHERE country = 'Mars'",
+            [(0,)],
+        ],
+    ],
+)
+def test_run_statements(connections, sql, expected):
+    result = federate.run_statements(connections["duck"], sql, Config, connections)
+
+    assert [tuple(row) for row in result] == expected
+
+
+def test_fetch_in_batches(connections, monkeypatch):
+    monkeypatch.setattr(federate, "FETCH_BATCH_SIZE", 1)
+
+    result = federate.run_statements(
+        connections["duck"],
+        "SELECT name FROM lite.customers ORDER BY id",
+        Config,
+        connections,
+    )
+
+    assert list(result) == [("Alice",), ("Bob",), ("Carol",)]
+
+
+def test_fetch_in_batches_with_different_types(connections, monkeypatch):
+    monkeypatch.setattr(federate, "FETCH_BATCH_SIZE", 1)
+    connections["lite"].raw_execute("CREATE TABLE measures (value)")
+    connections["lite"].raw_execute("INSERT INTO measures VALUES (1), (NULL), (2.5)")
+
+    result = federate.run_statements(
+        connections["duck"],
+        "SELECT value FROM lite.measures",
+        Config,
+        connections,
+    )
+
+    assert list(result) == [(1,), (None,), (2.5,)]
+
+
+@pytest.mark.parametrize(
+    "sql, message",
+    [
+        ["SELECT 1", "found no tables"],
+        ["SELECT * FROM duck.orders; SELECT 1", "only supports a single statement"],
+        [
+            "SELECT * FROM duck.orders WHERE amount > :amount",
+            "does not support query parameters",
+        ],
+    ],
+)
+def test_run_statements_errors(connections, sql, message):
+    with pytest.raises(UsageError, match=message):
+        federate.run_statements(connections["duck"], sql, Config, connections)
+
+
+def test_federate(ip_empty, tmp_path):
+    ip_empty.run_cell(f"%sql sqlite:///{tmp_path / 'my.db'} --alias lite")
+    ip_empty.run_cell("%sql CREATE TABLE customers (id INT, name TEXT)")
+    ip_empty.run_cell("%sql INSERT INTO customers VALUES (1, 'Alice'), (2, 'Bob')")
+    ip_empty.run_cell("%sql duckdb:// --alias duck")
+    ip_empty.run_cell("%sql CREATE TABLE orders AS SELECT 2 AS customer_id")
+
+    result = ip_empty.run_cell(
+        """%%sql --federate
+SELECT name FROM orders JOIN lite.customers ON customer_id = id
+"""
+    ).result
+
+    assert list(result) == [("Bob",)]
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ["--async", "--async"],
+        ["--stream", "--stream"],
+        ["--cache", "--cache"],
+        ["--timeout 10", "--timeout"],
+        ["--yield-per 10", "--yield-per"],
+        ["--stream --cache", "--stream, --cache"],
+    ],
+)
+def test_federate_unsupported_options(ip_empty, options, message):
+    ip_empty.run_cell("%sql duckdb:// --alias duck")
+    ip_empty.run_cell("%sql CREATE TABLE orders AS SELECT 1 AS id")
+
+    with pytest.raises(UsageError, match=f"--federate cannot be used with {message}"):
+        ip_empty.run_cell(f"%sql --federate {options} SELECT * FROM duck.orders")
@@ -372,6 +372,37 @@ def test_fetch_sql_with_pagination_with_sort(
     assert columns == expected_columns
 
 
+def test_estimate_row_count_sqlite(ip):
+    assert inspect.estimate_row_count("number_table") is None
+
+    ip.run_cell("%sql ANALYZE")
+
+    assert inspect.estimate_row_count("number_table") == 10
+    assert inspect.estimate_row_count('"number_table"') == 10
+    assert inspect.estimate_row_count("number_table", schema="main") == 10
+    assert inspect.estimate_row_count("missing_table") is None
+
+
+def test_estimate_row_count_duckdb(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%sql CREATE SCHEMA s")
+    ip_empty.run_cell("%sql CREATE TABLE s.numbers AS SELECT * FROM range(100)")
+
+    assert inspect.estimate_row_count("numbers", schema="s") == 100
+    assert inspect.estimate_row_count("s.numbers") == 100
+    assert inspect.estimate_row_count("numbers") is None
+
+
+def test_estimate_row_count_unsupported_dialect(ip, monkeypatch):
+    conn = connection.ConnectionManager.current
+    raw_execute = Mock(wraps=conn.raw_execute)
+    monkeypatch.setattr(conn, "raw_execute", raw_execute)
+    monkeypatch.setattr(type(conn), "dialect", "snowflake")
+
+    assert inspect.estimate_row_count("number_table") is None
+    raw_execute.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "table, expected_result",
     [
@@ -341,6 +341,23 @@ def test_append(ip):
     assert appended[0][0] == persisted[0][0] * 2
 
 
+def test_persist_with_chunksize(ip):
+    ip.run_cell("results = %sql SELECT * FROM test;")
+    ip.run_cell("results_dframe = results.DataFrame()")
+    ip.run_cell("%sql --persist sqlite:// results_dframe --chunksize 1")
+    persisted = runsql(ip, "SELECT * FROM results_dframe")
+    assert persisted == [(0, 1, "foo"), (1, 2, "bar")]
+
+
+def test_persist_invalid_chunksize(ip):
+    ip.run_cell("results_dframe = %sql SELECT * FROM test;")
+
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell("%sql --persist sqlite:// results_dframe --chunksize 0")
+
+    assert "--chunksize must be a positive integer" in str(excinfo.value)
+
+
 def test_persist_missing_argument(ip):
     with pytest.raises(UsageError) as excinfo:
         ip.run_cell("%sql --persist sqlite://")
@@ -1130,6 +1147,146 @@ def test_pass_existing_engine(ip, tmp_empty):
     assert result == [(10, "foo"), (20, "bar")]
 
 
+def test_stream(ip):
+    batches = ip.run_line_magic("sql", "--stream 4 SELECT * FROM number_table")
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_stream_default_batch_size(ip):
+    ip.run_cell("%%sql --stream\nbatches << SELECT * FROM number_table")
+
+    assert [len(batch) for batch in ip.user_ns["batches"]] == [10]
+
+
+def test_stream_autopandas(ip):
+    ip.run_line_magic("config", "SqlMagic.autopandas = True")
+    batches = list(ip.run_line_magic("sql", "--stream 6 SELECT * FROM number_table"))
+
+    assert [type(batch) for batch in batches] == [pd.DataFrame, pd.DataFrame]
+    assert pd.concat(batches).to_dict(orient="list") == {
+        "x": [4, -5, 2, 0, -5, -2, -2, -4, 2, 4],
+        "y": [-2, 0, 4, 2, -1, -3, -3, 2, -5, 3],
+    }
+
+
+def test_yield_per(ip):
+    result = ip.run_line_magic("sql", "--yield-per 3 SELECT * FROM number_table")
+
+    assert result.sqlaproxy.context.execution_options["yield_per"] == 3
+    assert len(list(result)) == 10
+
+
+def test_yield_per_config(ip):
+    ip.run_line_magic("config", "SqlMagic.yield_per = 4")
+    result = ip.run_line_magic("sql", "SELECT * FROM number_table")
+
+    assert result.sqlaproxy.context.execution_options["yield_per"] == 4
+    assert len(list(result)) == 10
+
+
+def test_yield_per_invalid_value(ip, caplog):
+    with caplog.at_level(logging.ERROR):
+        ip.run_line_magic("config", "SqlMagic.yield_per = -1")
+
+    assert "yield_per cannot be a negative integer" in caplog.text
+
+
+@pytest.mark.parametrize("value", [0, -1])
+def test_concurrent_queries_invalid_value(ip, caplog, value):
+    with caplog.at_level(logging.ERROR):
+        ip.run_line_magic("config", f"SqlMagic.concurrent_queries = {value}")
+
+    assert "concurrent_queries must be a positive integer" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "option",
+    [
+        "catalog_cache_ttl",
+        "result_cache_max_memory",
+        "result_cache_ttl",
+        "statement_timeout",
+    ],
+)
+def test_result_cache_options_invalid_value(ip, caplog, option):
+    with caplog.at_level(logging.ERROR):
+        ip.run_line_magic("config", f"SqlMagic.{option} = -1")
+
+    assert f"{option} cannot be a negative integer" in caplog.text
+
+
+def test_result_cache_invalidated_by_persist(ip):
+    ip.run_line_magic("config", "SqlMagic.result_cache = True")
+    ip.run_cell("import pandas as pd; df = pd.DataFrame({'x': [1]})")
+    ip.run_cell("%sql --persist df")
+    ip.run_line_magic("sql", "SELECT x FROM df")
+
+    ip.run_cell("df = pd.DataFrame({'x': [2]})")
+    ip.run_cell("%sql --persist-replace df")
+    result = ip.run_line_magic("sql", "SELECT x FROM df")
+
+    assert list(result) == [(2,)]
+
+
+def test_catalog_cache_invalidated_by_persist(ip):
+    ip.run_cell("import pandas as pd; new_table = pd.DataFrame({'x': [1]})")
+    assert "new_table" not in ip.run_cell("%sqlcmd tables").result._table_txt
+
+    ip.run_cell("%sql --persist new_table")
+
+    assert "new_table" in ip.run_cell("%sqlcmd tables").result._table_txt
+
+
+def test_async(ip_empty, tmp_path):
+    ip_empty.run_cell(f"%sql duckdb:///{tmp_path / 'my.db'}")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT range AS x FROM range(5)")
+
+    future = ip_empty.run_cell("%sql --async numbers << SELECT * FROM numbers").result
+    result = future.result(timeout=60)
+
+    assert isinstance(result, ResultSet)
+    assert [row[0] for row in result] == [0, 1, 2, 3, 4]
+    assert ip_empty.user_ns["numbers"] is result
+    assert future.status == "finished"
+    assert future.rows_fetched == 5
+
+
+def test_async_with_in_memory_database(ip):
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell("%sql --async SELECT * FROM test")
+
+    assert "in-memory database" in str(excinfo.value)
+
+
+def test_timeout(ip):
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell(
+            "%sql --timeout 1 WITH RECURSIVE r(x) AS "
+            "(SELECT 1 UNION ALL SELECT x + 1 FROM r) SELECT COUNT(*) FROM r"
+        )
+
+    assert "The query was cancelled after 1 seconds" in str(excinfo.value)
+
+
+def test_timeout_negative_value(ip):
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell("%sql --timeout -1 SELECT * FROM test")
+
+    assert "--timeout cannot be a negative integer" in str(excinfo.value)
+
+
+def test_cache(ip, tmp_path):
+    ip.run_cell(f"%config SqlMagic.cache_dir = '{tmp_path}'")
+    ip.run_cell("%sql --cache SELECT * FROM test")
+    ip.run_cell("%sql DELETE FROM test")
+
+    result = ip.run_line_magic("sql", "--cache SELECT * FROM test")
+
+    assert result == [(1, "foo"), (2, "bar")]
+    assert len(list(tmp_path.glob("*.arrow"))) == 1
+
+
 # there's some weird shared state with this one, moving it to the end
 def test_autolimit(ip):
     # test table has two rows
@@ -1148,6 +1305,33 @@ def test_autolimit(ip):
     assert len(result) == 1
 
 
+def test_autolimit_with_named_parameters(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%config SqlMagic.autolimit = 3")
+    ip_empty.run_cell("%config SqlMagic.named_parameters = 'enabled'")
+    ip_empty.run_cell("%sql CREATE TABLE t AS SELECT range AS x FROM range(10)")
+    ip_empty.run_cell("val = 2")
+
+    result = ip_empty.run_cell("%sql SELECT * FROM t WHERE x > :val ORDER BY x").result
+
+    assert list(result) == [(3,), (4,), (5,)]
+
+
+def test_autolimit_applies_after_qualify(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%config SqlMagic.autolimit = 2")
+    ip_empty.run_cell(
+        "%sql CREATE TABLE t AS SELECT range % 3 AS g, range AS x FROM range(9)"
+    )
+
+    result = ip_empty.run_cell(
+        "%sql SELECT * FROM t "
+        "QUALIFY ROW_NUMBER() OVER (PARTITION BY g ORDER BY x DESC) = 1 ORDER BY g"
+    ).result
+
+    assert list(result) == [(0, 6), (1, 7)]
+
+
 invalid_connection_string = f"""
 No active connection.
 
@@ -1582,6 +1766,35 @@ def test_error_suggests_turning_feature_on_if_it_detects_named_params(ip):
     assert suggestion in str(excinfo.value)
 
 
+def test_named_parameters_prefer_local_variables(ip):
+    ip.run_cell("%config SqlMagic.named_parameters = 'enabled'")
+    ip.run_cell("x = 1")
+    ip.run_cell(
+        """
+def query():
+    x = 2
+    result = %sql SELECT :x AS x
+    return result
+"""
+    )
+
+    assert ip.run_cell("query()").result.dict() == {"x": (2,)}
+    assert ip.run_cell("%sql SELECT :x AS x").result.dict() == {"x": (1,)}
+
+
+def test_named_parameters_only_binds_variables_in_the_query(ip, monkeypatch):
+    conn = ConnectionManager.current
+    execute = Mock(wraps=conn._execute_with_parameters)
+    monkeypatch.setattr(conn, "_execute_with_parameters", execute)
+    ip.run_cell("%config SqlMagic.named_parameters = 'enabled'")
+    ip.run_cell("x = 1")
+
+    ip.run_cell("%sql SELECT :x AS x")
+    ip.run_cell("%sql SELECT 1 AS y")
+
+    assert [c.args[1] for c in execute.call_args_list] == [{"x": 1}, None]
+
+
 @pytest.mark.parametrize(
     "cell, expected_warning",
     [
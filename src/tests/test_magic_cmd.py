@@ -1,10 +1,11 @@
 import math
+from unittest.mock import Mock
 import pytest
 from IPython.core.error import UsageError
 from pathlib import Path
 
 from sqlalchemy import create_engine
-from sql.connection import SQLAlchemyConnection
+from sql.connection import ConnectionManager, SQLAlchemyConnection
 from sql.inspect import _is_numeric
 from sql.display import Table, Message
 from sql.widgets import TableWidget
@@ -14,7 +15,8 @@ import sqlite3
 
 
 VALID_COMMANDS_MESSAGE = (
-    "Valid commands are: tables, columns, test, profile, explore, snippets, connect"
+    "Valid commands are: tables, columns, test, profile, explore, snippets, connect, "
+    "cache"
 )
 
 
@@ -650,6 +652,55 @@ def test_table_profile_warnings_styles(ip_with_connections, tmp_empty, conn):
     assert "Following statistics are not available in" in stats_table_html
 
 
+@pytest.mark.parametrize(
+    "conn, n_queries",
+    [
+        # the numeric statistics (std and percentiles) are skipped on sqlite
+        ("sqlite_sqlalchemy", 5),
+        ("duckdb_sqlalchemy", 6),
+    ],
+)
+def test_table_profile_runs_a_query_per_categorical_column(
+    ip_with_connections, tmp_empty, monkeypatch, conn, n_queries
+):
+    ip_with_connections.run_cell(
+        f"""
+    %%sql {conn}
+    CREATE TABLE numbers (rating float, price float, word varchar(50), other text);
+    INSERT INTO numbers VALUES (14.44, 2.48, 'a', 'x');
+    INSERT INTO numbers VALUES (13.13, 1.50, 'b', 'x');
+    INSERT INTO numbers VALUES (12.59, 0.20, 'a', 'y');
+    """
+    )
+    conn = ConnectionManager.current
+    raw_execute = Mock(wraps=conn.raw_execute)
+    monkeypatch.setattr(conn, "raw_execute", raw_execute)
+
+    out = ip_with_connections.run_cell("%sqlcmd profile -t numbers").result
+
+    # check the table exists, first row, aggregates, numeric aggregates, and the
+    # most frequent values
+    assert raw_execute.call_count == n_queries
+    assert "LIMIT 1" in raw_execute.call_args_list[-1][0][0]
+    assert _get_row_string(out._table[2], "word") == "a"
+    assert _get_row_string(out._table[3], "other") == "2"
+
+
+def test_table_profile_empty_table(ip_with_connections, tmp_empty):
+    ip_with_connections.run_cell(
+        """
+    %%sql duckdb_sqlalchemy
+    CREATE TABLE empty_numbers (rating float, word varchar(50));
+    """
+    )
+
+    out = ip_with_connections.run_cell("%sqlcmd profile -t empty_numbers").result
+
+    assert _get_row_string(out._table[0], " ") == "count"
+    assert _get_row_string(out._table[0], "rating") == "0"
+    assert _get_row_string(out._table[0], "word") == "0"
+
+
 def test_profile_is_numeric():
     assert _is_numeric("123") is True
     assert _is_numeric(None) is False
@@ -1128,3 +1179,38 @@ def test_connect_when_no_connections_ini(tmp_empty, ip_empty):
     connector_widget = ip_empty.run_cell("%sqlcmd connect").result
     assert isinstance(connector_widget, ConnectorWidget)
     assert connector_widget.stored_connections == []
+
+
+def test_cache_lists_cached_results(ip):
+    ip.run_cell("%sqlcmd cache --clear")
+    ip.run_cell("%config SqlMagic.result_cache = True")
+    ip.run_cell("%sql SELECT * FROM number_table")
+    ip.run_cell("%sql SELECT * FROM number_table")
+
+    out = ip.run_cell("%sqlcmd cache").result
+
+    assert isinstance(out, Table)
+    assert "select * from number_table" in str(out)
+    assert out._rows[0][2] == 10
+    assert out._rows[0][5] == 1
+
+
+def test_cache_clear(ip):
+    ip.run_cell("%config SqlMagic.result_cache = True")
+    ip.run_cell("%sql SELECT * FROM number_table")
+
+    out = ip.run_cell("%sqlcmd cache --clear").result
+
+    assert isinstance(out, Message)
+    assert str(out) == "Removed 1 result(s) from the cache"
+    assert str(ip.run_cell("%sqlcmd cache").result) == "The result cache is empty"
+
+
+def test_cache_clear_disk(ip, tmp_path):
+    ip.run_cell(f"%config SqlMagic.cache_dir = '{tmp_path}'")
+    ip.run_cell("%sql --cache SELECT * FROM number_table")
+
+    out = ip.run_cell("%sqlcmd cache --clear-disk").result
+
+    assert str(out) == f"Removed 1 result(s) from {tmp_path}"
+    assert list(tmp_path.iterdir()) == []
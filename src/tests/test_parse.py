@@ -3,6 +3,7 @@ from pathlib import Path
 
 
 import pytest
+import sqlparse
 from IPython.core.error import UsageError
 
 from sql.parse import (
@@ -14,6 +15,7 @@ from sql.parse import (
     escape_string_literals_with_colon_prefix,
     escape_string_slicing_notation,
     find_named_parameters,
+    split_statements,
     _connection_string,
     ConnectionsFile,
 )
@@ -299,6 +301,15 @@ def complete_with_defaults(mapping):
         "connection_arguments": None,
         "file": None,
         "interact": None,
+        "stream": None,
+        "yield_per": None,
+        "partition_on": None,
+        "partitions": None,
+        "federate": False,
+        "chunksize": None,
+        "timeout": None,
+        "async_": False,
+        "cache": False,
         "save": None,
         "with_": None,
         "no_execute": False,
@@ -721,6 +732,72 @@ def test_find_named_parameters(query, expected):
     assert find_named_parameters(query) == expected
 
 
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT 1",
+        "SELECT 1; -- comment",
+        "-- comment before\nSELECT 1;\n-- comment after",
+        "SELECT 1; -- comment before\nSELECT 2;\n-- comment after",
+        "/* select all\nnumbers */\nSELECT * FROM t WHERE x > 0;\n--some comment\n\n",
+        "SELECT a--comment\nFROM t",
+        "SELECT 1/**/FROM t",
+        "SELECT 'a;b', \"c;d\", `e;f` FROM t; SELECT 2",
+        "SELECT 'it''s', '-- not a comment'; SELECT 2  \r\n",
+        "SELECT $$a;b$$; SELECT 1",
+        "SELECT * FROM t WHERE x IN (SELECT 1; SELECT 2)",
+        "SELECT 1 # comment\nFROM t",
+        "CREATE FUNCTION f() RETURNS INT BEGIN SELECT 1; RETURN 1; END; SELECT 2",
+    ],
+)
+def test_split_statements_matches_sqlparse(sql):
+    statements = [
+        sqlparse.format(statement, strip_comments=True)
+        for statement in sqlparse.split(sql)
+    ]
+
+    assert split_statements(sql) == [
+        statement.strip() for statement in statements if statement
+    ]
+
+
+def test_split_statements_named_parameters():
+    (statement,) = split_statements(
+        "SELECT * FROM t WHERE x = :x AND y::int = :y AND z = ':z' AND w = 'a :w' "
+        "AND s = 'abc'[1:2] -- :comment"
+    )
+
+    assert statement.named_parameters == ["x", "y", "w"]
+    assert statement.quoted_named_parameters == ["z"]
+    assert statement.escaped == (
+        "SELECT * FROM t WHERE x = :x AND y::int = :y AND z = '\\:z' "
+        "AND w = 'a :w' AND s = 'abc'[1\\:2]"
+    )
+    assert statement.escaped.named_parameters == ["x", "y", "w"]
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT 1", "select"),
+        ("-- comment\n  From t", "from"),
+        ("\\dt", "\\dt"),
+    ],
+)
+def test_split_statements_first_word(sql, expected):
+    (statement,) = split_statements(sql)
+    assert statement.first_word == expected
+
+
+def test_split_statements_returns_strings():
+    (statement,) = split_statements("SELECT 1")
+
+    assert isinstance(statement, str)
+    assert statement.escaped is statement
+    # transformations return plain strings without the lexer results
+    assert type(statement + " LIMIT 1") is str
+
+
 @pytest.mark.parametrize(
     "content, expected",
     [
@@ -0,0 +1,244 @@
+import datetime
+from decimal import Decimal
+
+import duckdb
+import pandas as pd
+import polars as pl
+import pytest
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine
+
+from sql.connection import DBAPIConnection, SQLAlchemyConnection
+from sql.connection import connection as connection_module
+from sql.run import partition
+
+
+@pytest.fixture
+def conn_concurrent(tmp_path, monkeypatch):
+    # a SQLite file behaves like a server database: each connection in the pool
+    # sees the same data
+    monkeypatch.setattr(connection_module, "_NO_CONCURRENCY_DIALECTS", set())
+    conn = SQLAlchemyConnection(
+        create_engine(f"sqlite:///{tmp_path / 'my.db'}"), alias="partition-test"
+    )
+    conn.raw_execute("CREATE TABLE numbers (id INT, name TEXT)")
+    conn.raw_execute(
+        "INSERT INTO numbers VALUES "
+        + ", ".join(f"({i}, 'n{i}')" for i in range(1, 101))
+        + ", (NULL, 'null')"
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "low, high, partitions, expected",
+    [
+        (1, 100, 4, [1, 26, 51, 76, 100]),
+        (1, 3, 8, [1, 2, 3]),
+        (5, 5, 4, [5, 5]),
+        (0.0, 1.0, 2, [0.0, 0.5, 1.0]),
+        (Decimal("0"), Decimal("3"), 3, [0, 1, 2, 3]),
+        (
+            datetime.date(2023, 1, 1),
+            datetime.date(2023, 1, 3),
+            4,
+            [
+                datetime.date(2023, 1, 1),
+                datetime.date(2023, 1, 2),
+                datetime.date(2023, 1, 3),
+            ],
+        ),
+        (
+            datetime.datetime(2023, 1, 1),
+            datetime.datetime(2023, 1, 1, 12),
+            2,
+            [
+                datetime.datetime(2023, 1, 1),
+                datetime.datetime(2023, 1, 1, 6),
+                datetime.datetime(2023, 1, 1, 12),
+            ],
+        ),
+    ],
+)
+def test_split_range(low, high, partitions, expected):
+    assert partition.split_range(low, high, partitions) == expected
+
+
+def test_split_range_unsupported_type():
+    with pytest.raises(UsageError, match="must be numeric or a date"):
+        partition.split_range("a", "z", 2)
+
+
+def test_partition_queries():
+    queries = partition.partition_queries(
+        "SELECT * FROM events;",
+        "created at",
+        [datetime.date(2023, 1, 1), datetime.date(2023, 2, 1)],
+        dialect="postgres",
+    )
+
+    subquery = "SELECT * FROM (SELECT * FROM events) AS jupysql_partition WHERE "
+    assert queries == [
+        subquery + "\"created at\" >= CAST('2023-01-01' AS DATE) "
+        "AND \"created at\" <= CAST('2023-02-01' AS DATE)",
+        subquery + '"created at" IS NULL',
+    ]
+
+
+def test_read_runs_partitions_in_pooled_connections(conn_concurrent, monkeypatch):
+    queries = []
+    fetch_partition = partition._fetch_partition
+
+    def _fetch_partition(conn, query, parameters=None):
+        queries.append((conn._connection, query))
+        return fetch_partition(conn, query, parameters)
+
+    monkeypatch.setattr(partition, "_fetch_partition", _fetch_partition)
+
+    table = partition.read(
+        conn_concurrent, "SELECT * FROM numbers WHERE id > 10", "id", partitions=3
+    )
+
+    assert sorted(table.column("id").to_pylist()) == list(range(11, 101))
+    # three ranges plus the NULL partition (empty, since id > 10 filters them)
+    assert len(queries) == 4
+    assert conn_concurrent._connection not in {connection for connection, _ in queries}
+
+
+def test_read_includes_nulls(conn_concurrent):
+    table = partition.read(conn_concurrent, "SELECT * FROM numbers", "id", 2)
+
+    assert table.num_rows == 101
+    assert table.column("id").null_count == 1
+
+
+def test_read_with_parameters(conn_concurrent):
+    table = partition.read(
+        conn_concurrent,
+        "SELECT * FROM numbers WHERE id <= :max_id",
+        "id",
+        partitions=2,
+        parameters={"max_id": 5},
+    )
+
+    assert sorted(table.column("id").to_pylist()) == [1, 2, 3, 4, 5]
+
+
+def test_read_dbapi_connection(monkeypatch):
+    conn = DBAPIConnection(duckdb.connect(), alias="partition-duckdb")
+    conn.raw_execute(
+        "CREATE TABLE events AS SELECT range AS id, "
+        "DATE '2023-01-01' + CAST(range AS INT) AS day FROM range(10)"
+    )
+    monkeypatch.setattr(conn, "_supports_concurrency", lambda: True)
+
+    table = partition.read(conn, "SELECT * FROM events", "day", partitions=3)
+
+    assert sorted(table.column("id").to_pylist()) == list(range(10))
+    conn.close()
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "duckdb://"])
+def test_read_without_concurrency_runs_the_query_once(url, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine(url), alias="partition-serial")
+    conn.raw_execute("CREATE TABLE numbers (id INT)")
+    conn.raw_execute("INSERT INTO numbers VALUES (1), (2), (3)")
+    queries = []
+    fetch_partition = partition._fetch_partition
+
+    def _fetch_partition(conn, query, parameters=None):
+        queries.append(query)
+        return fetch_partition(conn, query, parameters)
+
+    monkeypatch.setattr(partition, "_fetch_partition", _fetch_partition)
+
+    table = partition.read(conn, "SELECT * FROM numbers", "id", partitions=3)
+
+    assert sorted(table.column("id").to_pylist()) == [1, 2, 3]
+    assert len(queries) == 1
+    conn.close()
+
+
+def test_read_empty_result(conn_concurrent):
+    table = partition.read(
+        conn_concurrent, "SELECT * FROM numbers WHERE id > 1000", "id", 2
+    )
+
+    assert table.column_names == ["id", "name"]
+    assert table.num_rows == 0
+
+
+def test_read_with_limit(conn_concurrent):
+    with pytest.raises(UsageError, match="LIMIT or OFFSET"):
+        partition.read(conn_concurrent, "SELECT * FROM numbers LIMIT 10", "id", 2)
+
+
+def test_read_with_order_by(conn_concurrent):
+    with pytest.raises(UsageError, match="ORDER BY"):
+        partition.read(conn_concurrent, "SELECT * FROM numbers ORDER BY id", "id", 2)
+
+
+@pytest.mark.parametrize(
+    "method, data_frame_type",
+    [
+        ("DataFrame", pd.DataFrame),
+        ("PolarsDataFrame", pl.DataFrame),
+    ],
+)
+def test_resultset_partition_on(ip_empty, method, data_frame_type):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT range AS id FROM range(10)")
+    result = ip_empty.run_cell("%sql SELECT * FROM numbers").result
+
+    df = getattr(result, method)(partition_on="id", partitions=3)
+
+    assert isinstance(df, data_frame_type)
+    assert sorted(df["id"].to_list()) == list(range(10))
+
+
+def test_resultset_partition_on_ignores_autolimit(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%config SqlMagic.autolimit = 5")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT range AS id FROM range(10)")
+    result = ip_empty.run_cell("%sql SELECT * FROM numbers").result
+
+    df = result.DataFrame(partition_on="id", partitions=3)
+
+    assert len(result) == 5
+    assert sorted(df["id"].to_list()) == list(range(10))
+
+
+def test_resultset_invalid_partitions(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    result = ip_empty.run_cell("%sql SELECT 1 AS id").result
+
+    with pytest.raises(UsageError, match="positive integer"):
+        result.DataFrame(partition_on="id", partitions=0)
+
+
+def test_partition_on(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT range AS id FROM range(10)")
+
+    df = ip_empty.run_cell(
+        "%sql --partition-on id --partitions 4 SELECT * FROM numbers"
+    ).result
+
+    assert isinstance(df, pd.DataFrame)
+    assert sorted(df["id"].to_list()) == list(range(10))
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [
+        ("--partitions 2 SELECT 1", "--partitions requires --partition-on"),
+        ("--partition-on id --partitions 0 SELECT 1", "positive integer"),
+        ("--partition-on id --stream SELECT 1", "cannot be used with --stream"),
+    ],
+)
+def test_partition_on_invalid_arguments(ip_empty, line, message):
+    ip_empty.run_cell("%sql duckdb://")
+
+    with pytest.raises(UsageError, match=message):
+        ip_empty.run_cell(f"%sql {line}")
@@ -1,12 +1,16 @@
 from typing import Iterator
 from collections.abc import Mapping
+from unittest.mock import Mock
 
 import numpy as np
 from matplotlib import cbook
 from sql import plot
-from sql.connection import ConnectionManager
+from sql.stats import _summary_stats
+from sql.connection import ConnectionManager, SQLAlchemyConnection
 from pathlib import Path
 import pytest
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine
 from sqlalchemy.exc import OperationalError
 import matplotlib
 
@@ -89,6 +93,119 @@ def test_boxplot_stats_exception(chinook_db, ip_empty):
         )
 
 
+@pytest.fixture
+def duckdb_numbers():
+    conn = SQLAlchemyConnection(create_engine("duckdb://"), alias="boxplot")
+    conn.raw_execute("CREATE TABLE numbers (x DOUBLE)")
+    conn.raw_execute(
+        "INSERT INTO numbers VALUES "
+        "(-20), (0), (1), (1), (1), (2), (2), (3), (30), (40)"
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        [
+            {},
+            {
+                "q1": 1.0,
+                "med": 1.0,
+                "q3": 3.0,
+                "whislo": 0.0,
+                "whishi": 3.0,
+                "fliers": [-20.0, 30.0, 40.0],
+            },
+        ],
+        [
+            {"whis": 15},
+            {
+                "q1": 1.0,
+                "med": 1.0,
+                "q3": 3.0,
+                "whislo": -20.0,
+                "whishi": 30.0,
+                "fliers": [40.0],
+            },
+        ],
+        [
+            {"whis": (0, 100)},
+            {
+                "q1": 1.0,
+                "med": 1.0,
+                "q3": 3.0,
+                "whislo": -20.0,
+                "whishi": 40.0,
+                "fliers": [],
+            },
+        ],
+    ],
+    ids=["default", "whis", "whis-percentiles"],
+)
+def test_boxplot_stats_queries(duckdb_numbers, monkeypatch, kwargs, expected):
+    execute = Mock(wraps=duckdb_numbers.execute)
+    monkeypatch.setattr(duckdb_numbers, "execute", execute)
+
+    result = plot._boxplot_stats(duckdb_numbers, "numbers", "x", **kwargs)
+
+    # one query for the statistics and one for the outliers, without sorting
+    # the table with window functions
+    assert execute.call_count == 2
+    assert all(" OVER " not in call.args[0] for call in execute.call_args_list)
+    assert result["mean"] == 6.0
+    assert {key: result[key] for key in expected if key != "fliers"} == {
+        key: value for key, value in expected.items() if key != "fliers"
+    }
+    assert sorted(result["fliers"]) == expected["fliers"]
+
+
+def test_boxplot_stats_autorange(duckdb_numbers):
+    duckdb_numbers.raw_execute("CREATE TABLE ones (x DOUBLE)")
+    duckdb_numbers.raw_execute("INSERT INTO ones VALUES (0), (1), (1), (1), (1), (5)")
+
+    result = plot._boxplot_stats(duckdb_numbers, "ones", "x", autorange=True)
+
+    assert result["iqr"] == 0
+    assert (result["whislo"], result["whishi"]) == (0.0, 5.0)
+    assert len(result["fliers"]) == 0
+
+
+def test_boxplot_stats_max_fliers(duckdb_numbers):
+    with pytest.warns(UserWarning, match="more than 2 outliers"):
+        result = plot._boxplot_stats(duckdb_numbers, "numbers", "x", max_fliers=2)
+
+    assert len(result["fliers"]) == 2
+    assert set(result["fliers"]) <= {-20.0, 30.0, 40.0}
+    assert (result["whislo"], result["whishi"]) == (0.0, 3.0)
+
+
+def test_boxplot_stats_column_name_like_statistic(duckdb_numbers):
+    duckdb_numbers.raw_execute("CREATE TABLE q (q1 DOUBLE)")
+    duckdb_numbers.raw_execute("INSERT INTO q VALUES (1), (2), (3), (4), (100)")
+
+    result = plot._boxplot_stats(duckdb_numbers, "q", "q1")
+
+    assert (result["whislo"], result["whishi"]) == (1.0, 4.0)
+    assert result["fliers"].tolist() == [100.0]
+
+
+@pytest.mark.parametrize(
+    "values",
+    ["", "(NULL), (NULL)"],
+    ids=["empty", "nulls"],
+)
+def test_boxplot_stats_without_values(duckdb_numbers, values):
+    duckdb_numbers.raw_execute("CREATE TABLE e (x DOUBLE)")
+
+    if values:
+        duckdb_numbers.raw_execute(f"INSERT INTO e VALUES {values}")
+
+    with pytest.raises(UsageError, match="column 'x' from e has no values"):
+        plot._boxplot_stats(duckdb_numbers, "e", "x")
+
+
 def test_summary_stats(chinook_db, ip_empty, tmp_empty):
     Path("data.csv").write_text(
         """\
@@ -108,7 +225,7 @@ x, y
     ip_empty.run_cell("%sql INSTALL 'sqlite_scanner';")
     ip_empty.run_cell("%sql commit")
     ip_empty.run_cell("%sql LOAD 'sqlite_scanner';")
-    result = plot._summary_stats(ConnectionManager.current, "data.csv", column="x")
+    result = _summary_stats(ConnectionManager.current, "data.csv", column="x")
     expected = {"q1": 1.0, "med": 2.0, "q3": 5.0, "mean": 3.4, "N": 5.0}
     assert result == expected
 
@@ -122,7 +239,7 @@ def test_summary_stats_missing_file(chinook_db, ip_empty):
     ip_empty.run_cell("%sql commit")
     ip_empty.run_cell("%sql LOAD 'sqlite_scanner';")
     with pytest.raises(OperationalError) as e:
-        plot._summary_stats(ConnectionManager.current, "data.csv", column="x")
+        _summary_stats(ConnectionManager.current, "data.csv", column="x")
     assert 'No files found that match the pattern "data.csv"' in str(e)
 
 
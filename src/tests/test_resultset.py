@@ -1,4 +1,6 @@
+import datetime
 import string
+from decimal import Decimal
 from unittest.mock import Mock, call
 
 import duckdb
@@ -7,12 +9,17 @@ from pathlib import Path
 
 
 import pytest
+from IPython.core.error import UsageError
 import pandas as pd
 import polars as pl
+import pyarrow as pa
 import sqlalchemy
 
 from sql.connection import DBAPIConnection, SQLAlchemyConnection
+from sql.run import resultset
 from sql.run.resultset import ResultSet
+from sql.run import columnar
+from sql.run.columnar import ArrowResults, concat_tables, get_column_kinds
 from sql.connection.connection import IS_SQLALCHEMY_ONE
 
 import warnings
@@ -322,6 +329,63 @@ def test_convert_to_dataframe_using_native_duckdb(
     assert d == expected_value
 
 
+@pytest.mark.parametrize(
+    "session",
+    [
+        "duckdb_sqlalchemy",
+        "duckdb_dbapi",
+    ],
+)
+@pytest.mark.parametrize(
+    "to_df_method",
+    [
+        "DataFrame",
+        "PolarsDataFrame",
+    ],
+)
+@pytest.mark.parametrize(
+    "prefetch, expected_value",
+    [
+        # the native converter can read the pending results
+        (False, 1),
+        # rows were fetched for the preview, so the query is executed again
+        (True, 2),
+    ],
+)
+def test_convert_to_dataframe_using_native_duckdb_executes_once(
+    session, to_df_method, prefetch, expected_value, request, mock_config
+):
+    session = request.getfixturevalue(session)
+
+    session.execute("CREATE SEQUENCE seq")
+    statement = "SELECT nextval('seq') AS n"
+    results = session.execute(statement)
+
+    rs = ResultSet(
+        results, mock_config, statement=statement, conn=session, prefetch=prefetch
+    )
+    df = getattr(rs, to_df_method)()
+
+    assert list(df["n"]) == [expected_value]
+
+
+def test_convert_to_dataframe_without_prefetch_create_table(
+    sqlite_sqlalchemy, mock_config
+):
+    statement = "CREATE TABLE a (x INT);"
+    results = sqlite_sqlalchemy.execute(statement)
+
+    rs = ResultSet(
+        results,
+        mock_config,
+        statement=statement,
+        conn=sqlite_sqlalchemy,
+        prefetch=False,
+    )
+
+    assert rs.DataFrame().to_dict() == {}
+
+
 def test_done_fetching_if_reached_autolimit(results):
     mock = Mock()
     mock.autolimit = 2
@@ -758,3 +822,329 @@ INSERT INTO Cities VALUES ('US', 'New York City', 2020, 8772);
     }
     expected = getattr(library, "DataFrame")(expected_result)
     assert getattr(result, equal_func)(expected)
+
+
+@pytest.fixture
+def arrow_config():
+    mock = Mock()
+    mock.displaylimit = 2
+    mock.autolimit = 0
+    mock.result_backend = "arrow"
+    yield mock
+
+
+@pytest.fixture
+def arrow_result_set(sqlite_sqlalchemy, arrow_config):
+    sqlite_sqlalchemy.execute("CREATE TABLE a (x INT, y TEXT);")
+    sqlite_sqlalchemy.execute(
+        "INSERT INTO a(x, y) VALUES (1, 'a'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e');"
+    )
+    statement = "SELECT * FROM a"
+    results = sqlite_sqlalchemy.execute(statement)
+    yield ResultSet(results, arrow_config, statement=statement, conn=sqlite_sqlalchemy)
+
+
+def test_arrow_backend_stores_record_batches(arrow_result_set):
+    list(arrow_result_set)
+
+    assert isinstance(arrow_result_set._results, ArrowResults)
+    assert arrow_result_set._results.is_columnar
+    assert arrow_result_set._results.to_arrow().num_rows == 5
+
+
+def test_arrow_backend_list_interface(arrow_result_set):
+    assert len(arrow_result_set) == 5
+    assert arrow_result_set[0] == (1, "a")
+    assert arrow_result_set[-1] == (5, "e")
+    assert arrow_result_set[1:3] == [(2, "b"), (3, "c")]
+    assert arrow_result_set[3] == (4, "d")
+    assert list(arrow_result_set) == [
+        (1, "a"),
+        (2, "b"),
+        (3, "c"),
+        (4, "d"),
+        (5, "e"),
+    ]
+    assert arrow_result_set == [(1, "a"), (2, "b"), (3, "c"), (4, "d"), (5, "e")]
+
+
+def test_arrow_backend_getitem_by_key(arrow_result_set):
+    assert arrow_result_set[1] == (2, "b")
+
+    with pytest.raises(KeyError):
+        arrow_result_set["missing"]
+
+
+def test_arrow_backend_dict_and_dicts(arrow_result_set):
+    assert arrow_result_set.dict() == {
+        "x": (1, 2, 3, 4, 5),
+        "y": ("a", "b", "c", "d", "e"),
+    }
+    assert list(arrow_result_set.dicts())[0] == {"x": 1, "y": "a"}
+
+
+def test_arrow_backend_csv(arrow_result_set):
+    assert arrow_result_set.csv() == "x,y\r\n1,a\r\n2,b\r\n3,c\r\n4,d\r\n5,e\r\n"
+
+
+def test_arrow_backend_data_frame(arrow_result_set):
+    df = arrow_result_set.DataFrame()
+
+    assert df.to_dict(orient="list") == {
+        "x": [1, 2, 3, 4, 5],
+        "y": ["a", "b", "c", "d", "e"],
+    }
+
+
+def test_arrow_backend_polars_data_frame(arrow_result_set):
+    df = arrow_result_set.PolarsDataFrame()
+
+    assert df.frame_equal(
+        pl.DataFrame({"x": [1, 2, 3, 4, 5], "y": ["a", "b", "c", "d", "e"]})
+    )
+
+
+def test_arrow_backend_falls_back_to_tuples_on_mixed_types(
+    sqlite_sqlalchemy, arrow_config
+):
+    sqlite_sqlalchemy.execute("CREATE TABLE mixed (x);")
+    sqlite_sqlalchemy.execute("INSERT INTO mixed(x) VALUES (1), (2), ('three');")
+    statement = "SELECT * FROM mixed"
+    results = sqlite_sqlalchemy.execute(statement)
+    rs = ResultSet(results, arrow_config, statement=statement, conn=sqlite_sqlalchemy)
+
+    assert list(rs) == [(1,), (2,), ("three",)]
+    assert not rs._results.is_columnar
+    assert rs.DataFrame().to_dict(orient="list") == {"x": [1, 2, "three"]}
+
+
+def test_concat_tables_promotes_types():
+    table = concat_tables([pa.table({"x": [1]}), pa.table({"x": [1.5]})])
+
+    assert table.column("x").to_pylist() == [1.0, 1.5]
+
+
+def test_concat_tables_without_promote_options(monkeypatch):
+    # pyarrow < 14 doesn't have the promote_options argument
+    concat = pa.concat_tables
+
+    def concat_tables_legacy(tables, promote=False):
+        return concat(tables, promote_options="default" if promote else "none")
+
+    monkeypatch.setattr(columnar.pa, "concat_tables", concat_tables_legacy)
+
+    table = concat_tables([pa.table({"x": [None]}), pa.table({"x": [1]})])
+
+    assert table.column("x").to_pylist() == [None, 1]
+
+
+@pytest.mark.parametrize(
+    "batch_size, expected",
+    [
+        (2, [[(1,), (2,)], [(3,), (4,)], [(5,)]]),
+        (3, [[(1,), (2,), (3,)], [(4,), (5,)]]),
+        (10, [[(1,), (2,), (3,), (4,), (5,)]]),
+    ],
+)
+def test_iter_batches(results, batch_size, expected):
+    mock = Mock()
+    mock.displaylimit = 100
+    mock.autolimit = 0
+
+    rs = ResultSet(results, mock, statement=None, conn=Mock())
+
+    assert [list(batch) for batch in rs.iter_batches(batch_size=batch_size)] == (
+        expected
+    )
+
+
+def test_iter_batches_does_not_store_rows(results):
+    mock = Mock()
+    mock.displaylimit = 100
+    mock.autolimit = 0
+
+    rs = ResultSet(results, mock, statement=None, conn=Mock())
+    list(rs.iter_batches(batch_size=2))
+
+    # only the rows fetched to show the preview are kept
+    assert rs._results == [(1,), (2,)]
+    results.fetchall.assert_not_called()
+    assert results.fetchmany.call_args_list == [
+        call(size=2),
+        call(size=2),
+        call(size=2),
+    ]
+
+
+def test_iter_batches_respects_autolimit(results):
+    mock = Mock()
+    mock.displaylimit = 100
+    mock.autolimit = 3
+
+    rs = ResultSet(results, mock, statement=None, conn=Mock())
+
+    assert list(rs.iter_batches(batch_size=2)) == [[(1,), (2,)], [(3,)]]
+
+
+@pytest.mark.parametrize(
+    "output, expected_type",
+    [
+        ("pandas", pd.DataFrame),
+        ("polars", pl.DataFrame),
+    ],
+)
+def test_iter_batches_data_frames(results, output, expected_type):
+    mock = Mock()
+    mock.displaylimit = 100
+    mock.autolimit = 0
+    mock.polars_dataframe_kwargs = {}
+
+    rs = ResultSet(results, mock, statement=None, conn=Mock())
+    batches = list(rs.iter_batches(batch_size=3, output=output))
+
+    assert [type(batch) for batch in batches] == [expected_type, expected_type]
+    assert [list(batch["x"]) for batch in batches] == [[1, 2, 3], [4, 5]]
+
+
+def test_iter_batches_consumes_results(results):
+    mock = Mock()
+    mock.displaylimit = 100
+    mock.autolimit = 0
+
+    rs = ResultSet(results, mock, statement=None, conn=Mock())
+    list(rs.iter_batches(batch_size=2))
+
+    # displaying the results is still possible
+    str(rs)
+
+    with pytest.raises(UsageError) as excinfo:
+        list(rs)
+
+    assert "already been consumed" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"batch_size": 0}, "batch_size must be a positive integer"),
+        ({"output": "arrow"}, "'arrow' is not a valid output"),
+    ],
+)
+def test_iter_batches_invalid_arguments(results, kwargs, message):
+    mock = Mock()
+    mock.displaylimit = 100
+    mock.autolimit = 0
+
+    rs = ResultSet(results, mock, statement=None, conn=Mock())
+
+    with pytest.raises(UsageError) as excinfo:
+        rs.iter_batches(**kwargs)
+
+    assert message in str(excinfo.value)
+
+
+class TypedCursor:
+    """A DBAPI cursor with type codes in its description"""
+
+    rowcount = -1
+
+    def __init__(self, description, rows):
+        self.description = description
+        self._rows = rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize(
+    "type_code, expected",
+    [
+        ("NUMBER", "number"),
+        ("STRING", "string"),
+        ("Date", "datetime"),
+        ("bool", "bool"),
+        ("INTERVAL", None),
+        (bool, "bool"),
+        (Decimal, "number"),
+        (str, "string"),
+        (datetime.datetime, "datetime"),
+        (None, None),
+    ],
+)
+def test_get_column_kinds(type_code, expected):
+    cursor = TypedCursor([("x", type_code, None, None, None, None, None)], [])
+    assert get_column_kinds(cursor) == [expected]
+
+
+def test_dataframe_uses_column_types(config):
+    cursor = TypedCursor(
+        [
+            ("amount", "NUMBER", None, None, None, None, None),
+            ("missing", "NUMBER", None, None, None, None, None),
+            ("name", "STRING", None, None, None, None, None),
+            ("mixed", None, None, None, None, None, None),
+            ("name", "STRING", None, None, None, None, None),
+        ],
+        [
+            (Decimal("1.50"), None, "a", 1, "x"),
+            (Decimal("2.25"), None, None, "b", "y"),
+        ],
+    )
+    rs = ResultSet(cursor, config, statement="SELECT 1", conn=Mock())
+
+    df = rs.DataFrame()
+
+    assert list(df.columns) == ["amount", "missing", "name", "mixed", "name"]
+    assert df.dtypes.tolist() == ["object", "float64", "object", "object", "object"]
+    assert df["amount"].tolist() == [Decimal("1.50"), Decimal("2.25")]
+    assert df["mixed"].tolist() == [1, "b"]
+
+
+def test_dataframe_converts_rows_in_batches(config, monkeypatch):
+    monkeypatch.setattr(resultset, "ARROW_FETCH_BATCH_SIZE", 2)
+    cursor = TypedCursor(
+        [
+            ("x", "NUMBER", None, None, None, None, None),
+            ("amount", "NUMBER", None, None, None, None, None),
+            ("mixed", None, None, None, None, None, None),
+        ],
+        [
+            (1, None, 1),
+            (2, None, 2),
+            (3, Decimal("12345678901234567890.12"), "c"),
+            (4, Decimal("0.5"), 4),
+            (5, None, 5),
+        ],
+    )
+    rs = ResultSet(cursor, config, statement="SELECT 1", conn=Mock())
+
+    df = rs.DataFrame()
+
+    assert df.dtypes.tolist() == ["int64", "object", "object"]
+    assert df["x"].tolist() == [1, 2, 3, 4, 5]
+    assert df["amount"].tolist() == [
+        None,
+        None,
+        Decimal("12345678901234567890.12"),
+        Decimal("0.50"),
+        None,
+    ]
+    assert df["mixed"].tolist() == [1, 2, "c", 4, 5]
+
+
+def test_dataframe_without_rows_keeps_column_types(config):
+    cursor = TypedCursor([("x", "NUMBER", None, None, None, None, None)], [])
+    rs = ResultSet(cursor, config, statement="SELECT 1", conn=Mock())
+
+    df = rs.DataFrame()
+
+    assert df.shape == (0, 1)
+    assert df.dtypes.tolist() == ["float64"]
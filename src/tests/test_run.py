@@ -34,6 +34,10 @@ class Config:
     style = "DEFAULT"
     autolimit = 0
     displaylimit = 10
+    result_backend = "list"
+    yield_per = 0
+    statement_timeout = 0
+    result_cache = False
 
 
 class ConfigPandas(Config):
@@ -46,6 +50,10 @@ class ConfigPolars(Config):
     autopolars = True
 
 
+class ConfigYieldPer(Config):
+    yield_per = 2
+
+
 @pytest.fixture
 def pytds_conns(mock_conns):
     mock_conns._dialect = "mssql+pytds"
@@ -144,6 +152,110 @@ def test_run(connection, config, expected_type, sql):
     assert isinstance(out, expected_type)
 
 
+@pytest.mark.parametrize(
+    "connection",
+    [
+        SQLAlchemyConnection(create_engine("duckdb://")),
+        DBAPIConnection(duckdb.connect()),
+    ],
+    ids=[
+        "duckdb-sqlalchemy",
+        "duckdb",
+    ],
+)
+@pytest.mark.parametrize(
+    "config",
+    [
+        ConfigPandas,
+        ConfigPolars,
+    ],
+)
+def test_run_converts_native_duckdb_results_without_executing_again(connection, config):
+    connection.raw_execute("CREATE OR REPLACE SEQUENCE seq")
+
+    out = run_statements(connection, "SELECT nextval('seq') AS n", config)
+
+    assert list(out["n"]) == [1]
+
+
+@pytest.fixture
+def sqlalchemy_numbers(request):
+    conn = SQLAlchemyConnection(create_engine(request.param))
+    conn.raw_execute("CREATE TABLE numbers (x INT)")
+    conn.raw_execute("INSERT INTO numbers VALUES (1), (2), (3), (4), (5)")
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "sqlalchemy_numbers", ["sqlite://", "duckdb://"], indirect=True
+)
+@pytest.mark.parametrize(
+    "config, kwargs, expected_yield_per",
+    [
+        [ConfigYieldPer, {}, 2],
+        [ConfigYieldPer, {"yield_per": 3}, 3],
+        [Config, {"yield_per": 3}, 3],
+    ],
+)
+def test_run_select_with_yield_per(
+    sqlalchemy_numbers, config, kwargs, expected_yield_per
+):
+    result = run_statements(
+        sqlalchemy_numbers, "SELECT * FROM numbers", config, **kwargs
+    )
+
+    options = result.sqlaproxy.context.execution_options
+    assert options["stream_results"] is True
+    assert options["yield_per"] == expected_yield_per
+    assert list(result) == [(1,), (2,), (3,), (4,), (5,)]
+
+
+@pytest.mark.parametrize("sqlalchemy_numbers", ["sqlite://"], indirect=True)
+def test_run_stream_uses_batch_size_as_yield_per(sqlalchemy_numbers):
+    batches = run_statements(
+        sqlalchemy_numbers, "SELECT * FROM numbers", Config, stream=4
+    )
+
+    assert [len(batch) for batch in batches] == [4, 1]
+
+    result_set = list(sqlalchemy_numbers._result_sets)[-1]
+    assert result_set.sqlaproxy.context.execution_options["yield_per"] == 4
+
+
+@pytest.mark.parametrize("sqlalchemy_numbers", ["sqlite://"], indirect=True)
+def test_run_without_yield_per(sqlalchemy_numbers):
+    result = run_statements(sqlalchemy_numbers, "SELECT * FROM numbers", Config)
+
+    assert "stream_results" not in result.sqlaproxy.context.execution_options
+
+
+@pytest.mark.parametrize("sqlalchemy_numbers", ["sqlite://"], indirect=True)
+def test_run_yield_per_ignores_statements_that_do_not_return_rows(
+    sqlalchemy_numbers,
+):
+    run_statements(sqlalchemy_numbers, "CREATE TABLE other (x INT)", ConfigYieldPer)
+
+    result_set = list(sqlalchemy_numbers._result_sets)[-1]
+    assert "stream_results" not in result_set.sqlaproxy.context.execution_options
+
+
+@pytest.mark.parametrize("sqlalchemy_numbers", ["sqlite://"], indirect=True)
+def test_run_pushes_autolimit_to_the_database(sqlalchemy_numbers, monkeypatch):
+    class ConfigAutolimit(Config):
+        autolimit = 2
+
+    raw_execute = Mock(wraps=sqlalchemy_numbers.raw_execute)
+    monkeypatch.setattr(sqlalchemy_numbers, "raw_execute", raw_execute)
+
+    result = run_statements(
+        sqlalchemy_numbers, "SELECT * FROM numbers", ConfigAutolimit
+    )
+
+    assert raw_execute.call_args[0][0] == "SELECT * FROM numbers\nLIMIT 2"
+    assert list(result) == [(1,), (2,)]
+
+
 def test_do_not_fail_if_sqlalchemy_autocommit_not_supported():
     conn = SQLAlchemyConnection(create_engine("sqlite://"))
     conn.connection_sqlalchemy.execution_options = Mock(
@@ -153,3 +265,61 @@ def test_do_not_fail_if_sqlalchemy_autocommit_not_supported():
     run_statements(conn, "SELECT 1", Config)
 
     # TODO: test .commit called or not depending on config!
+
+
+SLOW_QUERY_SQLITE = (
+    "WITH RECURSIVE r(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM r) "
+    "SELECT COUNT(*) FROM r"
+)
+SLOW_QUERY_DUCKDB = "SELECT COUNT(*) FROM range(10000000000)"
+
+
+class ConfigTimeout(Config):
+    statement_timeout = 1
+
+
+@pytest.mark.parametrize(
+    "connection, query",
+    [
+        (SQLAlchemyConnection(create_engine("sqlite://")), SLOW_QUERY_SQLITE),
+        (DBAPIConnection(sqlite3.connect("")), SLOW_QUERY_SQLITE),
+        (SQLAlchemyConnection(create_engine("duckdb://")), SLOW_QUERY_DUCKDB),
+        (DBAPIConnection(duckdb.connect()), SLOW_QUERY_DUCKDB),
+    ],
+    ids=["sqlite-sqlalchemy", "sqlite", "duckdb-sqlalchemy", "duckdb"],
+)
+@pytest.mark.parametrize(
+    "config, kwargs",
+    [
+        [ConfigTimeout, {}],
+        [Config, {"timeout": 1}],
+    ],
+)
+def test_run_cancels_statements_after_timeout(connection, query, config, kwargs):
+    with pytest.raises(UsageError) as excinfo:
+        run_statements(connection, query, config, **kwargs)
+
+    assert "The query was cancelled after 1 seconds" in str(excinfo.value)
+    # the connection is still usable
+    assert list(run_statements(connection, "SELECT 42", Config)) == [(42,)]
+
+
+def test_run_timeout_does_not_cancel_finished_statements(monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("sqlite://"))
+    cancel = Mock()
+    monkeypatch.setattr(conn, "_cancel", cancel)
+
+    assert list(run_statements(conn, "SELECT 42", ConfigTimeout)) == [(42,)]
+    cancel.assert_not_called()
+
+
+def test_run_cancels_statement_on_keyboard_interrupt(monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("sqlite://"))
+    cancel = Mock()
+    monkeypatch.setattr(conn, "_cancel", cancel)
+    monkeypatch.setattr(conn, "raw_execute", Mock(side_effect=KeyboardInterrupt))
+
+    with pytest.raises(KeyboardInterrupt):
+        run_statements(conn, "SELECT 42", Config)
+
+    cancel.assert_called_once_with()
@@ -1,3 +1,5 @@
+from unittest.mock import Mock
+
 import pytest
 from sql.connection import SQLAlchemyConnection, ConnectionManager
 from IPython.core.error import UsageError
@@ -344,3 +346,77 @@ def test_del_saved_key_error(ip_snippets):
     with pytest.raises(UsageError) as excinfo:
         store.del_saved_key("non_existent_key")
     assert "No such saved snippet found : non_existent_key" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "snippets, key, with_, cycle",
+    [
+        ([("a", ["b"])], "b", ["a"], "b -> a -> b"),
+        ([("a", ["c"]), ("b", ["a"])], "c", ["b"], "c -> b -> a -> c"),
+        ([("a", []), ("b", ["a"]), ("c", ["b"])], "a", ["c"], "a -> c -> b -> a"),
+    ],
+)
+def test_store_detects_cycles(snippets, key, with_, cycle):
+    sql_store = store.SQLStore()
+
+    for name, dependencies in snippets:
+        sql_store.store(name, f"SELECT * FROM {name}_source", with_=dependencies)
+
+    with pytest.raises(UsageError) as excinfo:
+        sql_store.store(key, "SELECT * FROM x", with_=with_)
+
+    assert f"circular dependency between snippets: {cycle}" in str(excinfo.value)
+
+
+def test_get_dependents_follows_reverse_edges():
+    sql_store = store.SQLStore()
+    sql_store.store("a", "SELECT * FROM t")
+    sql_store.store("b", "SELECT * FROM a", with_=["a"])
+    sql_store.store("c", "SELECT * FROM b", with_=["b"])
+    sql_store.store("d", "SELECT * FROM t")
+
+    assert store.get_dependents_for_key(sql_store, "a") == ["b", "c"]
+    assert store.get_dependents_for_key(sql_store, "c") == []
+
+    # storing b again without dependencies removes the edge
+    sql_store.store("b", "SELECT * FROM t")
+    assert store.get_dependents_for_key(sql_store, "a") == []
+
+
+def test_render_is_memoized_and_invalidated_by_upstream_changes(monkeypatch):
+    conn = SQLAlchemyConnection(engine=create_engine("sqlite://"))
+    monkeypatch.setattr(conn, "is_use_backtick_template", lambda: False)
+    sql_store = store.SQLStore()
+    sql_store.store("a", "SELECT * FROM t WHERE x > 1")
+    sql_store.store("b", "SELECT * FROM a", with_=["a"])
+    sql_store.store("c", "SELECT * FROM b", with_=["b"])
+
+    assert str(sql_store.render("SELECT * FROM c", with_=["c"])) == (
+        "WITH a AS (SELECT * FROM t WHERE x > 1), b AS (SELECT * FROM a), "
+        "c AS (SELECT * FROM b)SELECT * FROM c"
+    )
+
+    get_dependencies = Mock(wraps=sql_store.get_dependencies)
+    monkeypatch.setattr(sql_store, "get_dependencies", get_dependencies)
+
+    # the dependencies of c (and b, a) are memoized
+    str(sql_store.render("SELECT * FROM c", with_=["c"]))
+    get_dependencies.assert_called_once_with("c")
+
+    sql_store.store("a", "SELECT * FROM t WHERE x > 2")
+
+    assert str(sql_store.render("SELECT * FROM c", with_=["c"])) == (
+        "WITH a AS (SELECT * FROM t WHERE x > 2), b AS (SELECT * FROM a), "
+        "c AS (SELECT * FROM b)SELECT * FROM c"
+    )
+
+
+def test_remove_dependency():
+    sql_store = store.SQLStore()
+    sql_store.store("a", "SELECT * FROM t")
+    sql_store.store("b", "SELECT * FROM a", with_=["a"])
+
+    sql_store.remove_dependency("b", "a")
+
+    assert sql_store.get_dependencies("b") == []
+    assert sql_store.get_dependents("a") == []
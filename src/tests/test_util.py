@@ -1,4 +1,7 @@
 from datetime import datetime
+from unittest.mock import Mock
+
+from jinja2 import Template
 from IPython.core.error import UsageError
 import pytest
 from sql import util
@@ -524,3 +527,54 @@ def test_check_duplicate_arguments_does_not_raise_usageerror(
     assert util.check_duplicate_arguments(
         magic_execute, cmd_from, args, ALLOWED_DUPLICATES[cmd_from]
     )
+
+
+class _NoIterMapping(dict):
+    # fails if the mapping is copied (e.g., with dict(mapping))
+    def __iter__(self):
+        raise AssertionError("the namespace was copied")
+
+    def keys(self):
+        raise AssertionError("the namespace was copied")
+
+
+def test_render_template_does_not_copy_the_namespace():
+    namespace = _NoIterMapping(table="penguins", n=3)
+
+    rendered = util.render_template(
+        "SELECT * FROM {{table}}{% for i in range(n) %} -- {{i}}{% endfor %}",
+        namespace,
+    )
+
+    assert rendered == "SELECT * FROM penguins -- 0 -- 1 -- 2"
+
+
+def test_render_template_namespace_takes_precedence_over_globals():
+    assert util.render_template("{{range}}", {"range": "my_range"}) == "my_range"
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "SELECT * FROM penguins",
+        "SELECT * FROM penguins\n",
+        "SELECT *\r\nFROM penguins\r\n\n",
+        "SELECT '{' AS a, '}' AS b, '#' AS c, '%' AS d",
+    ],
+)
+def test_render_template_without_markers_matches_jinja(monkeypatch, source):
+    expected = Template(source).render()
+    monkeypatch.setattr(util, "Template", Mock(side_effect=AssertionError))
+
+    assert util.render_template(source, {}) == expected
+
+
+def test_render_template_caches_compiled_templates(monkeypatch):
+    util._compile_template.cache_clear()
+    template = Mock(wraps=Template)
+    monkeypatch.setattr(util, "Template", template)
+
+    for i in range(3):
+        assert util.render_template("SELECT {{i}}", {"i": i}) == f"SELECT {i}"
+
+    template.assert_called_once()
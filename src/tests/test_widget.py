@@ -1,9 +1,19 @@
+from unittest.mock import Mock
+
+from sql.connection import ConnectionManager
 from sql.widgets import TableWidget
 import pytest
 from sql.widgets import utils
+from sql.widgets.table_widget import table_widget as table_widget_module
+from sql.widgets.table_widget.pagination import TablePaginator
 import js2py
 
 
+def _row_count(table):
+    key = (ConnectionManager.current.alias, None, table)
+    return table_widget_module._row_counts[key]
+
+
 @pytest.mark.parametrize(
     "source, function_to_extract, expected",
     [
@@ -164,3 +174,192 @@ def test_table_widget_create_table_rows(ip, rows, expected):
     table_rows = create_table_rows(rows)
 
     assert table_rows == expected
+
+
+@pytest.fixture
+def paginated(ip_empty):
+    ip_empty.run_cell("%sql sqlite://")
+    ip_empty.run_cell(
+        "%sql CREATE TABLE paginated "
+        "(id INTEGER PRIMARY KEY, category TEXT NOT NULL, value FLOAT)"
+    )
+    values = ", ".join(
+        f"({i}, '{'abc'[i % 3]}', {'NULL' if i % 4 == 0 else i * 1.5})"
+        for i in range(1, 36)
+    )
+    ip_empty.run_cell(f"%sql INSERT INTO paginated VALUES {values}")
+    rows = ConnectionManager.current.raw_execute("SELECT * FROM paginated").fetchall()
+    yield [tuple(row) for row in rows]
+    ConnectionManager.close_all()
+
+
+def spy_raw_execute(monkeypatch):
+    conn = ConnectionManager.current
+    raw_execute = Mock(wraps=conn.raw_execute)
+    monkeypatch.setattr(conn, "raw_execute", raw_execute)
+    return raw_execute
+
+
+def test_table_paginator_uses_keyset_pagination(paginated, monkeypatch):
+    paginator = TablePaginator("paginated", rows_per_page=10)
+    raw_execute = spy_raw_execute(monkeypatch)
+
+    pages = [paginator.fetch_page(page) for page in range(4)]
+
+    assert [tuple(row) for page in pages for row in page] == paginated
+    # the next page is fetched in the same query
+    assert raw_execute.call_count == 2
+    query = raw_execute.call_args_list[1][0][0]
+    assert "id > 20" in query
+    assert "OFFSET" not in query
+
+
+def test_table_paginator_fetches_last_pages_in_reverse(paginated, monkeypatch):
+    paginator = TablePaginator("paginated", rows_per_page=10, n_total=35)
+    raw_execute = spy_raw_execute(monkeypatch)
+
+    last = paginator.fetch_page(3)
+    previous = paginator.fetch_page(2)
+
+    assert [tuple(row) for row in previous + last] == paginated[20:]
+    raw_execute.assert_called_once()
+    assert "ORDER BY id DESC" in raw_execute.call_args[0][0]
+
+
+@pytest.mark.parametrize(
+    "column, order",
+    [
+        ["category", "ASC"],
+        ["category", "DESC"],
+        # nullable columns use OFFSET
+        ["value", "DESC"],
+    ],
+)
+def test_table_paginator_sort(paginated, column, order):
+    paginator = TablePaginator("paginated", rows_per_page=10)
+    index = ["id", "category", "value"].index(column)
+
+    rows = [
+        tuple(row)
+        for page in range(4)
+        for row in paginator.fetch_page(page, sort_column=column, sort_order=order)
+    ]
+
+    assert [row[index] for row in rows] == sorted(
+        [row[index] for row in paginated],
+        key=lambda value: (value is not None, value),
+        reverse=order == "DESC",
+    )
+    assert sorted(rows, key=lambda row: row[0]) == paginated
+
+
+def test_table_paginator_resets_pages_when_sorting(paginated, monkeypatch):
+    paginator = TablePaginator("paginated", rows_per_page=10)
+    paginator.fetch_page(0)
+    raw_execute = spy_raw_execute(monkeypatch)
+
+    rows = paginator.fetch_page(0, sort_column="id", sort_order="DESC")
+
+    raw_execute.assert_called_once()
+    assert tuple(rows[0]) == paginated[-1]
+
+
+def test_table_paginator_without_primary_key(ip, monkeypatch):
+    paginator = TablePaginator("number_table", rows_per_page=2)
+    raw_execute = spy_raw_execute(monkeypatch)
+
+    rows = [tuple(row) for page in range(3) for row in paginator.fetch_page(page)]
+
+    assert rows == [(4, -2), (-5, 0), (2, 4), (0, 2), (-5, -1), (-2, -3)]
+    assert raw_execute.call_count == 2
+    assert "OFFSET 4" in raw_execute.call_args[0][0]
+
+
+def test_table_widget_uses_estimated_row_count(ip_empty, tmp_empty):
+    ip_empty.run_cell("%sql sqlite:///my.db")
+    ip_empty.run_cell("%sql CREATE TABLE numbers (x INT)")
+    ip_empty.run_cell(
+        "%sql INSERT INTO numbers VALUES " + ", ".join(f"({i})" for i in range(95))
+    )
+    ip_empty.run_cell("%sql ANALYZE")
+
+    table_widget = TableWidget("numbers")
+    table_widget._count_thread.join()
+
+    assert "const nTotalApproximate=true;" in table_widget.html
+    assert "const nPages=10;" in table_widget.html
+    assert _row_count("numbers") == 95
+
+
+@pytest.mark.parametrize(
+    "cells",
+    [
+        ["%sql duckdb:///my.db"],
+        # another connection would see a different (empty) database
+        ["%sql sqlite://"],
+        # DBAPI connections can't open another connection
+        ["import sqlite3; conn = sqlite3.connect('my.db')", "%sql conn"],
+    ],
+    ids=["duckdb", "sqlite-memory", "dbapi"],
+)
+def test_table_widget_counts_rows_if_estimate_cant_be_refined(
+    ip_empty, tmp_empty, cells
+):
+    for cell in cells:
+        ip_empty.run_cell(cell)
+
+    ip_empty.run_cell("%sql CREATE TABLE numbers (x INT)")
+    ip_empty.run_cell(
+        "%sql INSERT INTO numbers VALUES " + ", ".join(f"({i})" for i in range(95))
+    )
+    ip_empty.run_cell("%sql ANALYZE")
+
+    table_widget = TableWidget("numbers")
+
+    assert "const nTotalApproximate=false;" in table_widget.html
+    assert not hasattr(table_widget, "_count_thread")
+    assert _row_count("numbers") == 95
+
+
+def test_table_widget_counts_rows_without_estimate(ip):
+    table_widget = TableWidget("number_table")
+
+    assert "const nTotalApproximate=false;" in table_widget.html
+    assert not hasattr(table_widget, "_count_thread")
+    assert _row_count("number_table") == 10
+
+
+def test_table_widget_keys_paginators_by_connection(ip_empty):
+    ip_empty.run_cell("%sql sqlite:// --alias first")
+    ip_empty.run_cell("%sql CREATE TABLE numbers (x INT)")
+    ip_empty.run_cell("%sql INSERT INTO numbers VALUES (1), (2)")
+    TableWidget("numbers")
+
+    ip_empty.run_cell("%sql duckdb:// --alias second")
+    ip_empty.run_cell("%sql CREATE TABLE numbers (x INT)")
+    ip_empty.run_cell("%sql INSERT INTO numbers VALUES (1), (2), (3)")
+    TableWidget("numbers")
+
+    first = table_widget_module._paginators[("first", None, "numbers")]
+    second = table_widget_module._paginators[("second", None, "numbers")]
+
+    assert first.conn is ConnectionManager.connections["first"]
+    assert second.conn is ConnectionManager.connections["second"]
+    assert table_widget_module._row_counts[("first", None, "numbers")] == 2
+    assert table_widget_module._row_counts[("second", None, "numbers")] == 3
+
+
+def test_table_widget_forgets_paginators_when_data_changes(ip_empty):
+    ip_empty.run_cell("%sql sqlite:// --alias first")
+    ip_empty.run_cell("%sql CREATE TABLE numbers (x INT)")
+    TableWidget("numbers")
+
+    ip_empty.run_cell("%sql duckdb:// --alias second")
+    ip_empty.run_cell("%sql CREATE TABLE numbers (x INT)")
+    TableWidget("numbers")
+
+    ip_empty.run_cell("%sql INSERT INTO numbers VALUES (1)")
+
+    assert ("first", None, "numbers") in table_widget_module._paginators
+    assert ("second", None, "numbers") not in table_widget_module._paginators
+    assert ("second", None, "numbers") not in table_widget_module._row_counts